@@ -4,13 +4,14 @@ RabbitMQ adapter for persistent messaging in LixService.
 Provides durability for critical messages that must be delivered reliably.
 """
 import os
-import json
 import asyncio
 import aio_pika
 import structlog
 from typing import Dict, Any, Callable, Optional, List
 from datetime import datetime
 
+from app.utils.codec import Codec, bus_codec
+
 # Configure structured logging
 logger = structlog.get_logger()
 
@@ -136,17 +137,18 @@ class RabbitMQAdapter:
                 logger.error("Failed to publish - no RabbitMQ connection")
                 return False
                 
-            # Convert message to JSON
-            message_body = json.dumps(message).encode('utf-8')
+            # Encode with the bus codec (plain JSON unless configured otherwise)
+            message_body = bus_codec.encode(message)
             
             # Create a message with persistence and priority
             rabbit_message = aio_pika.Message(
                 body=message_body,
+                content_type=bus_codec.content_type,
                 delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
                 priority=min(priority, 9) if priority else 0,
                 timestamp=datetime.now().timestamp(),
                 headers={
-                    'content_type': 'application/json',
+                    'content_type': bus_codec.content_type,
                     'source': 'lix_service',
                     'persistent': True,
                 }
@@ -222,9 +224,8 @@ class RabbitMQAdapter:
         """
         async with message.process():
             try:
-                # Parse message body
-                message_body = message.body.decode('utf-8')
-                message_data = json.loads(message_body)
+                # Decode message body; accepts JSON and every codec format
+                message_data = Codec.decode(message.body)
                 
                 # Call all registered handlers
                 for handler in self._message_handlers:
@@ -275,88 +276,103 @@ class RabbitMQAdapter:
             }
             logger.error("Error closing RabbitMQ connection", error=str(e))
     
+    @property
+    def connected(self) -> bool:
+        """Whether the connection is open; never reconnects"""
+        return bool(self._connection and not self._connection.is_closed)
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get metrics about RabbitMQ adapter usage"""
         return {
             **self._metrics,
-            'connection_status': 'connected' if (self._connection and not self._connection.is_closed) else 'disconnected',
+            'connection_status': 'connected' if self.connected else 'disconnected',
             'consumer_status': 'running' if self._running else 'stopped',
             'consumer_count': len(self._message_handlers),
             'queue_name': self._config['queue_name'],
             'timestamp': datetime.now().isoformat(),
         }
         
-    async def create_consumer(self, queue_name: str, exchange_name: str, routing_key: str):
+    async def subscribe_broadcast(self, exchange_name: str, routing_key: str,
+                                  callback: Callable) -> Optional[aio_pika.abc.AbstractChannel]:
         """
-        Create a consumer for a specific queue
+        Receive a copy of every message with a routing key, once per process
+        
+        The messages go to an exclusive, server-named queue that is deleted
+        with its channel, so each process gets its own copy instead of
+        competing for messages with other consumers. Delivery is not
+        acknowledged; the messages are meant for live display.
         
         Args:
-            queue_name: Name of the queue to consume from
-            exchange_name: Name of the exchange the queue is bound to
-            routing_key: Routing key used to bind queue to exchange
+            exchange_name: Name of the exchange the messages are published to
+            routing_key: Routing key of the messages
+            callback: Async function called with each decoded message
             
         Returns:
-            An async generator that yields messages from the queue
+            The subscription's channel, for unsubscribe_broadcast; None if
+            RabbitMQ is unavailable
         """
         if not self._connection or self._connection.is_closed:
             await self.connect()
             
         if not self._connection or self._connection.is_closed:
-            logger.error("Failed to create consumer - no RabbitMQ connection")
+            logger.error("Failed to subscribe to broadcast - no RabbitMQ connection")
             return None
             
-        # Create a new channel for this consumer
-        channel = await self._connection.channel()
-        await channel.set_qos(prefetch_count=self._config['prefetch_count'])
-        
-        # Declare exchange
-        exchange = await channel.declare_exchange(
-            exchange_name,
-            aio_pika.ExchangeType.DIRECT,
-            durable=True
-        )
-        
-        # Declare queue
-        queue = await channel.declare_queue(
-            queue_name,
-            durable=True,
-            auto_delete=False
-        )
+        async def on_message(message: aio_pika.IncomingMessage) -> None:
+            try:
+                message_data = Codec.decode(message.body)
+                self._metrics['consumed_messages'] += 1
+                await callback(message_data)
+            except Exception as e:
+                self._metrics['errors'] += 1
+                self._metrics['last_error'] = {
+                    'timestamp': datetime.now().isoformat(),
+                    'message': str(e),
+                    'type': 'broadcast_message'
+                }
+                logger.error("Error processing broadcast message", error=str(e))
         
-        # Bind queue to exchange if routing key is provided
-        if routing_key:
-            await queue.bind(
-                exchange,
+        try:
+            channel = await self._connection.channel()
+            exchange = await channel.declare_exchange(
+                exchange_name,
+                aio_pika.ExchangeType.DIRECT,
+                durable=True
+            )
+            queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+            await queue.bind(exchange, routing_key=routing_key)
+            await queue.consume(on_message, no_ack=True)
+            
+            logger.info(
+                "Subscribed to RabbitMQ broadcast",
+                queue=queue.name,
+                exchange=exchange_name,
                 routing_key=routing_key
             )
+            return channel
             
-        logger.info(
-            "Created RabbitMQ consumer",
-            queue=queue_name,
-            exchange=exchange_name,
-            routing_key=routing_key
-        )
-        
-        # Create async generator for consuming messages
-        async def message_generator():
-            async with queue.iterator() as queue_iter:
-                async for message in queue_iter:
-                    async with message.process():
-                        try:
-                            message_body = message.body.decode('utf-8')
-                            message_data = json.loads(message_body)
-                            self._metrics['consumed_messages'] += 1
-                            yield message_data
-                        except Exception as e:
-                            self._metrics['errors'] += 1
-                            self._metrics['last_error'] = {
-                                'timestamp': datetime.now().isoformat(),
-                                'message': str(e),
-                                'type': 'consumer_message'
-                            }
-                            logger.error("Error processing message in consumer", error=str(e))
+        except Exception as e:
+            self._metrics['errors'] += 1
+            self._metrics['last_error'] = {
+                'timestamp': datetime.now().isoformat(),
+                'message': str(e),
+                'type': 'broadcast_subscribe'
+            }
+            logger.error("Error subscribing to RabbitMQ broadcast", error=str(e))
+            return None
+    
+    async def unsubscribe_broadcast(self, channel: aio_pika.abc.AbstractChannel) -> None:
+        """
+        End a broadcast subscription; its queue is deleted with the channel
         
-        return message_generator()
+        Args:
+            channel: Channel returned by subscribe_broadcast
+        """
+        try:
+            if not channel.is_closed:
+                await channel.close()
+        except Exception as e:
+            logger.warning("Error closing RabbitMQ broadcast channel", error=str(e))
 
 
 # Export singleton instance
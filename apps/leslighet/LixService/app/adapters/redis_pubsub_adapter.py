@@ -3,14 +3,15 @@
 Redis Pub/Sub adapter for LixService.
 Handles Redis connection management and message publishing/subscribing.
 """
-import os
 import json
 import asyncio
 import redis.asyncio as redis
 import structlog
-from typing import Dict, Any, Callable, Optional, List
+from typing import Dict, Any, Callable, Hashable, Optional, List, Tuple
 from datetime import datetime
 from app.config import settings
+from app.services.resources import pubsub_pool
+from app.utils.dispatch import KeyedDispatcher
 
 
 # Configure structured logging
@@ -23,10 +24,8 @@ class RedisPubSubAdapter:
         """Initialize Redis adapter with configuration"""
         # Use dedicated PubSub Redis if configured, otherwise fall back to regular Redis
         self._config = {
-            'host': os.getenv('PUBSUB_REDIS_HOST', os.getenv('REDIS_HOST', 'localhost')),
-            'port': int(os.getenv('PUBSUB_REDIS_PORT', os.getenv('REDIS_PORT', '6379'))),
-            'password': os.getenv('PUBSUB_REDIS_PASSWORD', os.getenv('REDIS_PASSWORD', '')),
-            'db': int(os.getenv('PUBSUB_REDIS_DB', os.getenv('REDIS_DB', '0'))),
+            'host': settings.PUBSUB_REDIS_HOST,
+            'port': settings.PUBSUB_REDIS_PORT,
             # Channel names
             'channels': {
                 'SPELLCHECK': 'readability:spellcheck',
@@ -42,8 +41,14 @@ class RedisPubSubAdapter:
         self._redis = None  # Redis client
         self._pubsub = None  # Redis pubsub connection
         self._connection_lock = asyncio.Lock()
-        self._subscriptions = {}  # Channel -> callback mappings
+        self._subscriptions = {}  # Channel -> (callback, ordering key function)
         self._subscriber_task = None
+        # Runs callbacks concurrently, in order per message key
+        self._dispatcher = KeyedDispatcher(
+            'redis_pubsub',
+            concurrency=settings.PUBSUB_DISPATCH_CONCURRENCY,
+            max_pending=settings.PUBSUB_DISPATCH_MAX_PENDING
+        )
         self._metrics = {
             'published_messages': 0,
             'received_messages': 0,
@@ -65,14 +70,8 @@ class RedisPubSubAdapter:
                 return True
                 
             try:
-                # Create Redis connection
-                self._redis = redis.Redis(
-                    host=self._config['host'],
-                    port=self._config['port'],
-                    password=self._config['password'] or None,
-                    db=self._config['db'],
-                    decode_responses=True
-                )
+                # Client on the shared Pub/Sub pool; the pool owns the connections
+                self._redis = redis.Redis(connection_pool=pubsub_pool)
                 
                 # Create PubSub connection
                 self._pubsub = self._redis.pubsub()
@@ -102,70 +101,75 @@ class RedisPubSubAdapter:
                 )
                 return False
     
+    def _record_error(self, error_type: str, error: Exception, **context) -> None:
+        self._metrics['errors'] += 1
+        self._metrics['last_error'] = {
+            'timestamp': datetime.now().isoformat(),
+            'message': str(error),
+            'type': error_type,
+            **context
+        }
+    
     async def _message_listener(self):
-        """Background task to listen for messages on subscribed channels"""
-        try:
-            # Only proceed if we have active subscriptions
-            if not self._subscriptions:
-                logger.warning("Message listener started without active subscriptions")
-                
-            while True:
-                if self._pubsub is None:
-                    logger.error("PubSub connection not initialized")
-                    await asyncio.sleep(1)  # Wait before retrying
-                    continue
+        """
+        Background task that reads messages as they arrive and hands them to
+        the dispatcher.
+        
+        Callbacks run concurrently, ordered per key (see subscribe). When too
+        many messages are unfinished, dispatching waits, so the listener stops
+        reading until handlers catch up.
+        
+        Messages are read with timed reads instead of listen(): the Pub/Sub
+        pool keeps its socket timeout for publishers, and a timed read that
+        finds nothing returns None rather than failing on an idle channel.
+        """
+        while True:
+            try:
+                while self._pubsub.subscribed:
+                    message = await self._pubsub.get_message(timeout=settings.PUBSUB_LISTEN_TIMEOUT)
+                    if message is None or message['type'] != 'message':
+                        continue
+                    self._metrics['received_messages'] += 1
+                    channel = message['channel']
+                    subscription = self._subscriptions.get(channel)
+                    if subscription is None:
+                        continue
                     
-                try:
-                    message = await self._pubsub.get_message(timeout=1)
-                    if message and message['type'] == 'message':
-                        self._metrics['received_messages'] += 1
-                        channel = message['channel']
-                        data = message.get('data', '')
-                        
-                        # Find and call the appropriate callback
-                        if channel in self._subscriptions:
-                            callback = self._subscriptions[channel]
-                            try:
-                                await callback(data)
-                            except Exception as e:
-                                self._metrics['errors'] += 1
-                                self._metrics['last_error'] = {
-                                    'timestamp': datetime.now().isoformat(),
-                                    'message': str(e),
-                                    'type': 'callback',
-                                    'channel': channel
-                                }
-                                logger.error(
-                                    "Error in message callback",
-                                    error=str(e),
-                                    channel=channel
-                                )
-                except redis.RedisError as e:
-                    self._metrics['errors'] += 1
-                    self._metrics['last_error'] = {
-                        'timestamp': datetime.now().isoformat(),
-                        'message': str(e),
-                        'type': 'redis_error'
-                    }
-                    logger.error("Redis message listener error", error=str(e))
-                    await asyncio.sleep(1)  # Prevent rapid retries on persistent errors
-
-                await asyncio.sleep(0.01)  # Small delay to prevent CPU spinning
+                    data = message.get('data', '')
+                    callback, key = subscription
+                    try:
+                        ordering_key = key(data) if key else channel
+                    except Exception as e:
+                        self._record_error('dispatch', e, channel=channel)
+                        ordering_key = channel
+                    await self._dispatcher.submit(ordering_key, self._callback_runner(channel, callback), data)
                 
-        except asyncio.CancelledError:
-            # Task was cancelled - normal shutdown
-            logger.info("Redis message listener stopped")
-        except Exception as e:
-            self._metrics['errors'] += 1
-            self._metrics['last_error'] = {
-                'timestamp': datetime.now().isoformat(),
-                'message': str(e),
-                'type': 'listener'
-            }
-            logger.error("Redis message listener error", error=str(e))
-            # Attempt to restart the listener
-            if not self._subscriber_task or self._subscriber_task.done():
-                self._subscriber_task = asyncio.create_task(self._message_listener())
+                # Nothing is subscribed any more
+                logger.info("Redis message listener stopped - no active subscriptions")
+                return
+                
+            except asyncio.CancelledError:
+                # Task was cancelled - normal shutdown
+                logger.info("Redis message listener stopped")
+                raise
+            except Exception as e:
+                self._record_error('listener', e)
+                logger.error("Redis message listener error", error=str(e))
+                await asyncio.sleep(1)  # Prevent rapid retries on persistent errors
+    
+    def _callback_runner(self, channel: str, callback: Callable) -> Callable:
+        """Wrap a subscription callback so its errors are recorded per channel."""
+        async def run(data):
+            try:
+                await callback(data)
+            except Exception as e:
+                self._record_error('callback', e, channel=channel)
+                logger.error(
+                    "Error in message callback",
+                    error=str(e),
+                    channel=channel
+                )
+        return run
     
     async def publish(self, channel: str, data: Any) -> bool:
         """
@@ -208,6 +212,42 @@ class RedisPubSubAdapter:
             )
             return False
     
+    async def publish_many(self, messages: List[Tuple[str, Any]]) -> bool:
+        """
+        Publish several messages with one pipelined round trip
+        
+        Args:
+            messages: (channel, data) pairs, published in order
+            
+        Returns:
+            bool: True if successful
+        """
+        if not messages:
+            return True
+            
+        if not self._redis:
+            await self.connect()
+            
+        if not self._redis:
+            return False
+            
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for channel, data in messages:
+                pipe.publish(channel, data if isinstance(data, str) else json.dumps(data))
+            await pipe.execute()
+            self._metrics['published_messages'] += len(messages)
+            return True
+            
+        except Exception as e:
+            self._record_error('publish', e, count=len(messages))
+            logger.error(
+                "Error publishing to Redis",
+                error=str(e),
+                count=len(messages)
+            )
+            return False
+    
     async def publish_status(self, status: str) -> bool:
         """
         Publish LIX service status to control channel
@@ -227,13 +267,18 @@ class RedisPubSubAdapter:
         }
         return await self.publish(self._config['channels']['CONTROL'], data)
     
-    async def subscribe(self, channel: str, callback: Callable) -> bool:
+    async def subscribe(self, channel: str, callback: Callable,
+                        key: Optional[Callable[[Any], Optional[Hashable]]] = None) -> bool:
         """
         Subscribe to a Redis channel
         
         Args:
             channel: The channel to subscribe to
             callback: Async function to call when messages arrive
+            key: Function returning the ordering key of a raw message.
+                 Messages with the same key are handled in order, others
+                 concurrently; None as key means no ordering. Without it,
+                 the channel's messages are handled one at a time.
             
         Returns:
             bool: True if successful
@@ -247,7 +292,7 @@ class RedisPubSubAdapter:
         try:
             # Subscribe to the channel
             await self._pubsub.subscribe(channel)
-            self._subscriptions[channel] = callback
+            self._subscriptions[channel] = (callback, key)
             
             # Start message listener if it's not running yet
             if self._subscriber_task is None or self._subscriber_task.done():
@@ -328,16 +373,18 @@ class RedisPubSubAdapter:
                     await self._subscriber_task
                 except asyncio.CancelledError:
                     pass
+            
+            # Drop messages that were received but not handled
+            await self._dispatcher.close()
                     
-            # Close PubSub connection
+            # Close PubSub connection, returning it to the pool
             if self._pubsub:
                 await self._pubsub.unsubscribe()
-                await self._pubsub.close()
+                await self._pubsub.aclose()
                 
-            # Close Redis connection
+            # Release the client; the pool itself is closed by the resource manager
             if self._redis:
-                await self._redis.close()
-                await self._redis.wait_closed()
+                await self._redis.aclose()
                 
             self._pubsub = None
             self._redis = None
@@ -359,13 +406,19 @@ class RedisPubSubAdapter:
         """Get the list of available channels"""
         return self._config['channels']
     
+    @property
+    def connected(self) -> bool:
+        """Whether the client is connected; never reconnects"""
+        return self._redis is not None
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get metrics about Redis Pub/Sub usage"""
-        connected = self._redis is not None
+        connected = self.connected
         return {
             **self._metrics,
             'connection_status': 'connected' if connected else 'disconnected',
             'subscriptions': list(self._subscriptions.keys()),
+            'dispatch': self._dispatcher.get_stats(),
             'timestamp': datetime.now().isoformat(),
             'uptime': (datetime.now() - datetime.fromisoformat(self._metrics['start_time'])).total_seconds() if connected else 0,
         }
@@ -22,6 +22,22 @@ class Settings:
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))  # Per pool
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", "5.0"))  # Seconds to wait for a free connection
+    REDIS_POOL_WARMUP: int = int(os.getenv("REDIS_POOL_WARMUP", "4"))  # Connections opened per pool at startup
+    
+    # Redis Pub/Sub; a dedicated Redis if set, otherwise the one above
+    PUBSUB_REDIS_HOST: str = os.getenv("PUBSUB_REDIS_HOST", REDIS_HOST)
+    PUBSUB_REDIS_PORT: int = int(os.getenv("PUBSUB_REDIS_PORT", str(REDIS_PORT)))
+    PUBSUB_REDIS_DB: int = int(os.getenv("PUBSUB_REDIS_DB", str(REDIS_DB)))
+    PUBSUB_REDIS_PASSWORD: str = os.getenv("PUBSUB_REDIS_PASSWORD", REDIS_PASSWORD)
+    PUBSUB_MAX_CONNECTIONS: int = int(os.getenv("PUBSUB_MAX_CONNECTIONS", "10"))
+    PUBSUB_LISTEN_TIMEOUT: float = float(os.getenv("PUBSUB_LISTEN_TIMEOUT", "1.0"))  # Longest single subscriber read; below the socket timeout
+    PUBSUB_DISPATCH_CONCURRENCY: int = int(os.getenv("PUBSUB_DISPATCH_CONCURRENCY", "16"))  # Message callbacks run at once
+    PUBSUB_DISPATCH_MAX_PENDING: int = int(os.getenv("PUBSUB_DISPATCH_MAX_PENDING", "256"))  # Unfinished messages before reading pauses
+    PUBSUB_BATCH_MAX_ITEMS: int = int(os.getenv("PUBSUB_BATCH_MAX_ITEMS", "64"))  # Realtime requests analyzed per batch
+    PUBSUB_BATCH_MAX_DELAY_MS: float = float(os.getenv("PUBSUB_BATCH_MAX_DELAY_MS", "5"))  # Longest wait for a batch to fill
+    PUBSUB_BATCH_MAX_PENDING: int = int(os.getenv("PUBSUB_BATCH_MAX_PENDING", "1024"))  # Waiting requests before intake pauses
     
     # RabbitMQ
     RABBITMQ_HOST: str = os.getenv("RABBITMQ_HOST", "localhost")
@@ -33,18 +49,90 @@ class Settings:
     RABBITMQ_EXCHANGE: str = os.getenv("RABBITMQ_EXCHANGE", "readability.persistent")
     RABBITMQ_ROUTING_KEY: str = os.getenv("RABBITMQ_ROUTING_KEY", "lix.critical")
     
+    # Message bus payload encoding; binary formats need codec-aware consumers
+    BUS_CODEC_SERIALIZER: str = os.getenv("BUS_CODEC_SERIALIZER", "json").lower()
+    BUS_CODEC_COMPRESSION: str = os.getenv("BUS_CODEC_COMPRESSION", "none").lower()
+    BUS_CODEC_COMPRESS_THRESHOLD: int = int(os.getenv("BUS_CODEC_COMPRESS_THRESHOLD", "65536"))
+    
     # Cache
     REDIS_CACHE_TTL: int = int(os.getenv("REDIS_CACHE_TTL", "3600"))  # 1 hour default
     REDIS_CACHE_TTL_SMALL: int = int(os.getenv("REDIS_CACHE_TTL_SMALL", "7200"))  # 2 hours for small texts
     REDIS_CACHE_TTL_LARGE: int = int(os.getenv("REDIS_CACHE_TTL_LARGE", "1800"))  # 30 minutes for large texts
+    CONTENT_CACHE_MAX_BYTES: int = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64 MB in-process budget
+    CONTENT_CACHE_MAX_ENTRIES: int = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "5000"))
+    PARSE_CACHE_MAX_BYTES: int = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))  # 32 MB for token streams
+    PARSE_CACHE_MAX_ENTRIES: int = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "2000"))
+    ANALYSIS_CACHE_L1_MAX_BYTES: int = int(os.getenv("ANALYSIS_CACHE_L1_MAX_BYTES", str(16 * 1024 * 1024)))  # 16 MB in front of Redis
+    ANALYSIS_CACHE_L1_MAX_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_L1_MAX_ENTRIES", "1000"))
+    ANALYSIS_CACHE_L1_TTL: float = float(os.getenv("ANALYSIS_CACHE_L1_TTL", "60"))  # Re-check Redis after 1 minute
+    ANALYSIS_CACHE_STALE_TTL: int = int(os.getenv("ANALYSIS_CACHE_STALE_TTL", "300"))  # Serve expired results for 5 minutes while refreshing
+    ANALYSIS_CACHE_LOCK_TTL: int = int(os.getenv("ANALYSIS_CACHE_LOCK_TTL", "30"))
+    ANALYSIS_CACHE_LOCK_WAIT: float = float(os.getenv("ANALYSIS_CACHE_LOCK_WAIT", "10"))  # Max wait for another worker's result
+    CACHE_CODEC_SERIALIZER: str = os.getenv("CACHE_CODEC_SERIALIZER", "auto").lower()  # json, msgpack or auto
+    CACHE_CODEC_COMPRESSION: str = os.getenv("CACHE_CODEC_COMPRESSION", "auto").lower()  # none, zlib, zstd, lz4 or auto
+    CACHE_CODEC_COMPRESS_THRESHOLD: int = int(os.getenv("CACHE_CODEC_COMPRESS_THRESHOLD", "4096"))  # Compress values above 4 KB
     
     # Processing thresholds
     SMALL_TEXT_THRESHOLD: int = int(os.getenv("SMALL_TEXT_THRESHOLD", "1000"))  # Less than 1000 chars is small
     LARGE_TEXT_THRESHOLD: int = int(os.getenv("LARGE_TEXT_THRESHOLD", "10000"))  # More than 10000 chars is large
     BACKGROUND_PROCESSING_THRESHOLD: int = int(os.getenv("BACKGROUND_PROCESSING_THRESHOLD", "20000"))  # Process texts larger than 20K in background
     
+    # Admission control: analysis slots shared by all endpoints of a worker
+    ADMISSION_CAPACITY: int = int(os.getenv("ADMISSION_CAPACITY", "8"))
+    ADMISSION_BULK_SHARE: float = float(os.getenv("ADMISSION_BULK_SHARE", "0.5"))  # Batch and bus work use at most half the slots
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "100"))  # Queued requests per lane before shedding
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))  # Shed requests queued longer than this
+    
+    # Batch jobs
+    BATCH_JOB_TTL: int = int(os.getenv("BATCH_JOB_TTL", "86400"))  # Keep job records for 24 hours
+    BATCH_PROGRESS_INTERVAL: float = float(os.getenv("BATCH_PROGRESS_INTERVAL", "1.0"))  # Flush results and progress at most once a second
+    BATCH_WORKER_ENABLED: bool = os.getenv("BATCH_WORKER_ENABLED", "true").lower() == "true"  # Run a batch worker in each API process
+    BATCH_WORKER_CONCURRENCY: int = int(os.getenv("BATCH_WORKER_CONCURRENCY", "2"))  # Jobs run at once per worker
+    BATCH_LEASE_TTL: float = float(os.getenv("BATCH_LEASE_TTL", "60"))  # Jobs of silent workers are requeued after a minute
+    BATCH_HEARTBEAT_INTERVAL: float = float(os.getenv("BATCH_HEARTBEAT_INTERVAL", "15"))
+    BATCH_POLL_INTERVAL: float = float(os.getenv("BATCH_POLL_INTERVAL", "2"))  # Queue poll interval when idle
+    BATCH_MAX_ATTEMPTS: int = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))  # Claims before a job is marked failed
+    
+    # Background tasks for large texts
+    TASK_TTL: int = int(os.getenv("TASK_TTL", "3600"))  # Keep task records for 1 hour
+    TASK_EVENTS_CHANNEL: str = os.getenv("TASK_EVENTS_CHANNEL", "readability:tasks")  # Progress and completion events
+    TASK_HEARTBEAT_INTERVAL: float = float(os.getenv("TASK_HEARTBEAT_INTERVAL", "10"))
+    TASK_STALE_AFTER: float = float(os.getenv("TASK_STALE_AFTER", "60"))  # Tasks silent this long are interrupted and may be resubmitted
+    TASK_EVENT_TIMEOUT: float = float(os.getenv("TASK_EVENT_TIMEOUT", "15"))  # Re-read the record if no event arrives for this long
+    
+    # Analysis execution backend: "auto" picks inline/thread/process by text size
+    ANALYSIS_EXECUTOR_MODE: str = os.getenv("ANALYSIS_EXECUTOR_MODE", "auto").lower()
+    ANALYSIS_THREAD_THRESHOLD: int = int(os.getenv("ANALYSIS_THREAD_THRESHOLD", "2000"))  # Above 2K chars leave the event loop
+    ANALYSIS_PROCESS_THRESHOLD: int = int(os.getenv("ANALYSIS_PROCESS_THRESHOLD", "20000"))  # Above 20K chars use the process pool
+    ANALYSIS_THREAD_WORKERS: int = int(os.getenv("ANALYSIS_THREAD_WORKERS", "4"))
+    ANALYSIS_PROCESS_WORKERS: int = int(os.getenv("ANALYSIS_PROCESS_WORKERS", "0"))  # 0 means CPU count
+    PARALLEL_ANALYSIS_THRESHOLD: int = int(os.getenv("PARALLEL_ANALYSIS_THRESHOLD", "200000"))  # Above 200K chars split across processes
+    PARALLEL_CHUNK_SIZE: int = int(os.getenv("PARALLEL_CHUNK_SIZE", "65536"))  # Minimum chunk size for parallel analysis
+    
+    # Streaming analysis: chunks grow while the client reads slower than we analyze
+    STREAM_CHUNK_MIN_CHARS: int = int(os.getenv("STREAM_CHUNK_MIN_CHARS", "4096"))
+    STREAM_CHUNK_MAX_CHARS: int = int(os.getenv("STREAM_CHUNK_MAX_CHARS", "262144"))
+    
+    # Raw uploads: analyzed while the body arrives
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))  # 0 means no limit
+    UPLOAD_MAX_PENDING_CHARS: int = int(os.getenv("UPLOAD_MAX_PENDING_CHARS", "262144"))  # Longest unfinished sentence or NDJSON line held
+    UPLOAD_EVENT_CHARS: int = int(os.getenv("UPLOAD_EVENT_CHARS", "65536"))  # Newly analyzed characters before a partial result
+    UPLOAD_EVENT_INTERVAL: float = float(os.getenv("UPLOAD_EVENT_INTERVAL", "0.5"))  # Or seconds since the last partial result
+    
+    # SSE fan-out: one bus consumer per pod, bounded buffers per client
+    SSE_BUFFER_SIZE: int = int(os.getenv("SSE_BUFFER_SIZE", "256"))  # Unread events per client before the oldest are dropped
+    SSE_HISTORY_SIZE: int = int(os.getenv("SSE_HISTORY_SIZE", "1024"))  # Recent events kept for Last-Event-ID resume
+    SSE_SUBSCRIBE_RETRY_INITIAL: float = float(os.getenv("SSE_SUBSCRIBE_RETRY_INITIAL", "1.0"))  # Seconds before retrying a failed bus subscription
+    SSE_SUBSCRIBE_RETRY_MAX: float = float(os.getenv("SSE_SUBSCRIBE_RETRY_MAX", "30.0"))  # Longest wait between subscription retries
+    
+    # WebSocket delivery: a bounded outbound queue and writer per connection
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+    WS_SLOW_CONSUMER_POLICY: str = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop").lower()  # drop, coalesce or disconnect
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "5.0"))  # Disconnect clients whose send stalls this long
+    
     # Metrics and monitoring
     ENABLE_METRICS: bool = os.getenv("ENABLE_METRICS", "true").lower() == "true"
+    LOAD_SAMPLE_INTERVAL: float = float(os.getenv("LOAD_SAMPLE_INTERVAL", "1.0"))  # Seconds between system load samples
     
     # Logs
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
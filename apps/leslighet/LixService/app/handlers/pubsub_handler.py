@@ -13,12 +13,19 @@ from datetime import datetime
 import structlog
 
 from app.services.readability import ReadabilityService
+from app.services.admission import admission, AdmissionRejected, BUS, PERSISTED
+from app.services.executor import analysis_executor
 from app.adapters.redis_pubsub_adapter import redis_pubsub
 from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+from app.config import settings
+from app.utils.micro_batch import MicroBatcher
 
 # Configure structured logging
 logger = structlog.get_logger()
 
+# Marks messages this service publishes on the shared LIX channel
+SOURCE = 'lix'
+
 class PubSubHandler:
     """Handler for Redis Pub/Sub messages with RabbitMQ persistence for critical messages"""
     
@@ -28,7 +35,14 @@ class PubSubHandler:
         from app.services.enhanced_readability import enhanced_readability_service
         self._readability_service = enhanced_readability_service
         self._running = False
-        self._pending_requests = {}
+        # Realtime requests are analyzed in micro-batches
+        self._batcher = MicroBatcher(
+            'lix_realtime',
+            self._process_batch,
+            max_items=settings.PUBSUB_BATCH_MAX_ITEMS,
+            max_delay=settings.PUBSUB_BATCH_MAX_DELAY_MS / 1000,
+            max_pending=settings.PUBSUB_BATCH_MAX_PENDING
+        )
         self._metrics = {
             'total_requests': 0,
             'successful_requests': 0,
@@ -44,22 +58,21 @@ class PubSubHandler:
             return
             
         try:
-            # Connect to Redis
-            await redis_pubsub.connect()
-            
-            # Connect to RabbitMQ for persistent messaging
-            await rabbitmq_adapter.connect()
+            await self._batcher.start()
             
-            # Process persisted messages from RabbitMQ
+            # Process persisted messages from RabbitMQ; the clients are
+            # connected by the resource manager
             await rabbitmq_adapter.consume(self._handle_persisted_message)
             
             # Announce service availability
             await redis_pubsub.publish_status('online')
             
-            # Subscribe to LIX channel
+            # Subscribe to LIX channel; each client's requests are handled in
+            # order, different clients concurrently
             await redis_pubsub.subscribe(
                 redis_pubsub.get_channels()['LIX'],
-                self._handle_message
+                self._handle_message,
+                key=self._client_key
             )
             
             # Subscribe to heartbeat channel
@@ -75,6 +88,15 @@ class PubSubHandler:
             logger.error("Failed to start PubSub handler", error=str(e))
             raise e
     
+    @staticmethod
+    def _client_key(message_str: str) -> Optional[str]:
+        """Ordering key of a LIX message: its client ID, if any"""
+        try:
+            message = json.loads(message_str) if isinstance(message_str, str) else message_str
+        except json.JSONDecodeError:
+            return None
+        return message.get('clientId') if isinstance(message, dict) else None
+    
     async def _handle_message(self, message_str: str):
         """
         Process an incoming message from Redis
@@ -98,19 +120,21 @@ class PubSubHandler:
                 logger.error(f'Invalid JSON in message: {e}')
                 return
                 
+            # Validate message is a dictionary
+            if not isinstance(message, dict):
+                logger.error('Invalid message format: not a dictionary', message_type=type(message).__name__)
+                return
+            
+            # Replies and metrics are published on the same channel; skip our own
+            if message.get('source') == SOURCE:
+                return
+                
             # Extract client_id and request_id safely
             client_id = message.get('clientId', None)
             request_id = message.get('requestId') or str(uuid.uuid4())
             
             # Log received message for debugging
             logger.debug('Received message', message=message)
-            
-            # Validate message is a dictionary
-            if not isinstance(message, dict):
-                error_msg = 'Invalid message format: not a dictionary'
-                logger.error(error_msg, message_type=type(message).__name__)
-                await self._send_error_response(client_id, error_msg, request_id)
-                return
                 
             # Extract text and options from message - handle both formats
             text = None
@@ -141,13 +165,6 @@ class PubSubHandler:
                 await self._send_error_response(client_id, error_msg, request_id)
                 return
                 
-            # Store in pending requests
-            self._pending_requests[request_id] = {
-                'client_id': client_id,
-                'start_time': start_time,
-                'text_preview': text[:50] + ('...' if len(text) > 50 else '')
-            }
-            
             self._metrics['total_requests'] += 1
             
             # Process the text with the readability service
@@ -174,46 +191,20 @@ class PubSubHandler:
                         'requestId': request_id,
                         'status': 'persisted',
                         'message': 'Request persisted for guaranteed processing',
+                        'source': SOURCE,
                         'timestamp': datetime.now().isoformat()
                     }
                 )
             else:
-                # Process directly for non-critical messages
-                result = await self._readability_service.analyze_text(
-                    text,
-                    options
-                )
-                
-                # Send result back via Redis
-                await redis_pubsub.publish(
-                    redis_pubsub.get_channels()['LIX'],
-                    {
-                        'clientId': client_id,
-                        'requestId': request_id,
-                        'content': result,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                )
-                
-                # Update metrics
-                self._metrics['successful_requests'] += 1
-                processing_time = datetime.now().timestamp() - start_time
-                self._metrics['processing_times'].append(processing_time)
-                
-                # Keep only last 100 processing times
-                if len(self._metrics['processing_times']) > 100:
-                    self._metrics['processing_times'] = self._metrics['processing_times'][-100:]
-                
-                # Calculate average processing time
-                if self._metrics['processing_times']:
-                    self._metrics['avg_processing_time'] = sum(self._metrics['processing_times']) / len(self._metrics['processing_times'])
-                
-                # Publish the LIX metrics for other services (like NLPService) to consume
-                await self.publish_lix_metrics(text, result)
-                
-            # Clean up pending request
-            if request_id in self._pending_requests:
-                del self._pending_requests[request_id]
+                # Non-critical messages are analyzed in micro-batches; a newer
+                # request from the same client replaces one still waiting
+                await self._batcher.submit(client_id, {
+                    'client_id': client_id,
+                    'request_id': request_id,
+                    'text': text,
+                    'options': options,
+                    'start_time': start_time
+                })
                 
         except Exception as e:
             logger.error(
@@ -231,10 +222,87 @@ class PubSubHandler:
                 f'Error processing request: {str(e)}',
                 request_id
             )
-            
-            # Clean up pending request
-            if request_id and request_id in self._pending_requests:
-                del self._pending_requests[request_id]
+    
+    async def _process_batch(self, requests: List[Dict[str, Any]]):
+        """
+        Analyze a micro-batch of realtime requests with one executor call and
+        publish all replies with one pipelined round trip
+        
+        Args:
+            requests: Requests queued by _handle_message, oldest first
+        """
+        channel = redis_pubsub.get_channels()['LIX']
+        texts = [request['text'] for request in requests]
+        try:
+            # One admission slot and one executor hand-off for the whole batch
+            priority = max(request['options'].get('priority', 5) for request in requests)
+            async with admission.admit(BUS, priority=priority):
+                results = await analysis_executor.run(
+                    self._readability_service.analyze_many,
+                    texts,
+                    [request['options'] for request in requests],
+                    size=sum(len(text) for text in texts)
+                )
+        except Exception as e:
+            if isinstance(e, AdmissionRejected):
+                error_msg = f"Service busy, retry in {e.retry_after:g}s"
+            else:
+                logger.error('Error processing message batch', error=str(e), size=len(requests))
+                error_msg = f'Error processing request: {str(e)}'
+            self._metrics['failed_requests'] += len(requests)
+            await redis_pubsub.publish_many([
+                (channel, self._error_message(request['client_id'], error_msg, request['request_id']))
+                for request in requests if request['client_id']
+            ])
+            return
+        
+        timestamp = datetime.now().isoformat()
+        replies = []
+        for request, result in zip(requests, results):
+            replies.append((channel, {
+                'clientId': request['client_id'],
+                'requestId': request['request_id'],
+                'content': result,
+                'source': SOURCE,
+                'timestamp': timestamp
+            }))
+            # LIX metrics for other services (like NLPService) to consume
+            replies.append((channel, self._lix_metrics_message(request['text'], result)))
+        
+        if await redis_pubsub.publish_many(replies):
+            self._metrics['metrics_published'] += len(requests)
+        
+        # Update metrics
+        self._metrics['successful_requests'] += len(requests)
+        finished = datetime.now().timestamp()
+        self._metrics['processing_times'].extend(finished - request['start_time'] for request in requests)
+        
+        # Keep only last 100 processing times
+        if len(self._metrics['processing_times']) > 100:
+            self._metrics['processing_times'] = self._metrics['processing_times'][-100:]
+        
+        # Calculate average processing time
+        if self._metrics['processing_times']:
+            self._metrics['avg_processing_time'] = sum(self._metrics['processing_times']) / len(self._metrics['processing_times'])
+    
+    @staticmethod
+    def _lix_metrics_message(text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the LIX metrics message for an analyzed text
+        
+        Args:
+            text: The original text that was analyzed
+            result: Metrics returned by the readability service
+        """
+        return {
+            'text': text,  # Include the original text for hash matching
+            'metrics': {
+                'lix': result.get('lix', {}),
+                'text_statistics': result.get('stats', {})
+            },
+            'source': SOURCE,
+            'timestamp': datetime.now().isoformat()
+        }
     
     async def publish_lix_metrics(self, text: str, result: Dict[str, Any]):
         """
@@ -246,20 +314,10 @@ class PubSubHandler:
             result: The analysis result containing readability metrics
         """
         try:
-            # Create a metrics message with the text and readability results
-            metrics_message = {
-                'text': text,  # Include the original text for hash matching
-                'metrics': {
-                    'lix': result.get('readability', {}).get('lix', {}),
-                    'text_statistics': result.get('text_analysis', {}).get('statistics', {})
-                },
-                'timestamp': datetime.now().isoformat()
-            }
-            
             # Publish to the LIX metrics channel
             await redis_pubsub.publish(
                 redis_pubsub.get_channels()['LIX'],  # Use the LIX channel for metrics
-                metrics_message
+                self._lix_metrics_message(text, result)
             )
             
             # Update metrics count
@@ -288,11 +346,16 @@ class PubSubHandler:
                 request_id=request_id
             )
             
-            # Process with the readability service
-            result = await self._readability_service.analyze_text(
-                content['text'],
-                content.get('options', {})
-            )
+            # Process with the readability service; persisted messages wait
+            # for a slot instead of being shed
+            options = content.get('options', {})
+            async with admission.admit(PERSISTED, priority=options.get('priority', 5)):
+                result = await analysis_executor.run(
+                    self._readability_service.analyze,
+                    content['text'],
+                    options,
+                    size=len(content['text'])
+                )
             
             # Send result back via Redis
             await redis_pubsub.publish(
@@ -302,6 +365,7 @@ class PubSubHandler:
                     'requestId': request_id,
                     'content': result,
                     'persisted': True,  # Mark as processed from persistence queue
+                    'source': SOURCE,
                     'timestamp': datetime.now().isoformat()
                 }
             )
@@ -351,6 +415,20 @@ class PubSubHandler:
         except Exception as e:
             logger.error("Error handling heartbeat", error=str(e))
     
+    @staticmethod
+    def _error_message(client_id: str, error_message: str, request_id: str = None) -> Dict[str, Any]:
+        """Build an error response for a client"""
+        return {
+            'clientId': client_id,
+            'requestId': request_id or str(uuid.uuid4()),
+            'content': {
+                'error': error_message,
+                'success': False
+            },
+            'source': SOURCE,
+            'timestamp': datetime.now().isoformat()
+        }
+    
     async def _send_error_response(self, client_id: str, error_message: str, request_id: str = None):
         """
         Send error response back to client
@@ -366,15 +444,7 @@ class PubSubHandler:
         try:
             await redis_pubsub.publish(
                 redis_pubsub.get_channels()['LIX'],
-                {
-                    'clientId': client_id,
-                    'requestId': request_id or str(uuid.uuid4()),
-                    'content': {
-                        'error': error_message,
-                        'success': False
-                    },
-                    'timestamp': datetime.now().isoformat()
-                }
+                self._error_message(client_id, error_message, request_id)
             )
         except Exception as e:
             logger.error("Error sending error response", error=str(e))
@@ -388,11 +458,13 @@ class PubSubHandler:
             # Announce service unavailability
             await redis_pubsub.publish_status('offline')
             
-            # Close Redis connections
-            await redis_pubsub.close()
+            # Stop receiving; the clients are closed by the resource manager
+            for channel in ('LIX', 'HEARTBEAT'):
+                await redis_pubsub.unsubscribe(redis_pubsub.get_channels()[channel])
+            await rabbitmq_adapter.stop_consuming()
             
-            # Close RabbitMQ connection
-            await rabbitmq_adapter.close()
+            # Answer the requests still waiting for a batch
+            await self._batcher.stop()
             
             self._running = False
             logger.info("LixService PubSub handler stopped")
@@ -410,7 +482,7 @@ class PubSubHandler:
         """Get handler metrics"""
         return {
             **self._metrics,
-            'pending_requests': len(self._pending_requests),
+            'pending_requests': self._batcher.get_stats()['pending'],
             'redis_metrics': redis_pubsub.get_metrics(),
             'rabbitmq_metrics': rabbitmq_adapter.get_metrics(),
             'timestamp': datetime.now().isoformat(),
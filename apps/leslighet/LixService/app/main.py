@@ -1,23 +1,24 @@
-from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from contextlib import asynccontextmanager
 import os
 import time
 import uvicorn
 import asyncio
 import json
-import redis.asyncio as redis
 import logging
 import structlog
-import psutil
-import hashlib
 # Add these new imports
 import httpx
 import uuid
+import codecs
+import functools
 from sse_starlette.sse import EventSourceResponse
+from starlette.requests import ClientDisconnect
 from app.services.factory import get_text_parser, get_recommender, get_word_analyzer
 from app.services.circuit_breaker import CircuitBreaker
 # Add Prometheus imports
@@ -38,51 +39,100 @@ logger = structlog.get_logger()
 
 # Import our services
 from app.services.readability import ReadabilityService
-from app.services.text_analysis import TextAnalysisService
+from app.services.incremental import IncrementalAnalyzer
+from app.services.statistics import StatisticsAccumulator
+from app.services.analysis import attach_recommendations
+from app.services.executor import analysis_executor
+from app.services.cache_manager import (
+    analysis_cache, generate_cache_key, get_cache_ttl
+)
+from app.services.batch_jobs import batch_job_store
+from app.services.batch_worker import batch_worker
+from app.services.admission import admission, AdmissionRejected, INTERACTIVE, ANALYZE, BATCH
+from app.services.load_sampler import load_sampler
+from app.services.resources import resources
+from app.services.tasks import task_manager, task_id_for
+from app.services.sse_hub import sse_hub
+from app.services.connections import connection_manager
+from app.utils.latest_wins import LatestWinsScheduler
+from app.utils.upload import (
+    NDJSON_MEDIA_TYPES, UploadEventSourceResponse, iter_ndjson_paragraphs, iter_text, limit_bytes
+)
 # Add import for our PubSub handler
 from app.handlers.pubsub_handler import pubsub_handler
 # Import RabbitMQ adapter
 from app.adapters.rabbitmq_adapter import rabbitmq_adapter
 
-# Redis configuration
-REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
-REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
-REDIS_DB = int(os.getenv('REDIS_DB', '0'))
-REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', '')
-REDIS_CACHE_TTL = int(os.getenv('REDIS_CACHE_TTL', '3600'))  # 1 hour default
-REDIS_CACHE_TTL_SMALL = int(os.getenv('REDIS_CACHE_TTL_SMALL', '7200'))  # 2 hours for small texts
-REDIS_CACHE_TTL_LARGE = int(os.getenv('REDIS_CACHE_TTL_LARGE', '1800'))  # 30 minutes for large texts
-
-# Cache size thresholds (in characters)
-SMALL_TEXT_THRESHOLD = 1000  # Less than 1000 chars is considered small
-LARGE_TEXT_THRESHOLD = 10000  # More than 10000 chars is considered large
-
 # RabbitMQ configuration
 RABBITMQ_EXCHANGE = os.getenv('RABBITMQ_EXCHANGE', 'readability.persistent')
 RABBITMQ_ROUTING_KEY = os.getenv('RABBITMQ_ROUTING_KEY', 'lix.analysis')
-RABBITMQ_QUEUE_NAME = os.getenv('RABBITMQ_QUEUE_NAME', 'lix_analysis_queue')
 
 # Prometheus configuration
 ENABLE_METRICS = os.getenv("ENABLE_METRICS", "true").lower() == "true"
 
-# Create Redis pool with optimized connection parameters
-redis_pool = redis.ConnectionPool(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    password=REDIS_PASSWORD,
-    decode_responses=True,
-    max_connections=20,  # Increase max connections for better parallelism
-    socket_timeout=2.0,  # Reduce timeout for faster failure detection
-    socket_keepalive=True,  # Keep connections alive
-    health_check_interval=30  # Check connection health periodically
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared resources and background services, and stop them in reverse order"""
+    logger.info('Starting LixService')
+    
+    # Sample system load in the background for throttling and health checks
+    await load_sampler.start()
+    
+    # Warm up Redis pools and connect Pub/Sub and RabbitMQ clients
+    await resources.start()
+    
+    # Start PubSub handler
+    try:
+        await pubsub_handler.start()
+        logger.info('Redis PubSub handler started')
+    except Exception as e:
+        logger.error('Failed to start Redis PubSub handler', error=str(e))
+        # Don't fail startup - we can still operate with REST/WebSocket APIs
+    
+    # Share background task events with the other workers
+    await task_manager.start()
+    
+    # Consume analysis updates once for all SSE clients of this pod
+    await sse_hub.start(RABBITMQ_EXCHANGE, RABBITMQ_ROUTING_KEY)
+    
+    # Start claiming batch jobs from the shared queue
+    if settings.BATCH_WORKER_ENABLED:
+        await batch_worker.start()
+    
+    yield
+    
+    logger.info('Shutting down LixService')
+    
+    # Hand running batch jobs back to the queue
+    await batch_worker.stop()
+    
+    # Mark background tasks still running as interrupted
+    await task_manager.stop()
+    
+    # End SSE streams and drop this pod's bus queue
+    await sse_hub.stop()
+    
+    # Stop PubSub handler
+    try:
+        await pubsub_handler.stop()
+        logger.info('Redis PubSub handler stopped')
+    except Exception as e:
+        logger.error('Error stopping Redis PubSub handler', error=str(e))
+    
+    # Stop analysis worker pools
+    analysis_executor.shutdown()
+    
+    # Close messaging clients and Redis pools
+    await resources.stop()
+    
+    await load_sampler.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="LixService",
     description="Service for analyzing text readability with LIX and RIX metrics",
     version="3.0.0",
+    lifespan=lifespan,
 )
 
 # Define metrics
@@ -115,16 +165,6 @@ CACHE_MISSES = Counter(
     "Total count of cache misses",
     ["endpoint"]
 )
-SYSTEM_MEMORY = Gauge(
-    "system_memory_usage_bytes",
-    "Memory usage of the system",
-    ["type"]
-)
-SYSTEM_CPU = Gauge(
-    "system_cpu_usage_percent",
-    "CPU usage percentage",
-    ["cpu"]
-)
 # Add WebSocket metrics
 ACTIVE_WEBSOCKET_CONNECTIONS = Gauge(
     "websocket_connections_active",
@@ -152,99 +192,19 @@ REQUEST_LATENCY = Histogram(
 if ENABLE_METRICS:
     Instrumentator().instrument(app).expose(app, include_in_schema=True, should_gzip=True)
 
-# Utility function for better cache key generation
-def generate_cache_key(text: str, include_word_analysis: bool = False, 
-                      include_sentence_analysis: bool = True) -> str:
-    """Generate a deterministic cache key based on text content and analysis options."""
-    # Create a hash of text content and analysis options
-    text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-    options_str = f":w{int(include_word_analysis)}:s{int(include_sentence_analysis)}"
-    return f"analysis:{text_hash}{options_str}"
-
-# Utility function to determine cache TTL based on text size
-def get_cache_ttl(text: str) -> int:
-    """Determine appropriate cache TTL based on text length."""
-    text_length = len(text)
-    if text_length < SMALL_TEXT_THRESHOLD:
-        return REDIS_CACHE_TTL_SMALL  # Longer TTL for small texts (more likely to be reused)
-    elif text_length > LARGE_TEXT_THRESHOLD:
-        return REDIS_CACHE_TTL_LARGE  # Shorter TTL for large texts (consume more memory)
-    else:
-        return REDIS_CACHE_TTL  # Default TTL for medium texts
-
-# Utility function for Redis operations with retry logic
-async def redis_operation(operation_func, *args, retries=2, **kwargs):
-    """Execute a Redis operation with retry logic."""
-    for attempt in range(retries + 1):
-        try:
-            async with redis.Redis(connection_pool=redis_pool) as r:
-                return await operation_func(r, *args, **kwargs)
-        except (redis.ConnectionError, redis.TimeoutError) as e:
-            if attempt == retries:
-                logger.warning(f"Redis operation failed after {retries} retries", error=str(e))
-                return None
-            await asyncio.sleep(0.1)  # Brief pause before retry
-        except Exception as e:
-            logger.warning("Redis operation error", error=str(e))
-            return None
-
-# Cache getter with retry
-async def get_from_cache(key: str):
-    async def _get(r, key):
-        return await r.get(key)
-    return await redis_operation(_get, key)
-
-# Cache setter with retry
-async def set_in_cache(key: str, value: str, ttl: int):
-    async def _set(r, key, value, ttl):
-        return await r.set(key, value, ex=ttl)
-    return await redis_operation(_set, key, value, ttl)
-
-# Function to get a Redis connection with context manager
-async def get_redis_pool():
-    """Get Redis connection from pool using async context manager"""
-    return redis.Redis(connection_pool=redis_pool)
-
-# Add application event handlers
-@app.on_event('startup')
-async def startup_event():
-    """Initialize services on application startup"""
-    logger.info('Starting LixService')
-    
-    # Start PubSub handler
-    try:
-        await pubsub_handler.start()
-        logger.info('Redis PubSub handler started')
-    except Exception as e:
-        logger.error('Failed to start Redis PubSub handler', error=str(e))
-        # Don't fail startup - we can still operate with REST/WebSocket APIs
-    
-    # Connect to RabbitMQ
-    try:
-        await rabbitmq_adapter.connect()
-        logger.info('RabbitMQ connection established')
-    except Exception as e:
-        logger.error('Failed to connect to RabbitMQ', error=str(e))
-        # Don't fail startup - we can still operate without RabbitMQ
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Answer shed requests with 503 and a retry hint."""
+    ERROR_COUNT.labels(endpoint=request.url.path, error_type="overloaded").inc()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
 
-@app.on_event('shutdown')
-async def shutdown_event():
-    """Clean up resources on application shutdown"""
-    logger.info('Shutting down LixService')
-    
-    # Stop PubSub handler
-    try:
-        await pubsub_handler.stop()
-        logger.info('Redis PubSub handler stopped')
-    except Exception as e:
-        logger.error('Error stopping Redis PubSub handler', error=str(e))
-    
-    # Close RabbitMQ connection
-    try:
-        await rabbitmq_adapter.close()
-        logger.info('RabbitMQ connection closed')
-    except Exception as e:
-        logger.error('Error closing RabbitMQ connection', error=str(e))
+def is_full_result(result: Dict[str, Any]) -> bool:
+    """Only full analyses are cached; degraded ones are answered but not stored."""
+    return not result.get("degraded")
 
 # Add CORS middleware
 app.add_middleware(
@@ -263,30 +223,6 @@ HTML_PATH = os.path.join(STATIC_DIR, "index.html")
 # Mount static files directory
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info("WebSocket connected")
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info("WebSocket disconnected")
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-
-manager = ConnectionManager()
-
 # Request models
 class TextRequest(BaseModel):
     text: str
@@ -309,6 +245,14 @@ class BatchTextRequest(BaseModel):
         description="List of texts to analyze", 
         example=[{"id": "doc1", "content": "This is the first text."}, {"id": "doc2", "content": "This is the second text."}])
     priority: Optional[int] = Field(1, description="Priority of the batch job (1-10)")
+    include_word_analysis: Optional[bool] = Field(
+        default=False,
+        description="Include detailed word analysis in each result"
+    )
+    include_sentence_analysis: Optional[bool] = Field(
+        default=True,
+        description="Include detailed sentence analysis in each result"
+    )
 
 @app.post("/analyze/batch")
 async def analyze_text_batch(request: BatchTextRequest):
@@ -335,34 +279,15 @@ async def analyze_text_batch(request: BatchTextRequest):
         ERROR_COUNT.labels(endpoint="/analyze/batch", error_type="batch_too_large").inc()
         raise HTTPException(status_code=400, detail="Batch size cannot exceed 100 texts")
     
-    # Set up job in Redis
-    job_data = {
-        "status": "queued",
-        "total": texts_count,
-        "completed": 0,
-        "failed": 0,
-        "created_at": time.time(),
-        "priority": min(max(request.priority, 1), 10),  # Clamp priority between 1-10
-        "results": {}
-    }
-    
-    # Store job data and text data
-    async with get_redis_pool() as redis:
-        # Store job metadata
-        await redis.set(f"batch_job:{job_id}", json.dumps(job_data), ex=86400)  # 24 hour expiry
-        
-        # Queue job for processing
-        texts_data = json.dumps(request.texts)
-        await redis.set(f"batch_job:{job_id}:texts", texts_data, ex=86400)
-        
-        # Add to processing queue with priority
-        await redis.zadd(
-            "batch_processing_queue",
-            {job_id: job_data["priority"]}
-        )
+    # Store the job and its texts, and queue it, in one round trip
+    await batch_job_store.create(
+        job_id,
+        request.texts,
+        priority=min(max(request.priority, 1), 10)  # Clamp priority between 1-10
+    )
     
-    # Start background task to process the batch
-    asyncio.create_task(process_batch_job(job_id))
+    # Any batch worker may claim the job; wake the local one right away
+    batch_worker.notify()
     
     return {
         "job_id": job_id,
@@ -384,106 +309,12 @@ async def get_batch_status(job_id: str):
     """
     REQUEST_COUNT.labels(endpoint="/analyze/batch/status", method="GET").inc()
     
-    async with get_redis_pool() as redis:
-        job_data_str = await redis.get(f"batch_job:{job_id}")
-        
-        if not job_data_str:
-            ERROR_COUNT.labels(endpoint="/analyze/batch/status", error_type="job_not_found").inc()
-            raise HTTPException(status_code=404, detail="Batch job not found")
-            
-        job_data = json.loads(job_data_str)
-        
-        # If job is complete, include results
-        if job_data["status"] == "completed":
-            results_str = await redis.get(f"batch_job:{job_id}:results")
-            if results_str:
-                job_data["results"] = json.loads(results_str)
-        
-        return job_data
-
-async def process_batch_job(job_id: str):
-    """
-    Process a batch job in the background
+    job_data = await batch_job_store.get_status(job_id)
+    if job_data is None:
+        ERROR_COUNT.labels(endpoint="/analyze/batch/status", error_type="job_not_found").inc()
+        raise HTTPException(status_code=404, detail="Batch job not found")
     
-    Args:
-        job_id: ID of the batch job to process
-    """
-    async with get_redis_pool() as redis:
-        # Get job data
-        job_data_str = await redis.get(f"batch_job:{job_id}")
-        texts_data_str = await redis.get(f"batch_job:{job_id}:texts")
-        
-        if not job_data_str or not texts_data_str:
-            logger.error(f"Cannot find job data or texts for job {job_id}")
-            return
-            
-        job_data = json.loads(job_data_str)
-        texts = json.loads(texts_data_str)
-        
-        # Update job status
-        job_data["status"] = "processing"
-        job_data["started_at"] = time.time()
-        await redis.set(f"batch_job:{job_id}", json.dumps(job_data), ex=86400)
-        
-        # Process each text
-        results = {}
-        completed = 0
-        failed = 0
-        
-        for text_item in texts:
-            try:
-                text_id = text_item.get("id", str(uuid.uuid4()))
-                content = text_item.get("content", "")
-                
-                if not content:
-                    failed += 1
-                    results[text_id] = {"error": "Empty content"}
-                    continue
-                
-                # Process the text
-                readability_data = ReadabilityService.get_readability(content)
-                text_analysis_data = TextAnalysisService.analyze_text(content)
-                
-                recommender = get_recommender()
-                recommendations = recommender.generate({
-                    "lix_score": readability_data["lix"]["score"],
-                    "rix_score": readability_data["rix"]["score"],
-                    "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-                    "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"]
-                })
-                
-                results[text_id] = {
-                    "readability": readability_data,
-                    "analysis": text_analysis_data,
-                    "recommendations": recommendations
-                }
-                
-                completed += 1
-                
-                # Update progress every 5 texts
-                if completed % 5 == 0:
-                    job_data["completed"] = completed
-                    job_data["failed"] = failed
-                    await redis.set(f"batch_job:{job_id}", json.dumps(job_data), ex=86400)
-                
-            except Exception as e:
-                logger.error(f"Error processing text in batch: {str(e)}")
-                failed += 1
-                results[text_id] = {"error": str(e)}
-        
-        # Update final job status
-        job_data["status"] = "completed"
-        job_data["completed"] = completed
-        job_data["failed"] = failed
-        job_data["completed_at"] = time.time()
-        job_data["processing_time"] = job_data["completed_at"] - job_data.get("started_at", job_data["completed_at"])
-        
-        # Store results separately to keep job metadata small
-        await redis.set(f"batch_job:{job_id}:results", json.dumps(results), ex=86400)
-        await redis.set(f"batch_job:{job_id}", json.dumps(job_data), ex=86400)
-        
-        # Remove from processing queue
-        await redis.zrem("batch_processing_queue", job_id)
+    return job_data
 
 def estimate_processing_time(text_count: int) -> float:
     """
@@ -517,13 +348,12 @@ async def serve_index(request: Request):
         return HTMLResponse(content=f"<h1>Error</h1><p>{str(e)}</p>", status_code=500)
 
 @app.post("/analyze", response_model=FullAnalysisResponse)
-async def analyze_text(request: TextRequest, background_tasks: BackgroundTasks):
+async def analyze_text(request: TextRequest):
     """
     Analyze text and return comprehensive readability and text analysis metrics.
     
     Args:
         request: TextRequest with the text to analyze
-        background_tasks: FastAPI BackgroundTasks for processing large texts
         
     Returns:
         Full analysis results with readability metrics and text analysis
@@ -546,98 +376,75 @@ async def analyze_text(request: TextRequest, background_tasks: BackgroundTasks):
                 include_sentence_analysis=request.include_sentence_analysis
             )
             
-            # Try to get from cache with optimized retrieval
-            cached_result = await get_from_cache(cache_key)
-            if cached_result:
-                CACHE_HITS.labels(endpoint="/analyze").inc()
-                result = json.loads(cached_result)
-                result["cached"] = True
-                result["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
-                return result
-            
-            CACHE_MISSES.labels(endpoint="/analyze").inc()
-            
             # For large texts, perform async processing and return a task ID
             if len(text) > BACKGROUND_PROCESSING_THRESHOLD:
-                # Create a task ID for the client to poll
-                task_id = f"task-{hashlib.md5(text.encode('utf-8')).hexdigest()[:10]}-{int(time.time())}"
+                cached_result = await analysis_cache.get(cache_key)
+                if cached_result is not None:
+                    CACHE_HITS.labels(endpoint="/analyze").inc()
+                    cached_result["cached"] = True
+                    cached_result["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
+                    return cached_result
                 
-                # Store task status in Redis
-                task_status_key = f"task_status:{task_id}"
-                await set_in_cache(task_status_key, json.dumps({
-                    "status": "processing",
-                    "created": time.time()
-                }), 3600)  # 1 hour TTL for task status
+                CACHE_MISSES.labels(endpoint="/analyze").inc()
                 
-                # Add background task
-                background_tasks.add_task(
-                    process_text_analysis_background,
-                    task_id=task_id,
-                    text=text,
+                # Start a background task, or join the one already running
+                # for the same text and options
+                task, _ = await submit_analysis_task(
+                    text, cache_key,
                     include_word_analysis=request.include_word_analysis,
                     include_sentence_analysis=request.include_sentence_analysis,
-                    cache_key=cache_key,
                     user_context=request.user_context
                 )
+                task["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
+                return JSONResponse(task)
+            
+            async def compute():
+                # Track word count
+                word_count = len(text.split())
+                WORD_COUNT_GAUGE.set(word_count)
                 
-                # Return task ID to client
-                return JSONResponse({
-                    "task_id": task_id,
-                    "status": "processing",
-                    "polling_endpoint": f"/task/{task_id}",
+                # Wait for an analysis slot; under overload the request is shed,
+                # or answered with the cheaper simple-mode analysis
+                async with admission.admit(ANALYZE) as ticket:
+                    # Readability, text analysis and recommendations, run off the event loop
+                    document = await analysis_executor.analyze_document(
+                        text,
+                        include_word_analysis=request.include_word_analysis,
+                        include_sentence_analysis=request.include_sentence_analysis,
+                        user_context=request.user_context,
+                        simple_mode=ticket.degraded
+                    )
+                readability_data = document["readability"]
+                text_analysis_data = document["text_analysis"]
+                logger.info(
+                    "Text analysis processed",
+                    lix_score=readability_data["lix"]["score"],
+                    word_count=text_analysis_data["statistics"]["word_count"],
+                    recommendations=len(readability_data["recommendations"]),
+                    degraded=ticket.degraded
+                )
+                result = {
+                    "readability": readability_data,
+                    "text_analysis": text_analysis_data,
                     "processing_time_ms": round((time.time() - start_time) * 1000, 2),
-                    "estimated_completion_seconds": max(5, len(text) // 10000)
-                })
-            
-            # For smaller texts, process immediately
-            # Track word count
-            word_count = len(text.split())
-            WORD_COUNT_GAUGE.set(word_count)
-            
-            # Get readability metrics
-            readability_data = ReadabilityService.get_readability(text)
-            logger.info("Readability data processed", lix_score=readability_data["lix"]["score"])
-            
-            # Get text analysis
-            text_analysis_data = TextAnalysisService.analyze_text(text)
-            logger.info("Text analysis data processed", word_count=text_analysis_data["statistics"]["word_count"])
-            
-            # Generate recommendations based on both readability and text analysis
-            recommender = get_recommender()
-            recommendations = recommender.generate({
-                "lix_score": readability_data["lix"]["score"],
-                "rix_score": readability_data["rix"]["score"],
-                "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-                "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"],
-                "user_context": request.user_context
-            })
-            logger.info("Recommendations generated", count=len(recommendations))
-            
-            # Add recommendations to readability data
-            readability_data["recommendations"] = recommendations
-            
-            # Remove word analysis if not requested (to reduce response size)
-            if not request.include_word_analysis:
-                text_analysis_data.pop("word_analysis", None)
-            
-            # Remove sentence analysis if not requested
-            if not request.include_sentence_analysis:
-                text_analysis_data.pop("sentence_analysis", None)
-            
-            # Calculate processing time
-            processing_time_ms = round((time.time() - start_time) * 1000, 2)
+                    "cached": False
+                }
+                if ticket.degraded:
+                    result["degraded"] = True
+                return result
             
-            # Prepare final result
-            result = {
-                "readability": readability_data,
-                "text_analysis": text_analysis_data,
-                "processing_time_ms": processing_time_ms,
-                "cached": False
-            }
+            # Smaller texts are processed immediately; identical concurrent
+            # requests share one computation through the cache
+            result, cached = await analysis_cache.get_or_compute(
+                cache_key, compute, get_cache_ttl(text), cache_if=is_full_result
+            )
+            if cached:
+                CACHE_HITS.labels(endpoint="/analyze").inc()
+                result["cached"] = True
+                result["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
+                return result
             
-            # Cache the result with adaptive TTL based on text size
-            cache_ttl = get_cache_ttl(text)
-            await set_in_cache(cache_key, json.dumps(result), cache_ttl)
+            CACHE_MISSES.labels(endpoint="/analyze").inc()
             
             # Publish to RabbitMQ if available
             try:
@@ -656,131 +463,135 @@ async def analyze_text(request: TextRequest, background_tasks: BackgroundTasks):
             
             return result
                 
+        except (HTTPException, AdmissionRejected):
+            raise
         except Exception as e:
             ERROR_COUNT.labels(endpoint="/analyze", error_type="processing_error").inc()
             logger.error("Error analyzing text", error=str(e))
             raise HTTPException(status_code=500, detail=f"Error analyzing text: {str(e)}")
 
-@app.post("/analyze/batch", response_model=List[Dict[str, Any]])
-async def analyze_texts_batch(request: BatchTextRequest, background_tasks: BackgroundTasks):
+@app.post("/analyze/batch/sync")
+async def analyze_texts_batch(request: BatchTextRequest):
     """
-    Analyze multiple texts in batch mode for efficiency.
+    Analyze multiple texts in one request and return their results.
+    
+    Unlike POST /analyze/batch, which queues a batch job, small texts are
+    analyzed right away; texts above the background threshold are returned
+    as task references.
     
     Args:
         request: BatchTextRequest with list of texts to analyze
-        background_tasks: FastAPI BackgroundTasks
         
     Returns:
-        List of analysis results or task IDs for background processing
+        Results in request order, with task references for background
+        processing, and batch totals
     """
-    REQUEST_COUNT.labels(endpoint="/analyze/batch", method="POST").inc()
+    REQUEST_COUNT.labels(endpoint="/analyze/batch/sync", method="POST").inc()
     
-    with PROCESSING_TIME.labels(endpoint="/analyze/batch").time():
+    with PROCESSING_TIME.labels(endpoint="/analyze/batch/sync").time():
         start_time = time.time()
         
         try:
             if not request.texts:
-                ERROR_COUNT.labels(endpoint="/analyze/batch", error_type="empty_batch").inc()
+                ERROR_COUNT.labels(endpoint="/analyze/batch/sync", error_type="empty_batch").inc()
                 raise HTTPException(status_code=400, detail="No texts provided in batch")
             
-            results = []
-            background_tasks_count = 0
-            
+            # Validate the items and derive their cache keys
+            items = []
             for text_item in request.texts:
                 text = text_item.get('text', '').strip()
-                if not text:
-                    results.append({"error": "Empty text", "status": "failed"})
-                    continue
-                
-                user_context = text_item.get('user_context')
-                
-                # Generate cache key
                 cache_key = generate_cache_key(
                     text,
                     include_word_analysis=request.include_word_analysis,
                     include_sentence_analysis=request.include_sentence_analysis
-                )
+                ) if text else None
+                items.append((text, text_item.get('user_context'), cache_key))
+            
+            # Look up all texts with one cache round trip
+            cached_results = await analysis_cache.get_many([key for _, _, key in items if key])
+            cached_by_key = dict(zip([key for _, _, key in items if key], cached_results))
+            
+            results = []
+            background_tasks_count = 0
+            submissions = {}  # cache key -> (text, user_context, result slots)
+            computations = {}  # cache key -> (text, user_context, result slots)
+            
+            for text, user_context, cache_key in items:
+                if not text:
+                    results.append({"error": "Empty text", "status": "failed"})
+                    continue
                 
-                # Try to get from cache
-                cached_result = await get_from_cache(cache_key)
-                if cached_result:
-                    CACHE_HITS.labels(endpoint="/analyze/batch").inc()
-                    result = json.loads(cached_result)
-                    result["cached"] = True
-                    results.append(result)
+                cached_result = cached_by_key.get(cache_key)
+                if cached_result is not None:
+                    CACHE_HITS.labels(endpoint="/analyze/batch/sync").inc()
+                    cached_result["cached"] = True
+                    results.append(cached_result)
                     continue
                 
-                CACHE_MISSES.labels(endpoint="/analyze/batch").inc()
+                CACHE_MISSES.labels(endpoint="/analyze/batch/sync").inc()
                 
-                # For large texts, process in background
+                # For large texts, process in background, once per distinct text
                 if len(text) > BACKGROUND_PROCESSING_THRESHOLD:
-                    task_id = f"task-{hashlib.md5(text.encode('utf-8')).hexdigest()[:10]}-{int(time.time())}"
-                    task_status_key = f"task_status:{task_id}"
-                    await set_in_cache(task_status_key, json.dumps({
-                        "status": "processing",
-                        "created": time.time()
-                    }), 3600)
-                    
-                    background_tasks.add_task(
-                        process_text_analysis_background,
-                        task_id=task_id,
-                        text=text,
+                    submissions.setdefault(cache_key, (text, user_context, []))[2].append(len(results))
+                    background_tasks_count += 1
+                    results.append(None)
+                else:
+                    # Smaller texts are processed immediately, once per distinct
+                    # text; keep a slot for the result
+                    computations.setdefault(cache_key, (text, user_context, []))[2].append(len(results))
+                    results.append(None)
+            
+            async def compute(text, user_context):
+                word_count = len(text.split())
+                WORD_COUNT_GAUGE.set(word_count)
+                
+                # Run the analysis off the event loop once admitted, ordered by
+                # the batch priority among other REST requests
+                async with admission.admit(ANALYZE, priority=request.priority or 0) as ticket:
+                    document = await analysis_executor.analyze_document(
+                        text,
+                        include_word_analysis=request.include_word_analysis,
+                        include_sentence_analysis=request.include_sentence_analysis,
+                        user_context=user_context,
+                        simple_mode=ticket.degraded
+                    )
+                result = {
+                    "readability": document["readability"],
+                    "text_analysis": document["text_analysis"],
+                    "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+                    "cached": False
+                }
+                if ticket.degraded:
+                    result["degraded"] = True
+                return result
+            
+            # Submit the background tasks while the small texts are analyzed
+            submitted, computed = await asyncio.gather(
+                asyncio.gather(*(
+                    submit_analysis_task(
+                        text, cache_key,
                         include_word_analysis=request.include_word_analysis,
                         include_sentence_analysis=request.include_sentence_analysis,
-                        cache_key=cache_key,
                         user_context=user_context
                     )
-                    
-                    background_tasks_count += 1
-                    results.append({
-                        "task_id": task_id,
-                        "status": "processing",
-                        "polling_endpoint": f"/task/{task_id}",
-                        "estimated_completion_seconds": max(5, len(text) // 10000)
-                    })
-                else:
-                    # For smaller texts, process immediately
-                    word_count = len(text.split())
-                    WORD_COUNT_GAUGE.set(word_count)
-                    
-                    # Get readability metrics
-                    readability_data = ReadabilityService.get_readability(text)
-                    
-                    # Get text analysis
-                    text_analysis_data = TextAnalysisService.analyze_text(text)
-                    
-                    # Generate recommendations
-                    recommender = get_recommender()
-                    recommendations = recommender.generate({
-                        "lix_score": readability_data["lix"]["score"],
-                        "rix_score": readability_data["rix"]["score"],
-                        "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-                        "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"],
-                        "user_context": user_context
-                    })
-                    
-                    readability_data["recommendations"] = recommendations
-                    
-                    if not request.include_word_analysis:
-                        text_analysis_data.pop("word_analysis", None)
-                    
-                    if not request.include_sentence_analysis:
-                        text_analysis_data.pop("sentence_analysis", None)
-                    
-                    # Calculate processing time
-                    processing_time_ms = round((time.time() - start_time) * 1000, 2)
-                    
-                    result = {
-                        "readability": readability_data,
-                        "text_analysis": text_analysis_data,
-                        "processing_time_ms": processing_time_ms,
-                        "cached": False
-                    }
-                    
-                    # Cache the result
-                    cache_ttl = get_cache_ttl(text)
-                    await set_in_cache(cache_key, json.dumps(result), cache_ttl)
-                    results.append(result)
+                    for cache_key, (text, user_context, _) in submissions.items()
+                )),
+                asyncio.gather(*(
+                    compute(text, user_context) for text, user_context, _ in computations.values()
+                ))
+            )
+            for (_, _, slots), (task, _) in zip(submissions.values(), submitted):
+                for slot in slots:
+                    results[slot] = task
+            new_cache_entries = []
+            for (cache_key, (text, _, slots)), result in zip(computations.items(), computed):
+                for slot in slots:
+                    results[slot] = result
+                if is_full_result(result):
+                    new_cache_entries.append((cache_key, result, get_cache_ttl(text)))
+            
+            # Write new results with one pipeline
+            await analysis_cache.set_many(new_cache_entries)
             
             # Return summary with batch results
             return {
@@ -790,98 +601,77 @@ async def analyze_texts_batch(request: BatchTextRequest, background_tasks: Backg
                 "batch_processing_time_ms": round((time.time() - start_time) * 1000, 2)
             }
                 
+        except (HTTPException, AdmissionRejected):
+            raise
         except Exception as e:
-            ERROR_COUNT.labels(endpoint="/analyze/batch", error_type="processing_error").inc()
+            ERROR_COUNT.labels(endpoint="/analyze/batch/sync", error_type="processing_error").inc()
             logger.error("Error analyzing batch texts", error=str(e))
             raise HTTPException(status_code=500, detail=f"Error analyzing batch texts: {str(e)}")
 
-# Add a background task processor function
-async def process_text_analysis_background(task_id: str, text: str, 
-                                       include_word_analysis: bool,
-                                       include_sentence_analysis: bool,
-                                       cache_key: str,
-                                       user_context: dict = None):
-    """Process text analysis in the background for large texts."""
+async def process_text_analysis_background(progress: Callable[[int], None], text: str,
+                                           include_word_analysis: bool,
+                                           include_sentence_analysis: bool,
+                                           cache_key: str,
+                                           user_context: dict = None) -> Dict[str, Any]:
+    """Analyze a large text for a background task, reporting progress per chunk."""
     start_time = time.time()
-    try:
-        # Update task status
-        task_status_key = f"task_status:{task_id}"
-        
-        # Get readability metrics
-        readability_data = ReadabilityService.get_readability(text)
-        
-        # Get text analysis
-        text_analysis_data = TextAnalysisService.analyze_text(text)
-        
-        # Generate recommendations
-        recommender = get_recommender()
-        recommendations = recommender.generate({
-            "lix_score": readability_data["lix"]["score"],
-            "rix_score": readability_data["rix"]["score"],
-            "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-            "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"],
-            "user_context": user_context
-        })
-        
-        # Add recommendations to readability data
-        readability_data["recommendations"] = recommendations
-        
-        # Remove data if not requested
-        if not include_word_analysis:
-            text_analysis_data.pop("word_analysis", None)
-            
-        if not include_sentence_analysis:
-            text_analysis_data.pop("sentence_analysis", None)
-        
-        # Calculate processing time
-        processing_time_ms = round((time.time() - start_time) * 1000, 2)
-        
-        # Prepare final result
-        result = {
-            "readability": readability_data,
-            "text_analysis": text_analysis_data,
-            "processing_time_ms": processing_time_ms,
+    
+    async def compute():
+        # Large texts are analyzed in chunks on the process pool, so the event
+        # loop stays responsive; they queue with batch work, ahead of batch jobs
+        async with admission.admit(BATCH, priority=11):
+            document = await analysis_executor.analyze_document(
+                text,
+                progress=progress,
+                include_word_analysis=include_word_analysis,
+                include_sentence_analysis=include_sentence_analysis,
+                user_context=user_context
+            )
+        return {
+            "readability": document["readability"],
+            "text_analysis": document["text_analysis"],
+            "processing_time_ms": round((time.time() - start_time) * 1000, 2),
             "cached": False
         }
+    
+    # Stored under the original cache key as well, for /analyze cache hits
+    result, _ = await analysis_cache.get_or_compute(cache_key, compute, get_cache_ttl(text))
+    return result
+
+async def submit_analysis_task(text: str, cache_key: str, **options) -> Tuple[Dict[str, Any], bool]:
+    """
+    Start a background analysis task for a large text, or join the one with
+    the same text and options.
+    
+    Args:
+        text: Text to analyze
+        cache_key: Cache key of the text and options
+        **options: Options for process_text_analysis_background
         
-        # Store result in Redis with the original cache key
-        cache_ttl = get_cache_ttl(text)
-        await set_in_cache(cache_key, json.dumps(result), cache_ttl)
-        
-        # Update task status to completed
-        await set_in_cache(task_status_key, json.dumps({
-            "status": "completed",
-            "created": time.time(),
-            "completed": time.time(),
-            "result": result
-        }), 3600)  # 1 hour TTL
-        
-    except Exception as e:
-        logger.error(f"Background processing error for task {task_id}", error=str(e))
-        # Update task status to failed
-        await set_in_cache(
-            task_status_key, 
-            json.dumps({
-                "status": "failed",
-                "error": str(e),
-                "created": time.time(),
-                "completed": time.time()
-            }), 
-            3600
-        )
+    Returns:
+        Tuple of (task status with the endpoints to follow it, whether the
+        task was started by this call)
+    """
+    task_id = task_id_for(cache_key)
+    task, started = await task_manager.submit(
+        task_id, len(text),
+        functools.partial(process_text_analysis_background, text=text, cache_key=cache_key, **options)
+    )
+    task.update({
+        "polling_endpoint": f"/task/{task_id}",
+        "events_endpoint": f"/task/{task_id}/events",
+        "estimated_completion_seconds": max(5, len(text) // 10000)
+    })
+    return task, started
 
-# Add an endpoint to check task status
 @app.get("/task/{task_id}")
 async def get_task_status(task_id: str):
     """Check the status of a background processing task."""
-    task_status_key = f"task_status:{task_id}"
-    status_data = await get_from_cache(task_status_key)
+    status = await task_manager.get(task_id)
     
-    if not status_data:
+    if not status:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     
-    status = json.loads(status_data)
-    
     if status["status"] == "completed" and "result" in status:
         # Return the completed result
         return status["result"]
@@ -889,6 +679,32 @@ async def get_task_status(task_id: str):
     # Return the current status
     return status
 
+@app.get("/task/{task_id}/events")
+async def task_events(task_id: str):
+    """
+    Stream a background task's progress as server-sent events.
+    
+    Sends the current status, a "progress" event for every progress update,
+    and a final "completed" event with the result, or a "failed" event.
+    """
+    REQUEST_COUNT.labels(endpoint="/task/events", method="GET").inc()
+    
+    status = await task_manager.get(task_id, include_result=False)
+    if status is None:
+        ERROR_COUNT.labels(endpoint="/task/events", error_type="task_not_found").inc()
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    
+    async def event_generator():
+        async for update in task_manager.events(task_id):
+            event = "progress" if update["status"] == "processing" else update["status"]
+            yield {
+                "event": event,
+                "id": str(update.get("done_chars", 0)),
+                "data": json.dumps(update)
+            }
+    
+    return EventSourceResponse(event_generator())
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -913,69 +729,67 @@ async def health_check():
         }
     }
     
-    # Check Redis connection
-    try:
-        async with redis.Redis(connection_pool=redis_pool, socket_timeout=2.0) as r:
-            await r.ping()
-            health_status["services"]["redis"] = "up"
-            
-            # Check Redis PubSub status
-            if pubsub_handler.running:
-                health_status["services"]["redis_pubsub"] = "up"
-            
-            # Get cache stats if available
-            if ENABLE_METRICS:
-                cache_hits = 0
-                cache_misses = 0
-                try:
-                    for sample in CACHE_HITS._samples():
-                        cache_hits += sample[2]
-                    for sample in CACHE_MISSES._samples():
-                        cache_misses += sample[2]
-                        
-                    total_cache_requests = cache_hits + cache_misses
-                    health_status["metrics"]["cache_hit_ratio"] = cache_hits / total_cache_requests if total_cache_requests > 0 else 0
-                except Exception as metric_error:
-                    logger.warning("Error fetching cache metrics", error=str(metric_error))
-    except Exception as e:
+    # Check Redis on a pooled connection
+    if await resources.redis_status():
+        health_status["services"]["redis"] = "up"
+    else:
         health_status["services"]["redis"] = "down"
         health_status["status"] = "degraded"
-        logger.warning("Redis health check failed", error=str(e))
     
-    # Check RabbitMQ connection
-    try:
-        connected = await rabbitmq_adapter.connect()
-        if connected:
-            health_status["services"]["rabbitmq"] = "up"
-        else:
-            health_status["services"]["rabbitmq"] = "down"
-            health_status["status"] = "degraded"
-    except Exception as e:
+    # Messaging clients are reported as connected or not; the health check
+    # never reconnects them
+    client_status = resources.status()
+    if pubsub_handler.running and client_status["pubsub"]:
+        health_status["services"]["redis_pubsub"] = "up"
+    if client_status["rabbitmq"]:
+        health_status["services"]["rabbitmq"] = "up"
+    else:
         health_status["services"]["rabbitmq"] = "down"
         health_status["status"] = "degraded"
-        logger.warning("RabbitMQ health check failed", error=str(e))
+    health_status["redis_pools"] = client_status["pools"]
+    
+    # Get cache stats if available
+    if ENABLE_METRICS:
+        cache_hits = 0
+        cache_misses = 0
+        try:
+            for sample in CACHE_HITS._samples():
+                cache_hits += sample[2]
+            for sample in CACHE_MISSES._samples():
+                cache_misses += sample[2]
+                
+            total_cache_requests = cache_hits + cache_misses
+            health_status["metrics"]["cache_hit_ratio"] = cache_hits / total_cache_requests if total_cache_requests > 0 else 0
+        except Exception as metric_error:
+            logger.warning("Error fetching cache metrics", error=str(metric_error))
     
-    # Get system stats
+    # System stats from the shared load snapshot (the sampler also feeds
+    # the Prometheus system gauges)
     try:
-        # Update system metrics in Prometheus
-        if ENABLE_METRICS:
-            memory = psutil.virtual_memory()
-            SYSTEM_MEMORY.labels(type="total").set(memory.total)
-            SYSTEM_MEMORY.labels(type="available").set(memory.available)
-            SYSTEM_MEMORY.labels(type="used").set(memory.used)
-            
-            # Get per-CPU stats
-            for i, cpu_percent in enumerate(psutil.cpu_percent(percpu=True)):
-                SYSTEM_CPU.labels(cpu=f"cpu{i}").set(cpu_percent)
-        
-        # Add system info to response
-        health_status["system"]["cpu_percent"] = psutil.cpu_percent()
-        health_status["system"]["memory_percent"] = psutil.virtual_memory().percent
-        health_status["system"]["disk_percent"] = psutil.disk_usage('/').percent
+        snapshot = load_sampler.snapshot
+        health_status["system"]["cpu_percent"] = snapshot.cpu_percent
+        health_status["system"]["memory_percent"] = snapshot.memory_percent
+        health_status["system"]["disk_percent"] = snapshot.disk_percent
+        health_status["system"]["sampled_at"] = snapshot.timestamp
     except Exception as e:
         logger.warning("System stats check failed", error=str(e))
         health_status["system"]["error"] = str(e)
     
+    # Admission slots and queues per lane
+    health_status["admission"] = admission.get_stats()
+    
+    # Background tasks running here and clients following them
+    health_status["tasks"] = task_manager.get_stats()
+    
+    # SSE clients and the events they missed; without a bus consumer the
+    # streams stay open but receive nothing
+    health_status["sse"] = sse_hub.get_stats()
+    if not sse_hub.consuming:
+        health_status["status"] = "degraded"
+    
+    # WebSocket connections and their outbound queues
+    health_status["websockets"] = connection_manager.get_stats()
+    
     return health_status
 
 # WebSocket endpoint
@@ -983,23 +797,141 @@ async def health_check():
 async def websocket_analyze(websocket: WebSocket):
     """
     WebSocket endpoint for real-time text analysis during typing.
-    Uses adaptive throttling and incremental analysis for performance.
+    
+    Updates are coalesced per connection: at most one analysis runs at a
+    time, and when it finishes the newest text received meanwhile is
+    analyzed next; the texts in between are dropped. Analysis is incremental,
+    so only the paragraphs changed since the last analyzed text are redone.
     """
-    await manager.connect(websocket)
+    # Replies go through the connection's outbound queue and writer
+    connection = await connection_manager.connect(websocket)
     client_id = id(websocket)
     ACTIVE_WEBSOCKET_CONNECTIONS.inc()
     
-    # Track the last processing time to implement adaptive throttling
+    # Incremental analyzer holding this connection's document state
+    analyzer = IncrementalAnalyzer()
+    
+    # Time of the last analysis, to hold recommendations back while typing
     last_process_time = time.time()
-    last_text = ""
-    last_text_length = 0
-    last_word_count = 0
-    debounce_time = 0.2  # Start with 200ms debounce
-    min_debounce_time = 0.1  # Minimum 100ms between analyses
-    max_debounce_time = 0.8  # Reduced from 1.0s to 0.8s for better responsiveness
     
-    # Use a separate mini-cache for each websocket connection
-    connection_cache = {}
+    async def analyze_update(message: Dict[str, Any]):
+        """Analyze the newest text of the connection and send the result"""
+        nonlocal last_process_time, last_text
+        text = message["text"]
+        include_word_analysis = message.get("include_word_analysis", False)
+        include_sentence_analysis = message.get("include_sentence_analysis", False)
+        
+        try:
+            current_time = time.time()
+            time_since_last = current_time - last_process_time
+            
+            # Check the in-process cache tier only: incremental analysis of
+            # an edit costs less than a Redis round trip, and typing rarely
+            # repeats a text on another worker
+            cache_key = generate_cache_key(
+                text, include_word_analysis, include_sentence_analysis, kind="ws"
+            )
+            cached_result = await analysis_cache.get(cache_key, local_only=True)
+            
+            if cached_result is not None:
+                WEBSOCKET_CACHE_HITS.inc()
+                cached_result["cached"] = True
+                await connection.send_json(cached_result)
+                last_process_time = current_time
+                return
+            
+            WEBSOCKET_CACHE_MISSES.inc()
+            
+            # Start timing the processing
+            start_time = time.time()
+            
+            # Bring the per-connection incremental analyzer up to date. Only the
+            # paragraphs touched by the edit are re-tokenized; readability and
+            # statistics are built from its running counts. A first message or a
+            # large paste is moved off the event loop; the analyzer holds
+            # connection state, so it never goes to the process pool, and a
+            # running update is never cancelled. The work is sized by the
+            # region the edit dirties, not the change in length.
+            edit_size = analyzer.edit_size(text)
+            try:
+                # Typing has the highest admission priority; under overload
+                # the update is skipped and the client sends the next one
+                async with admission.admit(INTERACTIVE) as ticket:
+                    await analysis_executor.run(analyzer.update, text, size=edit_size, allow_process=False)
+            except AdmissionRejected as e:
+                # Not analyzed; let the client send the same text again
+                if last_text == text:
+                    last_text = ""
+                await connection.send_json({"status": "busy", "retry_after": e.retry_after})
+                return
+            word_count = analyzer.word_count
+            readability_data = analyzer.readability()
+            text_analysis_data = {
+                "statistics": analyzer.statistics(),
+                "word_analysis": [],
+                "sentence_analysis": []
+            }
+            
+            # Filter analysis data based on client request
+            if not include_word_analysis:
+                text_analysis_data.pop("word_analysis", None)
+            
+            if not include_sentence_analysis:
+                text_analysis_data.pop("sentence_analysis", None)
+            
+            # Generate recommendations only for:
+            # 1. Texts longer than a minimum length
+            # 2. After a certain pause in typing (to not interrupt the user)
+            # 3. When the worker is not overloaded
+            recommendations = []
+            if word_count > 15 and time_since_last > 0.7 and not ticket.degraded:
+                # Generate recommendations
+                recommender = get_recommender()
+                recommendations = recommender.generate({
+                    "lix_score": readability_data["lix"]["score"],
+                    "rix_score": readability_data["rix"]["score"],
+                    "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
+                    "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"],
+                    "user_context": message.get("user_context", {})
+                }, simplified=True)  # Use simplified mode for WebSockets
+            
+            # Add recommendations to readability data
+            readability_data["recommendations"] = recommendations
+            
+            # Calculate processing time
+            processing_time_ms = round((time.time() - start_time) * 1000, 2)
+            WEBSOCKET_PROCESSING_TIME.observe(processing_time_ms / 1000)  # Convert to seconds for histogram
+            
+            # Prepare final result
+            result = {
+                "readability": readability_data,
+                "text_analysis": text_analysis_data,
+                "processing_time_ms": processing_time_ms,
+                "cached": False,
+                "partial": False
+            }
+            if ticket.degraded:
+                result["degraded"] = True
+            else:
+                # Cache the result with adaptive TTL based on text size
+                await analysis_cache.set(cache_key, result, get_cache_ttl(text), local_only=True)
+            
+            # Send the result back to the client
+            await connection.send_json(result)
+            last_process_time = time.time()
+            
+        except Exception as e:
+            if last_text == text:
+                last_text = ""
+            logger.error("Error processing WebSocket message", error=str(e))
+            await connection.send_json({"error": f"Error processing text: {str(e)}"})
+            ERROR_COUNT.labels(endpoint="/ws/analyze", error_type="processing_error").inc()
+    
+    scheduler = LatestWinsScheduler("/ws/analyze", analyze_update)
+    
+    # Newest text queued or analyzed; cleared when its analysis is rejected
+    # or fails, so a resend is not skipped as unchanged
+    last_text = ""
     
     try:
         logger.info(f"WebSocket client connected", client_id=client_id)
@@ -1011,306 +943,56 @@ async def websocket_analyze(websocket: WebSocket):
             try:
                 message = json.loads(message_json)
                 text = message.get("text", "").strip()
-                include_word_analysis = message.get("include_word_analysis", False)
-                include_sentence_analysis = message.get("include_sentence_analysis", False)
                 
                 # Skip empty text immediately
                 if not text:
-                    await websocket.send_json({"error": "No text provided"})
+                    await connection.send_json({"error": "No text provided"})
                     continue
                 
-                # Fast path: if text is identical, use cached result
+                # Fast path: nothing changed since the last update
                 if text == last_text:
                     continue
-                
-                # Adaptive throttling based on text similarity and system load
-                current_time = time.time()
-                time_since_last = current_time - last_process_time
-                text_length = len(text)
-                
-                # Skip processing if not enough time has passed (debouncing)
-                # But allow faster updates when text length changes significantly
-                text_length_change_ratio = abs(text_length - last_text_length) / max(1, last_text_length)
-                significant_change = text_length_change_ratio > 0.15  # 15% change in length
-                
-                if time_since_last < debounce_time and not significant_change:
-                    continue
-                
-                # Adjust debounce time based on system load
-                cpu_load = psutil.cpu_percent(interval=None) / 100
-                memory_use = psutil.virtual_memory().percent / 100
-                system_load = (cpu_load + memory_use) / 2
-                
-                # Adaptive debounce based on load and text length
-                if system_load > 0.8:  # High load
-                    debounce_time = max_debounce_time
-                elif system_load > 0.5:  # Medium load
-                    debounce_time = min_debounce_time + (max_debounce_time - min_debounce_time) * (system_load - 0.5) / 0.3
-                else:  # Low load
-                    debounce_time = min_debounce_time
-                
-                # Further adjust debounce time based on text length
-                if text_length > 5000:
-                    debounce_time *= 1.2  # Increased from 1.5 to reduce latency
-                
-                # Generate cache key
-                cache_key = f"{text[:50]}_{text_length}_{include_word_analysis}_{include_sentence_analysis}"
-                
-                # Check connection-specific cache first
-                if cache_key in connection_cache:
-                    result = connection_cache[cache_key]
-                    await websocket.send_json(result)
-                    
-                    # Update tracking variables
-                    last_process_time = current_time
-                    last_text = text
-                    last_text_length = text_length
-                    continue
-                    
-                # Check global cache
-                global_cache_key = generate_cache_key(text, include_word_analysis, include_sentence_analysis)
-                cached_result = await get_from_cache(global_cache_key)
-                
-                if cached_result:
-                    WEBSOCKET_CACHE_HITS.inc()
-                    result = json.loads(cached_result)
-                    result["cached"] = True
-                    
-                    # Store in connection cache
-                    connection_cache[cache_key] = result
-                    
-                    # Manage connection cache size
-                    if len(connection_cache) > 20:  # Keep connection cache small
-                        connection_cache.clear()  # Simple approach: just clear it when it gets too big
-                        
-                    await websocket.send_json(result)
-                    
-                    # Update tracking variables
-                    last_process_time = current_time
-                    last_text = text
-                    last_text_length = text_length
-                    continue
-                
-                WEBSOCKET_CACHE_MISSES.inc()
-                
-                # Start timing the processing
-                start_time = time.time()
-                
-                # For longer texts or during frequent updates, use incremental analysis
-                is_incremental = len(text) > 1000 or time_since_last < 0.5
-                
-                if is_incremental:
-                    # For real-time typing, just calculate basic metrics first
-                    # This gives quick feedback to the user
-                    readability_data = ReadabilityService.get_readability(text)
-                    
-                    # Send fast initial result
-                    initial_result = {
-                        "readability": readability_data,
-                        "partial": True,
-                        "cached": False
-                    }
-                    await websocket.send_json(initial_result)
-                    
-                    # For very long texts, process in background and return
-                    if len(text) > 10000:
-                        # Don't block the WebSocket with detailed analysis of very long text
-                        # Let the user continue typing, and we'll catch up later
-                        asyncio.create_task(process_detailed_analysis(
-                            text, 
-                            include_word_analysis,
-                            include_sentence_analysis,
-                            global_cache_key
-                        ))
-                        
-                        # Update tracking variables
-                        last_process_time = current_time
-                        last_text = text  
-                        last_text_length = text_length
-                        continue
-                
-                # For smaller texts or after sufficient delay, process normally
-                # Use simpler text_analysis for WebSockets to reduce computation
-                words = ReadabilityService._extract_words(text)
-                word_count = len(words)
-                
-                # Only do expensive analysis when needed
-                if word_count > last_word_count * 1.1 or word_count < last_word_count * 0.9:
-                    # Full text analysis may be expensive, so only do it when:
-                    # 1. The text has significantly changed in length
-                    # 2. Or we have enough time since last analysis
-                    if significant_change or time_since_last > 0.5:
-                        text_analysis_data = TextAnalysisService.analyze_text(text, 
-                                                                          simple_mode=True)
-                    else:
-                        # Use cached analysis or simplified version
-                        text_analysis_data = TextAnalysisService.get_basic_statistics(text)
-                else:
-                    # Use cached analysis or simplified version
-                    text_analysis_data = TextAnalysisService.get_basic_statistics(text)
-                
-                # Filter analysis data based on client request
-                if not include_word_analysis:
-                    text_analysis_data.pop("word_analysis", None)
-                
-                if not include_sentence_analysis:
-                    text_analysis_data.pop("sentence_analysis", None)
-                
-                # Generate recommendations only for:
-                # 1. Texts longer than a minimum length
-                # 2. After a certain pause in typing (to not interrupt the user)
-                recommendations = []
-                if word_count > 15 and time_since_last > 0.7:
-                    # Get readability data (might already be calculated above)
-                    if 'readability_data' not in locals():
-                        readability_data = ReadabilityService.get_readability(text)
-                        
-                    # Generate recommendations
-                    recommender = get_recommender()
-                    recommendations = recommender.generate({
-                        "lix_score": readability_data["lix"]["score"],
-                        "rix_score": readability_data["rix"]["score"],
-                        "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-                        "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"],
-                        "user_context": message.get("user_context", {})
-                    }, simplified=True)  # Use simplified mode for WebSockets
-                
-                # Add recommendations to readability data
-                if 'readability_data' not in locals():
-                    readability_data = ReadabilityService.get_readability(text)
-                readability_data["recommendations"] = recommendations
-                
-                # Calculate processing time
-                processing_time_ms = round((time.time() - start_time) * 1000, 2)
-                WEBSOCKET_PROCESSING_TIME.observe(processing_time_ms / 1000)  # Convert to seconds for histogram
-                
-                # Prepare final result
-                result = {
-                    "readability": readability_data,
-                    "text_analysis": text_analysis_data,
-                    "processing_time_ms": processing_time_ms,
-                    "cached": False,
-                    "partial": False
-                }
-                
-                # Cache the result with adaptive TTL based on text size
-                cache_ttl = get_cache_ttl(text)
-                await set_in_cache(global_cache_key, json.dumps(result), cache_ttl)
-                
-                # Store in connection cache
-                connection_cache[cache_key] = result
-                
-                # Send the result back to the client
-                await websocket.send_json(result)
-                
-                # Update tracking variables
-                last_process_time = time.time()
                 last_text = text
-                last_text_length = text_length
-                last_word_count = word_count
+                
+                message["text"] = text
+                scheduler.submit(message)
                 
             except json.JSONDecodeError:
-                await websocket.send_json({"error": "Invalid JSON message"})
-            except Exception as e:
-                logger.error("Error processing WebSocket message", error=str(e))
-                await websocket.send_json({"error": f"Error processing text: {str(e)}"})
-                ERROR_COUNT.labels(endpoint="/ws/analyze", error_type="processing_error").inc()
+                await connection.send_json({"error": "Invalid JSON message"})
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-        ACTIVE_WEBSOCKET_CONNECTIONS.dec()
         logger.info(f"WebSocket client disconnected", client_id=client_id)
     except Exception as e:
-        manager.disconnect(websocket)
-        ACTIVE_WEBSOCKET_CONNECTIONS.dec()
         logger.error("WebSocket connection error", error=str(e), client_id=client_id)
         ERROR_COUNT.labels(endpoint="/ws/analyze", error_type="connection_error").inc()
-
-# Helper function for background processing of detailed analysis
-async def process_detailed_analysis(text: str, include_word_analysis: bool, 
-                               include_sentence_analysis: bool, cache_key: str):
-    """Process detailed text analysis in the background for WebSocket connections"""
-    try:
-        # Get readability metrics
-        readability_data = ReadabilityService.get_readability(text)
-        
-        # Full text analysis
-        text_analysis_data = TextAnalysisService.analyze_text(text)
-        
-        # Filter out data based on flags
-        if not include_word_analysis:
-            text_analysis_data.pop("word_analysis", None)
-            
-        if not include_sentence_analysis:
-            text_analysis_data.pop("sentence_analysis", None)
-        
-        # Generate recommendations
-        recommender = get_recommender()
-        recommendations = recommender.generate({
-            "lix_score": readability_data["lix"]["score"],
-            "rix_score": readability_data["rix"]["score"],
-            "avg_sentence_length": text_analysis_data["statistics"]["avg_sentence_length"],
-            "long_words_percentage": text_analysis_data["statistics"]["long_words_percentage"]
-        })
-        
-        # Add recommendations to data
-        readability_data["recommendations"] = recommendations
-        
-        # Prepare final result
-        result = {
-            "readability": readability_data,
-            "text_analysis": text_analysis_data,
-            "cached": False,
-            "partial": False
-        }
-        
-        # Cache the result with adaptive TTL
-        cache_ttl = get_cache_ttl(text)
-        await set_in_cache(cache_key, json.dumps(result), cache_ttl)
-    except Exception as e:
-        logger.error(f"Background analysis error: {str(e)}")
-        # We don't need to propagate this error as it's a background task
+    finally:
+        await scheduler.close()
+        connection_manager.disconnect(websocket)
+        ACTIVE_WEBSOCKET_CONNECTIONS.dec()
+        stats = scheduler.get_stats()
+        logger.info("WebSocket updates coalesced", client_id=client_id,
+                    submitted=stats["submitted"], dropped_ratio=round(stats["dropped_ratio"], 3))
 
 # SSE endpoint for real-time text analysis
 @app.get("/sse")
 async def sse_endpoint(request: Request):
-    """SSE endpoint for streaming text analysis updates."""
+    """
+    SSE endpoint for streaming text analysis updates.
+    
+    Clients share this pod's single bus consumer through the SSE hub. A
+    client that reads too slowly misses its oldest events and gets a
+    "dropped" event saying how many; a reconnecting client sends
+    Last-Event-ID and receives the events it missed, as far as they are kept.
+    """
+    REQUEST_COUNT.labels(endpoint="/sse", method="GET").inc()
+    client = sse_hub.subscribe(request.headers.get("last-event-id"))
+    
     async def event_generator():
-        # Set up RabbitMQ consumer
-        consumer = await rabbitmq_adapter.create_consumer(
-            queue_name=RABBITMQ_QUEUE_NAME,
-            exchange_name=RABBITMQ_EXCHANGE,
-            routing_key=RABBITMQ_ROUTING_KEY
-        )
-        
         try:
-            async for message in consumer:
-                if await request.is_disconnected():
-                    break
-                
-                # Parse the message and yield it as an SSE event
-                try:
-                    # Message from RabbitMQ is already in JSON format
-                    data = message
-                    yield {
-                        "event": "analysis",
-                        "id": str(time.time()),
-                        "data": json.dumps(data)
-                    }
-                except Exception as e:
-                    yield {
-                        "event": "error",
-                        "id": str(time.time()),
-                        "data": json.dumps({"error": str(e)})
-                    }
-                    ERROR_COUNT.labels(endpoint="/sse", error_type="processing").inc()
-        except Exception as e:
-            logger.error("SSE RabbitMQ consumer error", error=str(e))
-            yield {
-                "event": "error",
-                "id": str(time.time()),
-                "data": json.dumps({"error": f"SSE connection error: {str(e)}"})
-            }
+            async for event in client:
+                yield event
+        finally:
+            sse_hub.unsubscribe(client)
     
     return EventSourceResponse(event_generator())
 
@@ -1319,9 +1001,11 @@ async def stream_analysis(request: TextRequest):
     """
     Stream text analysis results as they become available.
     
-    This endpoint processes text incrementally, returning partial results
-    as soon as they become available. Useful for analyzing large texts
-    without waiting for the complete analysis.
+    The text is read in chunks; each chunk is analyzed once and merged into
+    running statistics, so every event carries the scores of the text so far
+    and the whole stream costs about as much as one analysis. Chunks grow
+    while the client reads events slower than they are produced and shrink
+    again when it keeps up.
     """
     REQUEST_COUNT.labels(endpoint='/analyze/stream', method='POST').inc()
     start_time = time.time()
@@ -1337,97 +1021,62 @@ async def stream_analysis(request: TextRequest):
         
         async def generate_incremental_results():
             try:
-                # Split text into paragraphs for incremental processing
-                paragraphs = []
-                # Simple paragraph splitting by double newlines
-                for p in text.split('\n\n'):
-                    if p.strip():  # Skip empty paragraphs
-                        paragraphs.append(p.strip())
+                accumulator = StatisticsAccumulator()
+                chunk_chars = settings.STREAM_CHUNK_MIN_CHARS
+                position = 0
+                chunk_number = 0
                 
-                if not paragraphs:
-                    paragraphs = [text]  # If no paragraph breaks, treat as a single paragraph
-                
-                # Process in chunks of paragraphs
-                total_text = ''
-                chunk_size = min(5, max(1, len(paragraphs) // 10))  # Adaptive chunk size
-                total_chunks = (len(paragraphs) + chunk_size - 1) // chunk_size
-                
-                for i in range(0, len(paragraphs), chunk_size):
-                    # Get current chunk of paragraphs
-                    current_paragraphs = paragraphs[i:i+chunk_size]
-                    chunk = ' '.join(current_paragraphs)
-                    total_text += (' ' if total_text else '') + chunk
+                while position < len(text):
+                    piece = text[position:position + chunk_chars]
+                    position += len(piece)
+                    chunk_number += 1
+                    is_final = position >= len(text)
+                    
+                    # Only this chunk is analyzed; the accumulator holds state,
+                    # so it stays out of the process pool
+                    analysis_start = time.monotonic()
+                    await analysis_executor.run(accumulator.feed, piece, size=len(piece), allow_process=False)
+                    if is_final:
+                        accumulator.finish()
+                    analysis_time = time.monotonic() - analysis_start
                     
-                    # Skip empty chunks
-                    if not chunk.strip():
-                        continue
+                    stats = accumulator.record
+                    readability_data = ReadabilityService.build_result_from_stats(stats)
+                    text_analysis_data = {"statistics": stats.summary()}
                     
-                    # Create a progress value
-                    progress = min(100, int((i + chunk_size) / len(paragraphs) * 100))
-                    chunk_number = (i // chunk_size) + 1
+                    # Streaming uses simple mode: no per-word or per-sentence analysis
+                    if request.include_word_analysis:
+                        text_analysis_data["word_analysis"] = []
+                    if request.include_sentence_analysis:
+                        text_analysis_data["sentence_analysis"] = []
                     
-                    try:
-                        # Calculate basic metrics for the accumulated text
-                        readability_data = ReadabilityService.get_readability(total_text)
-                        
-                        # Create result with basic metrics only
-                        result = {
-                            'chunk': chunk_number,
-                            'total_chunks': total_chunks,
-                            'progress': progress,
-                            'readability': readability_data,
-                            'is_final': (i + chunk_size) >= len(paragraphs),
-                            'timestamp': time.time()
-                        }
-                        
-                        # For last chunk or every 3rd chunk, include more detailed analysis
-                        detailed_analysis = ((i + chunk_size) >= len(paragraphs)) or (chunk_number % 3 == 0)
-                        
-                        if detailed_analysis:
-                            # Add text analysis for accumulated text
-                            text_analysis_data = TextAnalysisService.analyze_text(
-                                total_text,
-                                simple_mode=True  # Use simple mode for streaming
-                            )
-                            
-                            # Filter analysis data based on client request
-                            if not request.include_word_analysis:
-                                text_analysis_data.pop("word_analysis", None)
-                            
-                            if not request.include_sentence_analysis:
-                                text_analysis_data.pop("sentence_analysis", None)
-                                
-                            result['text_analysis'] = text_analysis_data
-                            
-                            # Generate recommendations for the final chunk or major milestones
-                            if (i + chunk_size) >= len(paragraphs) or progress % 50 == 0:
-                                recommender = get_recommender()
-                                statistics = text_analysis_data.get("statistics", {})
-                                recommendations = recommender.generate({
-                                    "lix_score": readability_data["lix"]["score"],
-                                    "rix_score": readability_data["rix"]["score"],
-                                    "avg_sentence_length": statistics.get("avg_sentence_length", 0),
-                                    "long_words_percentage": statistics.get("long_words_percentage", 0),
-                                    "user_context": request.user_context
-                                }, simplified=True)
-                                
-                                readability_data["recommendations"] = recommendations
-                                
-                        # Yield result as SSE event
-                        yield json.dumps({'data': result})
-                        
-                    except Exception as chunk_error:
-                        logger.error(f"Error processing chunk {chunk_number}", error=str(chunk_error))
-                        yield json.dumps({
-                            'error': str(chunk_error),
-                            'chunk': chunk_number,
-                            'total_chunks': total_chunks,
-                            'progress': progress,
-                            'is_final': (i + chunk_size) >= len(paragraphs)
-                        })
+                    # Recommendations once the whole text is known
+                    if is_final:
+                        attach_recommendations(readability_data, text_analysis_data["statistics"],
+                                               request.user_context, simplified=True)
                     
-                    # Small delay to prevent overwhelming the client and server
-                    await asyncio.sleep(0.05)
+                    result = {
+                        'chunk': chunk_number,
+                        # Estimate; chunk sizes adapt to the client
+                        'total_chunks': chunk_number + -(-(len(text) - position) // chunk_chars),
+                        'progress': 100 if is_final else int(accumulator.analyzed_chars / len(text) * 100),
+                        'readability': readability_data,
+                        'text_analysis': text_analysis_data,
+                        'is_final': is_final,
+                        'timestamp': time.time()
+                    }
+                    
+                    # The generator resumes once the event was handed to the
+                    # client connection, so this measures how fast it reads
+                    send_start = time.monotonic()
+                    yield json.dumps({'data': result})
+                    send_time = time.monotonic() - send_start
+                    
+                    # A slow reader gets fewer, larger chunks; a fast one finer progress
+                    if send_time > analysis_time:
+                        chunk_chars = min(settings.STREAM_CHUNK_MAX_CHARS, chunk_chars * 2)
+                    elif send_time < analysis_time / 4:
+                        chunk_chars = max(settings.STREAM_CHUNK_MIN_CHARS, chunk_chars // 2)
                 
                 # Final processing time
                 processing_time = time.time() - start_time
@@ -1460,16 +1109,136 @@ async def stream_analysis(request: TextRequest):
             content={"error": f"Error initializing stream analysis: {str(e)}"}
         )
 
-# Helper function to delete from cache
-async def delete_from_cache(key):
-    """Delete a key from Redis cache"""
+@app.post('/analyze/upload')
+async def upload_analysis(request: Request, include_word_analysis: bool = False,
+                          include_sentence_analysis: bool = True):
+    """
+    Analyze a raw text upload while it arrives.
+    
+    The body is either text/plain or NDJSON with one paragraph per line (a
+    JSON string or an object with a "text" field), and may be sent chunked.
+    Each chunk is decoded and merged into running statistics as soon as it is
+    received, so memory stays proportional to the chunk size and partial
+    results are streamed back as events before the upload has finished.
+    """
+    REQUEST_COUNT.labels(endpoint='/analyze/upload', method='POST').inc()
+    start_time = time.time()
+    
+    content_type = request.headers.get("content-type", "text/plain")
+    media_type, _, params = content_type.partition(";")
+    media_type = media_type.strip().lower()
+    is_ndjson = media_type in NDJSON_MEDIA_TYPES
+    if not is_ndjson and media_type != "text/plain":
+        ERROR_COUNT.labels(endpoint="/analyze/upload", error_type="unsupported_media_type").inc()
+        return JSONResponse(
+            status_code=415,
+            content={"error": "Upload text/plain or NDJSON"}
+        )
+    encoding = "utf-8"
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            encoding = value.strip().strip('"')
     try:
-        async with get_redis_pool() as redis:
-            await redis.delete(key)
-    except Exception as e:
-        logger.error("Error deleting from cache", error=str(e))
-        return False
-    return True
+        codecs.lookup(encoding)
+    except LookupError:
+        ERROR_COUNT.labels(endpoint="/analyze/upload", error_type="unknown_charset").inc()
+        return JSONResponse(
+            status_code=415,
+            content={"error": f"Unknown charset: {encoding}"}
+        )
+    
+    body_read = asyncio.Event()
+    
+    async def generate_upload_results():
+        accumulator = StatisticsAccumulator(max_pending=settings.UPLOAD_MAX_PENDING_CHARS)
+        event_number = 0
+        reported_chars = 0
+        last_event = time.monotonic()
+        has_text = False
+        
+        def build_result(is_final: bool) -> Dict[str, Any]:
+            stats = accumulator.record
+            readability_data = ReadabilityService.build_result_from_stats(stats)
+            text_analysis_data = {"statistics": stats.summary()}
+            # Simple mode, as for /analyze/stream
+            if include_word_analysis:
+                text_analysis_data["word_analysis"] = []
+            if include_sentence_analysis:
+                text_analysis_data["sentence_analysis"] = []
+            if is_final:
+                attach_recommendations(readability_data, text_analysis_data["statistics"],
+                                       None, simplified=True)
+            return {
+                'chunk': event_number,
+                'analyzed_chars': accumulator.analyzed_chars,
+                'readability': readability_data,
+                'text_analysis': text_analysis_data,
+                'is_final': is_final,
+                'timestamp': time.time()
+            }
+        
+        try:
+            chunks = limit_bytes(request.stream(), settings.UPLOAD_MAX_BYTES)
+            if is_ndjson:
+                pieces = iter_ndjson_paragraphs(chunks, settings.UPLOAD_MAX_PENDING_CHARS)
+            else:
+                pieces = iter_text(chunks, encoding)
+            
+            try:
+                async for piece in pieces:
+                    has_text = has_text or not piece.isspace()
+                    await analysis_executor.run(accumulator.feed, piece, size=len(piece), allow_process=False)
+                    
+                    # First result as soon as there is one, then by volume or time
+                    new_chars = accumulator.analyzed_chars - reported_chars
+                    if new_chars and (
+                        not event_number
+                        or new_chars >= settings.UPLOAD_EVENT_CHARS
+                        or time.monotonic() - last_event >= settings.UPLOAD_EVENT_INTERVAL
+                    ):
+                        event_number += 1
+                        reported_chars = accumulator.analyzed_chars
+                        yield json.dumps({'data': build_result(is_final=False)})
+                        last_event = time.monotonic()
+            finally:
+                body_read.set()
+            
+            if not has_text:
+                ERROR_COUNT.labels(endpoint="/analyze/upload", error_type="empty_text").inc()
+                yield json.dumps({'error': "No text provided"})
+                return
+            
+            accumulator.finish()
+            event_number += 1
+            yield json.dumps({'data': build_result(is_final=True)})
+            
+            processing_time = time.time() - start_time
+            yield json.dumps({
+                'data': {
+                    'processing_completed': True,
+                    'processing_time_seconds': round(processing_time, 2)
+                }
+            })
+            REQUEST_LATENCY.labels(endpoint='/analyze/upload', method='POST').observe(processing_time)
+            
+        except ClientDisconnect:
+            logger.info("Upload client disconnected", analyzed_chars=accumulator.analyzed_chars)
+        except ValueError as e:
+            # Covers oversized uploads, undecodable bytes and malformed NDJSON
+            ERROR_COUNT.labels(endpoint="/analyze/upload", error_type="invalid_upload").inc()
+            yield json.dumps({'error': f"Invalid upload: {str(e)}"})
+        except Exception as gen_error:
+            logger.error("Error in upload generator", error=str(gen_error))
+            ERROR_COUNT.labels(endpoint="/analyze/upload", error_type="generator_error").inc()
+            yield json.dumps({'error': f"Upload processing error: {str(gen_error)}"})
+    
+    return UploadEventSourceResponse(
+        generate_upload_results(),
+        body_read,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8012, reload=True)
\ No newline at end of file
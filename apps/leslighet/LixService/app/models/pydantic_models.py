@@ -86,4 +86,5 @@ class FullAnalysisResponse(BaseModel):
     readability: Dict[str, Any]
     text_analysis: Dict[str, Any]
     processing_time_ms: float
-    cached: Optional[bool] = False
\ No newline at end of file
+    cached: Optional[bool] = False
+    degraded: Optional[bool] = False
\ No newline at end of file
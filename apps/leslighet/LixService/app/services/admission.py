@@ -0,0 +1,267 @@
+"""
+Admission control for analysis work.
+
+All analysis on a worker shares a fixed number of slots. Each endpoint
+(lane) has its own concurrency limit, queue bound, queue timeout and base
+priority; queued requests are admitted by lane priority, then by the
+request's own priority (batch priority, message priority), then in arrival
+order. Interactive lanes therefore overtake a flood of batch work, and the
+bulk lanes can never take every slot.
+
+When a lane's queue is full, or a request waits longer than the lane's
+timeout, the request is shed (AdmissionRejected). Lanes that allow it admit
+requests that had to queue in degraded mode, so callers can answer with
+cheaper simple_mode analysis and drain the backlog faster.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+ADMISSION_QUEUE_TIME = Histogram(
+    "admission_queue_seconds",
+    "Time analysis requests wait for an admission slot",
+    ["lane"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Analysis requests waiting for an admission slot",
+    ["lane"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Analysis requests holding an admission slot",
+    ["lane"]
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Admission decisions by lane and outcome",
+    ["lane", "decision"]
+)
+
+# Lanes used by the service, from most to least latency-sensitive
+INTERACTIVE = "interactive"  # WebSocket typing
+ANALYZE = "analyze"          # REST analysis
+BUS = "bus"                  # Redis pubsub requests
+PERSISTED = "persisted"      # RabbitMQ messages; never shed, they are durable
+BATCH = "batch"              # Batch jobs and background analysis of large texts
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed because its lane is overloaded."""
+
+    def __init__(self, lane: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Lane '{lane}' is overloaded: {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class LanePolicy:
+    """
+    Admission policy of one lane.
+
+    Attributes:
+        limit: Maximum requests of the lane holding slots at once
+        priority: Base priority; higher lanes are admitted first
+        queue_size: Maximum queued requests (None for unbounded)
+        timeout: Longest wait for a slot in seconds (None to wait forever)
+        degrade: Admit requests that had to queue in degraded mode
+    """
+    limit: int
+    priority: int
+    queue_size: Optional[int] = None
+    timeout: Optional[float] = None
+    degrade: bool = False
+
+
+@dataclass
+class Ticket:
+    """An admission slot held by one request."""
+    lane: str
+    degraded: bool
+    waited: float
+
+
+class AdmissionController:
+    """
+    Priority-aware admission with per-lane limits and bounded queues.
+
+    Slots are granted eagerly when released, so a request that finds a free
+    slot and room under its lane limit never needs to look at the queue.
+    """
+
+    def __init__(self, capacity: int, lanes: Dict[str, LanePolicy]):
+        """
+        Initialize the controller.
+
+        Args:
+            capacity: Total slots shared by all lanes
+            lanes: Policy for every lane
+        """
+        self._capacity = capacity
+        self._lanes = lanes
+        self._in_flight = 0
+        self._lane_in_flight: Dict[str, int] = {lane: 0 for lane in lanes}
+        self._lane_queued: Dict[str, int] = {lane: 0 for lane in lanes}
+        self._queue: List[Tuple[int, int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _has_room(self, lane: str) -> bool:
+        return self._in_flight < self._capacity and self._lane_in_flight[lane] < self._lanes[lane].limit
+
+    def _take(self, lane: str) -> None:
+        self._in_flight += 1
+        self._lane_in_flight[lane] += 1
+        ADMISSION_IN_FLIGHT.labels(lane=lane).inc()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the best queued requests whose lanes have room."""
+        blocked = []
+        while self._queue and self._in_flight < self._capacity:
+            entry = heapq.heappop(self._queue)
+            _, _, _, lane, waiter = entry
+            if waiter.done():
+                # Timed out or cancelled; already removed from the counts
+                continue
+            if self._lane_in_flight[lane] >= self._lanes[lane].limit:
+                blocked.append(entry)
+                continue
+            self._lane_queued[lane] -= 1
+            ADMISSION_QUEUE_DEPTH.labels(lane=lane).dec()
+            self._take(lane)
+            waiter.set_result(None)
+        for entry in blocked:
+            heapq.heappush(self._queue, entry)
+
+    async def acquire(self, lane: str, priority: int = 0) -> Ticket:
+        """
+        Wait for a slot in a lane.
+
+        Args:
+            lane: Lane name
+            priority: Request priority within the lane; higher goes first
+
+        Returns:
+            Ticket to pass to release()
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        policy = self._lanes[lane]
+        if self._has_room(lane):
+            self._take(lane)
+            ADMISSION_QUEUE_TIME.labels(lane=lane).observe(0)
+            ADMISSION_DECISIONS.labels(lane=lane, decision="admitted").inc()
+            return Ticket(lane, False, 0.0)
+
+        if policy.queue_size is not None and self._lane_queued[lane] >= policy.queue_size:
+            ADMISSION_DECISIONS.labels(lane=lane, decision="shed").inc()
+            raise AdmissionRejected(lane, "queue full", retry_after=policy.timeout or 1.0)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (-policy.priority, -priority, next(self._sequence), lane, waiter))
+        self._lane_queued[lane] += 1
+        ADMISSION_QUEUE_DEPTH.labels(lane=lane).inc()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), policy.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up; hand the slot on
+                self._release_slot(lane)
+            else:
+                waiter.cancel()
+                self._lane_queued[lane] -= 1
+                ADMISSION_QUEUE_DEPTH.labels(lane=lane).dec()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            ADMISSION_DECISIONS.labels(lane=lane, decision="timeout").inc()
+            raise AdmissionRejected(lane, "queue timeout", retry_after=policy.timeout or 1.0)
+
+        waited = time.monotonic() - started
+        ADMISSION_QUEUE_TIME.labels(lane=lane).observe(waited)
+        ADMISSION_DECISIONS.labels(lane=lane, decision="degraded" if policy.degrade else "admitted").inc()
+        return Ticket(lane, policy.degrade, waited)
+
+    def _release_slot(self, lane: str) -> None:
+        self._in_flight -= 1
+        self._lane_in_flight[lane] -= 1
+        ADMISSION_IN_FLIGHT.labels(lane=lane).dec()
+        self._dispatch()
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        Give a slot back.
+
+        Args:
+            ticket: Ticket returned by acquire()
+        """
+        self._release_slot(ticket.lane)
+
+    @asynccontextmanager
+    async def admit(self, lane: str, priority: int = 0) -> AsyncIterator[Ticket]:
+        """
+        Hold a slot for the duration of a block.
+
+        Args:
+            lane: Lane name
+            priority: Request priority within the lane; higher goes first
+
+        Yields:
+            Ticket; check ticket.degraded to decide how much work to do
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        ticket = await self.acquire(lane, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get slot usage and queue depth per lane."""
+        return {
+            lane: {
+                "in_flight": self._lane_in_flight[lane],
+                "queued": self._lane_queued[lane],
+                "limit": policy.limit
+            }
+            for lane, policy in self._lanes.items()
+        }
+
+
+def _build_controller() -> AdmissionController:
+    """Build the shared controller from settings."""
+    capacity = max(1, settings.ADMISSION_CAPACITY)
+    # Bulk lanes may use at most this many slots, leaving the rest for
+    # interactive and REST requests
+    bulk_limit = max(1, int(capacity * settings.ADMISSION_BULK_SHARE))
+    timeout = settings.ADMISSION_QUEUE_TIMEOUT
+    queue_size = settings.ADMISSION_QUEUE_SIZE
+    return AdmissionController(capacity, {
+        INTERACTIVE: LanePolicy(limit=capacity, priority=40, queue_size=queue_size,
+                                timeout=timeout, degrade=True),
+        ANALYZE: LanePolicy(limit=capacity, priority=30, queue_size=queue_size,
+                            timeout=timeout, degrade=True),
+        BUS: LanePolicy(limit=bulk_limit, priority=20, queue_size=queue_size, timeout=timeout),
+        PERSISTED: LanePolicy(limit=bulk_limit, priority=20),
+        BATCH: LanePolicy(limit=bulk_limit, priority=10),
+    })
+
+
+# Shared controller for all analysis on this worker
+admission = _build_controller()
@@ -0,0 +1,83 @@
+"""
+Document analysis pipeline shared by the REST, batch and streaming endpoints.
+Combines readability metrics, text analysis and recommendations for one text.
+
+Everything here is synchronous and CPU-bound; async callers should go through
+AnalysisExecutor (see app.services.executor) instead of calling it directly.
+The functions are module-level so they can be sent to a process pool.
+"""
+from typing import Dict, Any, Optional
+
+from app.services.readability import ReadabilityService
+from app.services.text_analysis import TextAnalysisService
+from app.services.factory import get_text_parser, get_recommender
+
+
+def analyze_document(text: str,
+                     include_word_analysis: bool = True,
+                     include_sentence_analysis: bool = True,
+                     user_context: Optional[Dict[str, Any]] = None,
+                     simple_mode: bool = False,
+                     simplified_recommendations: bool = False) -> Dict[str, Any]:
+    """
+    Run the full analysis pipeline for a single text.
+
+    Args:
+        text: Text to analyze
+        include_word_analysis: Keep the per-word analysis in the result
+        include_sentence_analysis: Keep the per-sentence analysis in the result
+        user_context: Optional user context passed to the recommender
+        simple_mode: Only compute basic statistics in the text analysis
+        simplified_recommendations: Generate the shorter recommendation set
+
+    Returns:
+        Dictionary with "readability" and "text_analysis" entries; recommendations
+        are stored under readability["recommendations"]
+    """
+    # Tokenize once and share the stream between both services
+    stream = get_text_parser().tokenize(text)
+
+    readability_data = ReadabilityService.get_readability(text, stream=stream)
+    text_analysis_data = TextAnalysisService.analyze_text(
+        text, simple_mode=simple_mode, stream=stream
+    )
+
+    attach_recommendations(
+        readability_data, text_analysis_data["statistics"],
+        user_context, simplified_recommendations
+    )
+
+    # Remove optional sections that were not requested to reduce response size
+    if not include_word_analysis:
+        text_analysis_data.pop("word_analysis", None)
+    if not include_sentence_analysis:
+        text_analysis_data.pop("sentence_analysis", None)
+
+    return {
+        "readability": readability_data,
+        "text_analysis": text_analysis_data
+    }
+
+
+def attach_recommendations(readability_data: Dict[str, Any],
+                           statistics: Dict[str, Any],
+                           user_context: Optional[Dict[str, Any]] = None,
+                           simplified: bool = False) -> None:
+    """
+    Generate recommendations and store them under readability["recommendations"].
+
+    Args:
+        readability_data: Readability result to attach the recommendations to
+        statistics: Statistics block of the text analysis
+        user_context: Optional user context passed to the recommender
+        simplified: Generate the shorter recommendation set
+    """
+    # Recommendations are based on both readability and text analysis
+    recommender = get_recommender()
+    readability_data["recommendations"] = recommender.generate({
+        "lix_score": readability_data["lix"]["score"],
+        "rix_score": readability_data["rix"]["score"],
+        "avg_sentence_length": statistics["avg_sentence_length"],
+        "long_words_percentage": statistics["long_words_percentage"],
+        "user_context": user_context
+    }, simplified=simplified)
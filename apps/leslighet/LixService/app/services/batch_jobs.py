@@ -0,0 +1,367 @@
+"""
+Redis storage for batch analysis jobs.
+
+A job is a hash (`batch_job:{id}`) holding its status and progress counters,
+the submitted texts (`batch_job:{id}:texts`), and a results hash
+(`batch_job:{id}:results`) with one JSON field per text. Progress is
+advanced with HINCRBY and results are added field by field, so workers never
+rewrite the whole job, and every operation is a single pipelined round trip.
+
+Queued job ids wait in a sorted set scored by priority. A worker claims a job
+by moving it atomically into a lease set scored by the lease deadline, and
+keeps extending the lease while it works. Leases that expire (the worker
+died) are put back in the queue by any worker's reaper, and since results are
+recorded per text, the next worker resumes where the last one stopped.
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+import structlog
+
+from app.config import settings
+from app.services.resources import redis_pool
+
+logger = structlog.get_logger()
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Hash fields that are stored as strings but reported as numbers
+_INT_FIELDS = ("total", "completed", "failed", "priority", "attempts")
+_FLOAT_FIELDS = ("created_at", "started_at", "completed_at", "processing_time")
+
+_JOB_PREFIX = "batch_job:"
+
+# Move the highest-priority job from the queue to the lease set
+_CLAIM = """
+local popped = redis.call('zpopmax', KEYS[1])
+if #popped == 0 then
+    return false
+end
+redis.call('zadd', KEYS[2], ARGV[1], popped[1])
+redis.call('hset', KEYS[3], popped[1], ARGV[2])
+return popped[1]
+"""
+
+# Extend a lease if the worker still owns it
+_EXTEND = """
+if redis.call('hget', KEYS[2], ARGV[1]) == ARGV[2] then
+    redis.call('zadd', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Drop a lease the worker owns, optionally putting the job back in the queue
+# with the priority from its job hash. Job hashes are not declared keys; the
+# service uses a single Redis node.
+_RELEASE = """
+if redis.call('hget', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('zrem', KEYS[1], ARGV[1])
+redis.call('hdel', KEYS[2], ARGV[1])
+if ARGV[3] == '1' then
+    local priority = redis.call('hget', ARGV[4] .. ARGV[1], 'priority') or 1
+    redis.call('zadd', KEYS[3], priority, ARGV[1])
+end
+return 1
+"""
+
+# Requeue jobs whose leases expired, like _RELEASE with requeueing
+_REAP = """
+local expired = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(expired) do
+    redis.call('zrem', KEYS[1], job)
+    redis.call('hdel', KEYS[2], job)
+    local priority = redis.call('hget', ARGV[3] .. job, 'priority') or 1
+    redis.call('zadd', KEYS[3], priority, job)
+end
+return expired
+"""
+
+
+def _job_key(job_id: str) -> str:
+    return f"{_JOB_PREFIX}{job_id}"
+
+
+def _parse_job(fields: Dict[str, str]) -> Dict[str, Any]:
+    """Convert a job hash into the status dictionary returned by the API."""
+    job = dict(fields)
+    for name in _INT_FIELDS:
+        if name in job:
+            job[name] = int(job[name])
+    for name in _FLOAT_FIELDS:
+        if name in job:
+            job[name] = float(job[name])
+    return job
+
+
+class BatchJobStore:
+    """Pipelined Redis access for batch job records, progress and results."""
+
+    def __init__(self, pool: redis.ConnectionPool = redis_pool,
+                 queue_key: str = "batch_processing_queue", ttl: int = 86400):
+        """
+        Initialize the store.
+
+        Args:
+            pool: Redis connection pool (must decode responses)
+            queue_key: Sorted set of queued job ids, scored by priority; the
+                       lease set and owner hash use it as their prefix
+            ttl: Lifetime of job records in seconds
+        """
+        self._pool = pool
+        self.queue_key = queue_key
+        self.leases_key = f"{queue_key}:leases"
+        self.owners_key = f"{queue_key}:owners"
+        self._ttl = ttl
+
+    def _redis(self) -> redis.Redis:
+        """Get a Redis client on the shared pool."""
+        return redis.Redis(connection_pool=self._pool)
+
+    async def create(self, job_id: str, texts: List[Dict[str, Any]], priority: int) -> Dict[str, Any]:
+        """
+        Store a new job and queue it.
+
+        Args:
+            job_id: Job ID
+            texts: Submitted text items
+            priority: Queue priority
+
+        Returns:
+            The initial job record
+        """
+        job = {
+            "status": QUEUED,
+            "total": len(texts),
+            "completed": 0,
+            "failed": 0,
+            "created_at": time.time(),
+            "priority": priority
+        }
+        key = _job_key(job_id)
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            pipe.hset(key, mapping=job)
+            pipe.expire(key, self._ttl)
+            pipe.set(f"{key}:texts", json.dumps(texts), ex=self._ttl)
+            pipe.zadd(self.queue_key, {job_id: priority})
+            await pipe.execute()
+        return job
+
+    async def load(self, job_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[List[Dict[str, Any]]], Set[str]]:
+        """
+        Read a job record, its texts and the IDs of the texts already done.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Tuple of (job record, text items, recorded text IDs); the record
+            and texts are None if missing
+        """
+        key = _job_key(job_id)
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=False)
+            pipe.hgetall(key)
+            pipe.get(f"{key}:texts")
+            pipe.hkeys(f"{key}:results")
+            fields, texts, recorded = await pipe.execute()
+        return (_parse_job(fields) if fields else None,
+                json.loads(texts) if texts else None,
+                set(recorded))
+
+    async def start(self, job_id: str) -> Tuple[float, int]:
+        """
+        Mark a job as processing and count the attempt.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Tuple of (time the first attempt started, number of attempts)
+        """
+        key = _job_key(job_id)
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            pipe.hset(key, "status", PROCESSING)
+            pipe.hsetnx(key, "started_at", time.time())
+            pipe.hincrby(key, "attempts", 1)
+            pipe.hget(key, "started_at")
+            _, _, attempts, started_at = await pipe.execute()
+        return float(started_at), attempts
+
+    @staticmethod
+    def _queue_results(pipe, key: str, results: Dict[str, Any],
+                       completed: int, failed: int, ttl: int) -> None:
+        """Add result fields and progress increments to a pipeline."""
+        if results:
+            pipe.hset(f"{key}:results", mapping={
+                text_id: json.dumps(result) for text_id, result in results.items()
+            })
+            pipe.expire(f"{key}:results", ttl)
+        if completed:
+            pipe.hincrby(key, "completed", completed)
+        if failed:
+            pipe.hincrby(key, "failed", failed)
+
+    async def record(self, job_id: str, results: Dict[str, Any], completed: int, failed: int) -> None:
+        """
+        Add results to a job and advance its progress counters.
+
+        Args:
+            job_id: Job ID
+            results: Results by text ID since the last call
+            completed: Number of those results that succeeded
+            failed: Number of those results that failed
+        """
+        if not results and not completed and not failed:
+            return
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            self._queue_results(pipe, _job_key(job_id), results, completed, failed, self._ttl)
+            await pipe.execute()
+
+    async def finish(self, job_id: str, results: Dict[str, Any], completed: int, failed: int,
+                     started_at: float) -> None:
+        """
+        Record the last results, mark the job completed and remove it from the queue.
+
+        The job is normally leased rather than queued at this point; removing
+        it covers a lease that was reaped while the job was finishing.
+
+        Args:
+            job_id: Job ID
+            results: Results by text ID not yet recorded
+            completed: Number of those results that succeeded
+            failed: Number of those results that failed
+            started_at: Time the job started
+        """
+        key = _job_key(job_id)
+        completed_at = time.time()
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            self._queue_results(pipe, key, results, completed, failed, self._ttl)
+            pipe.hset(key, mapping={
+                "status": COMPLETED,
+                "completed_at": completed_at,
+                "processing_time": completed_at - started_at
+            })
+            pipe.zrem(self.queue_key, job_id)
+            await pipe.execute()
+
+    async def fail(self, job_id: str, error: str) -> None:
+        """
+        Mark a job as failed and remove it from the queue.
+
+        Args:
+            job_id: Job ID
+            error: Error message for the status
+        """
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            pipe.hset(_job_key(job_id), mapping={
+                "status": FAILED,
+                "error": error,
+                "completed_at": time.time()
+            })
+            pipe.zrem(self.queue_key, job_id)
+            await pipe.execute()
+
+    async def claim(self, worker_id: str, lease_ttl: float) -> Optional[str]:
+        """
+        Take the highest-priority queued job and lease it to a worker.
+
+        Args:
+            worker_id: ID of the claiming worker
+            lease_ttl: Seconds until the lease expires unless extended
+
+        Returns:
+            Job ID, or None if the queue is empty
+        """
+        async with self._redis() as r:
+            return await r.eval(_CLAIM, 3, self.queue_key, self.leases_key, self.owners_key,
+                                time.time() + lease_ttl, worker_id)
+
+    async def extend(self, job_ids: List[str], worker_id: str, lease_ttl: float) -> List[bool]:
+        """
+        Extend the leases of several jobs with one round trip.
+
+        Args:
+            job_ids: Leased job IDs
+            worker_id: ID of the worker holding the leases
+            lease_ttl: Seconds from now until the leases expire
+
+        Returns:
+            For every job, whether the worker still held its lease
+        """
+        if not job_ids:
+            return []
+        deadline = time.time() + lease_ttl
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=False)
+            for job_id in job_ids:
+                pipe.eval(_EXTEND, 2, self.leases_key, self.owners_key, job_id, worker_id, deadline)
+            return [bool(held) for held in await pipe.execute()]
+
+    async def release(self, job_id: str, worker_id: str, requeue: bool = False) -> bool:
+        """
+        Drop a worker's lease on a job.
+
+        Args:
+            job_id: Job ID
+            worker_id: ID of the worker holding the lease
+            requeue: Put the job back in the queue, e.g. on shutdown
+
+        Returns:
+            True if the worker held the lease
+        """
+        async with self._redis() as r:
+            return bool(await r.eval(_RELEASE, 3, self.leases_key, self.owners_key, self.queue_key,
+                                     job_id, worker_id, "1" if requeue else "0", _JOB_PREFIX))
+
+    async def requeue_expired(self, limit: int = 100) -> List[str]:
+        """
+        Put jobs whose leases expired back in the queue.
+
+        Args:
+            limit: Maximum number of jobs to requeue
+
+        Returns:
+            IDs of the requeued jobs
+        """
+        async with self._redis() as r:
+            return await r.eval(_REAP, 3, self.leases_key, self.owners_key, self.queue_key,
+                                time.time(), limit, _JOB_PREFIX)
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's status, with its results once it has completed.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Job status dictionary, or None if the job does not exist
+        """
+        key = _job_key(job_id)
+        async with self._redis() as r:
+            fields = await r.hgetall(key)
+            if not fields:
+                return None
+            job = _parse_job(fields)
+            job["results"] = {}
+            if job["status"] == COMPLETED:
+                results = await r.hgetall(f"{key}:results")
+                job["results"] = {text_id: json.loads(result) for text_id, result in results.items()}
+        return job
+
+
+# Shared store configured from settings
+batch_job_store = BatchJobStore(ttl=settings.BATCH_JOB_TTL)
@@ -0,0 +1,335 @@
+"""
+Distributed worker for batch analysis jobs.
+
+Every pod runs a BatchWorker that claims jobs from the shared Redis queue
+(see app.services.batch_jobs) with a lease, runs a bounded number of them
+concurrently, and keeps their leases alive with heartbeats. Jobs of workers
+that die are requeued by the reaper of any other worker and resumed from the
+texts already recorded. Analysis runs on the process pool, so throughput grows
+with the number of workers rather than with the pod that took the request.
+
+Workers can also run without the API: python -m app.services.batch_worker
+"""
+import asyncio
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.services.admission import admission, BATCH
+from app.services.batch_jobs import BatchJobStore, batch_job_store, COMPLETED, FAILED
+from app.services.cache_manager import analysis_cache, generate_cache_key, get_cache_ttl
+from app.services.executor import analysis_executor
+
+logger = structlog.get_logger()
+
+BATCH_JOBS = Counter(
+    "batch_worker_jobs_total",
+    "Batch jobs handled by this worker by outcome",
+    ["outcome"]
+)
+BATCH_ACTIVE_JOBS = Gauge(
+    "batch_worker_active_jobs",
+    "Batch jobs currently running on this worker"
+)
+
+
+def batch_item_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a cached analysis result as a batch job item.
+
+    Args:
+        result: Analysis result as cached by /analyze
+
+    Returns:
+        Batch item with readability, analysis and recommendations
+    """
+    # Cached results are shared, so copy before removing the recommendations
+    readability_data = dict(result["readability"])
+    recommendations = readability_data.pop("recommendations", [])
+    return {
+        "readability": readability_data,
+        "analysis": result["text_analysis"],
+        "recommendations": recommendations
+    }
+
+
+async def run_batch_job(job_id: str, store: BatchJobStore = batch_job_store,
+                        max_attempts: int = 3) -> Optional[str]:
+    """
+    Process a batch job, skipping texts recorded by earlier attempts.
+
+    Results and progress are flushed to Redis at most every
+    BATCH_PROGRESS_INTERVAL seconds, so the number of round trips does not
+    grow with the number of texts.
+
+    Args:
+        job_id: ID of the batch job to process
+        store: Job store
+        max_attempts: Attempts after which the job is marked failed
+
+    Returns:
+        Final job status, or None if the job no longer exists
+    """
+    job_data, texts, recorded = await store.load(job_id)
+    if not job_data:
+        logger.error(f"Cannot find job data for job {job_id}")
+        return None
+    if job_data["status"] in (COMPLETED, FAILED):
+        # Finished just before its lease was reaped
+        return job_data["status"]
+    if texts is None:
+        # The record outlived its texts; fail it rather than leave it pending
+        logger.error(f"Cannot find texts for job {job_id}")
+        await store.fail(job_id, "Job texts expired")
+        return FAILED
+
+    started_at, attempts = await store.start(job_id)
+    if attempts > max_attempts:
+        await store.fail(job_id, f"Job abandoned after {max_attempts} attempts")
+        return FAILED
+    if recorded:
+        logger.info("Resuming batch job", job_id=job_id, recorded=len(recorded), attempt=attempts)
+
+    # Text IDs default to the position, so they are stable across attempts
+    items = [
+        (str(text_item.get("id", index)), text_item.get("content", ""))
+        for index, text_item in enumerate(texts)
+    ]
+    items = [(text_id, content) for text_id, content in items if text_id not in recorded]
+    cache_keys = [generate_cache_key(content, include_word_analysis=True) for _, content in items]
+
+    # Look up every text in the analysis cache with one round trip; texts
+    # repeated within the job are analyzed once
+    known_results = dict(zip(cache_keys, await analysis_cache.get_many(cache_keys)))
+
+    priority = job_data.get("priority", 1)
+
+    # Results, counters and cache entries not yet written to Redis
+    results = {}
+    new_cache_entries = []
+    completed = 0
+    failed = 0
+    last_flush = time.monotonic()
+
+    for (text_id, content), cache_key in zip(items, cache_keys):
+        try:
+            if not content:
+                failed += 1
+                results[text_id] = {"error": "Empty content"}
+            else:
+                result = known_results.get(cache_key)
+                if result is None:
+                    # Batch work waits behind interactive requests and always
+                    # goes to the process pool
+                    async with admission.admit(BATCH, priority=priority):
+                        text_start = time.time()
+                        document = await analysis_executor.analyze_document(content, background=True)
+                    result = {
+                        "readability": document["readability"],
+                        "text_analysis": document["text_analysis"],
+                        "processing_time_ms": round((time.time() - text_start) * 1000, 2),
+                        "cached": False
+                    }
+                    known_results[cache_key] = result
+                    new_cache_entries.append((cache_key, result, get_cache_ttl(content)))
+
+                results[text_id] = batch_item_result(result)
+                completed += 1
+
+        except Exception as e:
+            logger.error(f"Error processing text in batch: {str(e)}")
+            failed += 1
+            results[text_id] = {"error": str(e)}
+
+        if time.monotonic() - last_flush >= settings.BATCH_PROGRESS_INTERVAL:
+            await asyncio.gather(
+                store.record(job_id, results, completed, failed),
+                analysis_cache.set_many(new_cache_entries)
+            )
+            results, new_cache_entries = {}, []
+            completed = failed = 0
+            last_flush = time.monotonic()
+
+    # Store the remaining results and mark the job completed
+    await asyncio.gather(
+        store.finish(job_id, results, completed, failed, started_at),
+        analysis_cache.set_many(new_cache_entries)
+    )
+    return COMPLETED
+
+
+class BatchWorker:
+    """
+    Claims batch jobs from the shared queue and runs them with bounded concurrency.
+    """
+
+    def __init__(self, store: BatchJobStore = batch_job_store, concurrency: int = 2,
+                 lease_ttl: float = 60.0, heartbeat_interval: float = 15.0,
+                 poll_interval: float = 2.0, max_attempts: int = 3):
+        """
+        Initialize the worker.
+
+        Args:
+            store: Job store holding the queue and leases
+            concurrency: Maximum number of jobs run at once by this worker
+            lease_ttl: Seconds a claimed job stays leased without a heartbeat
+            heartbeat_interval: Seconds between lease renewals and reaper runs;
+                                must be well below lease_ttl
+            poll_interval: Longest wait between claims while the queue is empty
+            max_attempts: Claims of one job after which it is marked failed
+        """
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._store = store
+        self._concurrency = concurrency
+        self._lease_ttl = lease_ttl
+        self._heartbeat_interval = heartbeat_interval
+        self._poll_interval = poll_interval
+        self._max_attempts = max_attempts
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._running = False
+
+    async def start(self) -> None:
+        """Start claiming jobs and renewing leases."""
+        if self._running:
+            return
+        self._running = True
+        self._slots = asyncio.Semaphore(self._concurrency)
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._claim_loop()),
+            asyncio.create_task(self._lease_loop())
+        ]
+        logger.info("Batch worker started", worker_id=self.worker_id, concurrency=self._concurrency)
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and hand running jobs back to the queue."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        jobs = list(self._jobs.values())
+        for task in jobs:
+            task.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        self._tasks = []
+        logger.info("Batch worker stopped", worker_id=self.worker_id, requeued=len(jobs))
+
+    def notify(self) -> None:
+        """Wake the worker after a job was queued, instead of waiting for the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _claim_loop(self) -> None:
+        """Claim jobs while there are free slots."""
+        while self._running:
+            await self._slots.acquire()
+            self._wake.clear()
+            try:
+                job_id = await self._store.claim(self.worker_id, self._lease_ttl)
+            except Exception as e:
+                self._slots.release()
+                logger.warning("Batch job claim failed", error=str(e))
+                await asyncio.sleep(self._poll_interval)
+                continue
+
+            if job_id is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._jobs[job_id] = asyncio.create_task(self._run(job_id))
+
+    async def _run(self, job_id: str) -> None:
+        """Run one claimed job and release its lease."""
+        BATCH_ACTIVE_JOBS.inc()
+        requeue = False
+        try:
+            status = await run_batch_job(job_id, self._store, self._max_attempts)
+            BATCH_JOBS.labels(outcome=status or "missing").inc()
+        except asyncio.CancelledError:
+            # Shutdown or a lost lease; the job is requeued only if we still own it
+            requeue = True
+            BATCH_JOBS.labels(outcome="interrupted").inc()
+        except Exception as e:
+            logger.error("Batch job failed", job_id=job_id, error=str(e))
+            BATCH_JOBS.labels(outcome=FAILED).inc()
+            try:
+                await self._store.fail(job_id, str(e))
+            except Exception as fail_error:
+                logger.warning("Could not mark batch job failed", job_id=job_id, error=str(fail_error))
+        finally:
+            self._jobs.pop(job_id, None)
+            self._slots.release()
+            BATCH_ACTIVE_JOBS.dec()
+
+        try:
+            await self._store.release(job_id, self.worker_id, requeue=requeue)
+        except Exception as e:
+            # The lease expires and the reaper requeues the job
+            logger.warning("Could not release batch job lease", job_id=job_id, error=str(e))
+
+    async def _lease_loop(self) -> None:
+        """Renew the leases of running jobs and requeue jobs of dead workers."""
+        while self._running:
+            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                job_ids = list(self._jobs)
+                held = await self._store.extend(job_ids, self.worker_id, self._lease_ttl)
+                for job_id, still_held in zip(job_ids, held):
+                    task = self._jobs.get(job_id)
+                    if not still_held and task is not None:
+                        # Another worker took over; stop writing to the job
+                        logger.warning("Lost batch job lease", job_id=job_id)
+                        task.cancel()
+
+                requeued = await self._store.requeue_expired()
+                if requeued:
+                    BATCH_JOBS.labels(outcome="reaped").inc(len(requeued))
+                    logger.info("Requeued abandoned batch jobs", job_ids=requeued)
+                    self.notify()
+            except Exception as e:
+                logger.warning("Batch lease renewal failed", error=str(e))
+
+
+# Shared worker configured from settings
+batch_worker = BatchWorker(
+    concurrency=settings.BATCH_WORKER_CONCURRENCY,
+    lease_ttl=settings.BATCH_LEASE_TTL,
+    heartbeat_interval=settings.BATCH_HEARTBEAT_INTERVAL,
+    poll_interval=settings.BATCH_POLL_INTERVAL,
+    max_attempts=settings.BATCH_MAX_ATTEMPTS
+)
+
+
+async def main() -> None:
+    """Run a standalone batch worker until SIGINT or SIGTERM."""
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    await batch_worker.start()
+    try:
+        await stopped.wait()
+    finally:
+        await batch_worker.stop()
+        analysis_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,259 +1,244 @@
+"""
+Parallel analysis engine for large texts.
+
+The text is written once into shared memory and split into sentence-safe
+chunks. Worker processes receive only the shared memory name and a byte range,
+and return a mergeable TextStatistics record plus, optionally, the analysis
+of their sentences. The parent merges the records and builds the same result
+as the serial pipeline in app.services.analysis.analyze_document.
+"""
 import asyncio
-from typing import List, Dict, Any, Tuple
-import numpy as np
 from concurrent.futures import ProcessPoolExecutor
-import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.tokenizer import Tokenizer
+from app.services.statistics import TextStatistics, SPLIT_POINT
+from app.services.readability import ReadabilityService
+from app.services.text_analysis import TextAnalysisService
+from app.services.word_analyzer import WordFrequencyIndex
+from app.services.factory import get_word_analyzer
+from app.services.analysis import attach_recommendations
+
+# Plain tokenizer for worker processes; chunks are unique, so caching them
+# would only churn the parse cache
+_chunk_tokenizer = Tokenizer()
+
+
+def _analyze_chunk(shm_name: str, start: int, end: int,
+                   include_sentence_analysis: bool) -> Tuple[TextStatistics, Optional[List[Dict[str, Any]]]]:
+    """
+    Analyze one chunk of a document held in shared memory. Runs in a worker process.
+
+    Args:
+        shm_name: Name of the shared memory block holding the UTF-8 encoded text
+        start: Byte offset of the chunk
+        end: Byte offset one past the end of the chunk
+        include_sentence_analysis: Also analyze every sentence of the chunk
+
+    Returns:
+        Tuple of (chunk statistics, sentence analysis with chunk-local indices or None)
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        text = bytes(shm.buf[start:end]).decode('utf-8')
+    finally:
+        shm.close()
+
+    stream = _chunk_tokenizer.tokenize(text)
+    sentences = TextAnalysisService.analyze_sentences(stream) if include_sentence_analysis else None
+    return TextStatistics.from_stream(stream), sentences
+
+
+def _analyze_leading_words(text: str, bounds: List[Tuple[int, int]],
+                           frequency_index: WordFrequencyIndex, limit: int) -> List[Dict[str, Any]]:
+    """
+    Analyze the first `limit` words of a document against its global frequency index.
+
+    Only as many chunks as needed are tokenized; since no sentence spans two
+    chunks, sentence indices and lengths can be accumulated chunk by chunk.
+
+    Args:
+        text: Full document text
+        bounds: Chunk boundaries as character offsets
+        frequency_index: Index built from the merged word frequencies; its
+                         sentence_lengths list is filled in as chunks are read
+        limit: Maximum number of word entries
+
+    Returns:
+        List of word analysis dictionaries
+    """
+    word_analyzer = get_word_analyzer()
+    sentence_lengths = frequency_index.sentence_lengths
+    entries = []
+    word_offset = 0
+    sentence_offset = 0
+
+    for start, end in bounds:
+        stream = _chunk_tokenizer.tokenize(text[start:end])
+        sentence_lengths.extend(stream.sentence_lengths())
+        for i, word in enumerate(stream.words()):
+            if len(entries) >= limit:
+                return entries
+            sentence_index, position = stream.word_position(i)
+            entries.append(word_analyzer.analyze_word(
+                word, word_offset + i, sentence_offset + sentence_index,
+                position, frequency_index
+            ))
+        word_offset += stream.word_count
+        sentence_offset += stream.sentence_count
+    return entries
+
 
 class BatchedTextProcessor:
     """
-    Optimized text processor that uses batching and parallel processing
-    for performance improvement when analyzing large texts.
+    Parallel analysis engine that splits large texts across a process pool.
+
+    The pool is also used by AnalysisExecutor for other CPU-bound work.
     """
-    
-    def __init__(self, max_workers: int = None, chunk_size: int = 5000):
+
+    def __init__(self, max_workers: int = None, chunk_size: int = 65536):
         """
         Initialize the batched text processor with configurable parallelism.
-        
+
         Args:
             max_workers: Maximum number of worker processes (defaults to CPU count)
-            chunk_size: Size of text chunks for batch processing
+            chunk_size: Minimum chunk size in characters; chunks end at the first
+                        sentence-safe split point after this many characters
         """
         self._max_workers = max_workers
         self._chunk_size = chunk_size
         self._executor = ProcessPoolExecutor(max_workers=max_workers)
-    
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The process pool shared with other CPU-bound work (see AnalysisExecutor)."""
+        return self._executor
+
     def close(self):
         """Shutdown the process pool executor."""
         self._executor.shutdown()
-    
-    @staticmethod
-    def _process_word_batch(words: List[str]) -> Dict[str, Any]:
-        """
-        Process a batch of words in parallel.
-        
-        Args:
-            words: List of words to analyze
-            
-        Returns:
-            Dictionary with word analysis statistics
-        """
-        # Word length statistics
-        lengths = np.array([len(word) for word in words])
-        
-        # Calculate statistics efficiently using numpy
-        return {
-            'count': len(words),
-            'avg_length': float(np.mean(lengths)) if lengths.size > 0 else 0,
-            'max_length': int(np.max(lengths)) if lengths.size > 0 else 0,
-            'min_length': int(np.min(lengths)) if lengths.size > 0 else 0,
-            'long_words': int(np.sum(lengths > 6)),  # Words longer than 6 chars
-            'long_words_percentage': float(np.sum(lengths > 6) / len(words) * 100) if len(words) > 0 else 0,
-        }
-    
+
     @staticmethod
-    def _split_into_chunks(text: str, chunk_size: int) -> List[str]:
+    def _split_into_chunks(text: str, chunk_size: int) -> List[Tuple[int, int]]:
         """
-        Split text into chunks of approximately equal size for parallel processing.
-        
+        Split text into sentence-safe chunks of at least `chunk_size` characters.
+
         Args:
             text: The text to split
-            chunk_size: Target chunk size in characters
-            
+            chunk_size: Minimum chunk size in characters
+
         Returns:
-            List of text chunks
+            List of (start, end) character offsets covering the whole text
         """
-        if len(text) <= chunk_size:
-            return [text]
-        
-        # Find appropriate split points (prefer splitting at paragraph breaks or sentences)
-        chunks = []
+        bounds = []
         start = 0
-        
-        while start < len(text):
-            # If we're near the end, just take the rest
-            if start + chunk_size >= len(text):
-                chunks.append(text[start:])
+
+        while len(text) - start > chunk_size:
+            match = SPLIT_POINT.search(text, start + chunk_size)
+            if match is None:
+                # One run-on sentence until the end; keep it in a single chunk
                 break
-            
-            # Try to find a paragraph break
-            end = min(start + chunk_size, len(text))
-            split_point = text.rfind('\n\n', start, end)
-            
-            if split_point == -1 or (end - split_point) > chunk_size // 2:
-                # No suitable paragraph break, try to find sentence break
-                split_point = text.rfind('. ', start, end)
-                
-                if split_point == -1 or (end - split_point) > chunk_size // 3:
-                    # No suitable sentence break, fall back to word boundary
-                    split_point = text.rfind(' ', start, end)
-                    
-                    if split_point == -1:
-                        # No suitable word boundary, just split at chunk_size
-                        split_point = end - 1
-                else:
-                    # Include the period in this chunk
-                    split_point += 1
-            
-            chunks.append(text[start:split_point + 1])
-            start = split_point + 1
-            
-        return chunks
-    
-    async def process_words(self, text: str) -> Dict[str, Any]:
-        """
-        Process words in the text using batching and parallelization.
-        
-        Args:
-            text: The text to process
-            
-        Returns:
-            Dictionary with word analysis results
-        """
-        # Process in chunks to avoid memory issues with very large texts
-        chunks = self._split_into_chunks(text, self._chunk_size)
-        
-        # Process each chunk
-        words_by_chunk = [chunk.split() for chunk in chunks]
-        
-        # Process word batches in parallel
-        loop = asyncio.get_event_loop()
-        tasks = []
-        
-        for word_batch in words_by_chunk:
-            tasks.append(
-                loop.run_in_executor(
-                    self._executor,
-                    self._process_word_batch,
-                    word_batch
-                )
-            )
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks)
-        
-        # Combine results from all chunks
-        all_words = []
-        for words in words_by_chunk:
-            all_words.extend(words)
-        
-        # Aggregate statistics
-        total_word_count = sum(r['count'] for r in results)
-        avg_word_length = (
-            sum(r['avg_length'] * r['count'] for r in results) / total_word_count
-            if total_word_count > 0 else 0
-        )
-        max_word_length = max(r['max_length'] for r in results) if results else 0
-        min_word_length = min(r['min_length'] for r in results) if results else 0
-        long_words_count = sum(r['long_words'] for r in results)
-        long_words_percentage = (
-            long_words_count / total_word_count * 100
-            if total_word_count > 0 else 0
-        )
-        
-        # Frequency analysis (limited to top N words for performance)
-        word_freq = {}
-        for words in words_by_chunk:
-            for word in words:
-                word_lower = word.lower()
-                word_freq[word_lower] = word_freq.get(word_lower, 0) + 1
-        
-        # Get top words by frequency
-        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:100]
-        
-        return {
-            'word_count': total_word_count,
-            'unique_word_count': len(word_freq),
-            'avg_word_length': avg_word_length,
-            'max_word_length': max_word_length,
-            'min_word_length': min_word_length,
-            'long_words_count': long_words_count,
-            'long_words_percentage': long_words_percentage,
-            'frequency': {word: count for word, count in top_words},
-            'lexical_diversity': len(word_freq) / total_word_count if total_word_count > 0 else 0,
-            'processing_time_ms': 0  # Will be updated by the caller
-        }
-    
-    async def process_sentences(self, text: str) -> Dict[str, Any]:
+            bounds.append((start, match.end()))
+            start = match.end()
+
+        if start < len(text) or not bounds:
+            bounds.append((start, len(text)))
+        return bounds
+
+    async def analyze(self, text: str,
+                      include_word_analysis: bool = True,
+                      include_sentence_analysis: bool = True,
+                      user_context: Optional[Dict[str, Any]] = None,
+                      simple_mode: bool = False,
+                      simplified_recommendations: bool = False,
+                      progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """
-        Process sentences in the text using batching and parallelization.
-        
+        Analyze a large text across the process pool.
+
         Args:
-            text: The text to process
-            
+            text: Text to analyze
+            include_word_analysis: Include the per-word analysis
+            include_sentence_analysis: Include the per-sentence analysis
+            user_context: Optional user context passed to the recommender
+            simple_mode: Only compute basic statistics; the per-word and
+                         per-sentence analyses are left empty
+            simplified_recommendations: Generate the shorter recommendation set
+            progress: Called with the number of characters of each chunk as
+                      soon as that chunk is analyzed
+
         Returns:
-            Dictionary with sentence analysis results
+            Dictionary with "readability" and "text_analysis" entries, shaped like
+            the result of analyze_document
         """
-        start_time = time.time()
-        
-        # Simple sentence splitting for demonstration
-        # In a real implementation, use a more sophisticated NLP library
-        sentences = []
-        current_sentence = ""
-        
-        for char in text:
-            current_sentence += char
-            if char in ['.', '!', '?'] and current_sentence.strip():
-                sentences.append(current_sentence.strip())
-                current_sentence = ""
-        
-        # Add any remaining text as a sentence
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
-        
-        # Process in batches
-        batch_size = 500
-        batches = [sentences[i:i + batch_size] for i in range(0, len(sentences), batch_size)]
-        
-        # Process sentence batches in parallel
-        loop = asyncio.get_event_loop()
-        tasks = []
-        
-        for batch in batches:
-            tasks.append(
-                loop.run_in_executor(
-                    self._executor,
-                    self._analyze_sentence_batch,
-                    batch
+        bounds = self._split_into_chunks(text, self._chunk_size)
+        analyze_sentences = include_sentence_analysis and not simple_mode
+
+        # Write the text once into shared memory; workers get byte ranges only
+        encoded = [text[start:end].encode('utf-8') for start, end in bounds]
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(len(b) for b in encoded)))
+        try:
+            ranges = []
+            offset = 0
+            for chunk in encoded:
+                shm.buf[offset:offset + len(chunk)] = chunk
+                ranges.append((offset, offset + len(chunk)))
+                offset += len(chunk)
+            del encoded
+
+            loop = asyncio.get_running_loop()
+
+            async def analyze_chunk(start: int, end: int, chars: int):
+                result = await loop.run_in_executor(
+                    self._executor, _analyze_chunk,
+                    shm.name, start, end, analyze_sentences
                 )
+                if progress is not None:
+                    progress(chars)
+                return result
+
+            results = await asyncio.gather(*(
+                analyze_chunk(start, end, chars_end - chars_start)
+                for (start, end), (chars_start, chars_end) in zip(ranges, bounds)
+            ))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        # Merge chunk statistics in document order
+        stats = TextStatistics.merge_all(part for part, _ in results)
+        statistics = stats.summary(detailed=not simple_mode)
+
+        readability_data = ReadabilityService.build_result_from_stats(stats)
+        attach_recommendations(readability_data, statistics, user_context, simplified_recommendations)
+
+        text_analysis_data = {"statistics": statistics}
+
+        if simple_mode:
+            # Same shape as analyze_document in simple mode
+            if include_sentence_analysis:
+                text_analysis_data["sentence_analysis"] = []
+            if include_word_analysis:
+                text_analysis_data["word_analysis"] = []
+        elif include_sentence_analysis:
+            # Shift chunk-local sentence indices to document indices
+            sentence_analysis = []
+            sentence_offset = 0
+            for part, sentences in results:
+                for entry in sentences:
+                    entry["sentence_index"] += sentence_offset
+                sentence_analysis.extend(sentences)
+                sentence_offset += part.sentence_count
+            text_analysis_data["sentence_analysis"] = sentence_analysis
+
+        if include_word_analysis and not simple_mode:
+            frequency_index = WordFrequencyIndex.from_counts(stats.frequencies, [])
+            text_analysis_data["word_analysis"] = await loop.run_in_executor(
+                None, _analyze_leading_words, text, bounds,
+                frequency_index, TextAnalysisService.MAX_WORD_ANALYSIS
             )
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks)
-        
-        # Combine results
-        sentence_count = sum(r['count'] for r in results)
-        avg_sentence_length = (
-            sum(r['avg_length'] * r['count'] for r in results) / sentence_count
-            if sentence_count > 0 else 0
-        )
-        max_sentence_length = max(r['max_length'] for r in results) if results else 0
-        min_sentence_length = min(r['min_length'] for r in results) if results else 0
-        
+
         return {
-            'sentence_count': sentence_count,
-            'avg_sentence_length': avg_sentence_length,
-            'max_sentence_length': max_sentence_length,
-            'min_sentence_length': min_sentence_length,
-            'processing_time_ms': round((time.time() - start_time) * 1000, 2)
+            "readability": readability_data,
+            "text_analysis": text_analysis_data
         }
-    
-    @staticmethod
-    def _analyze_sentence_batch(sentences: List[str]) -> Dict[str, Any]:
-        """
-        Analyze a batch of sentences in parallel.
-        
-        Args:
-            sentences: List of sentences to analyze
-            
-        Returns:
-            Dictionary with sentence analysis statistics
-        """
-        # Calculate sentence length in words
-        lengths = np.array([len(sentence.split()) for sentence in sentences])
-        
-        return {
-            'count': len(sentences),
-            'avg_length': float(np.mean(lengths)) if lengths.size > 0 else 0,
-            'max_length': int(np.max(lengths)) if lengths.size > 0 else 0,
-            'min_length': int(np.min(lengths)) if lengths.size > 0 else 0
-        }
\ No newline at end of file
@@ -1,257 +1,514 @@
 """
-Advanced cache management for LixService with adaptive TTL and intelligent eviction policies.
+Two-tier cache for analysis results.
+
+A small in-process L1 (a byte-budgeted ContentCache) sits in front of Redis
+(L2), so repeated lookups on a worker never leave the process. Concurrent
+misses for the same key are coalesced: within a worker all callers await one
+computation, and across workers a short Redis lock lets one worker compute
+while the others wait for its result. Entries stay servable for a grace
+period after their TTL while a single caller refreshes them in the
+background (stale-while-revalidate).
+
+Redis entries are written with the cache codec (app.utils.codec), which
+picks a compact binary format and compresses large results; entries written
+as plain JSON by older versions are still read.
 """
+import asyncio
 import time
-import hashlib
-import json
-from typing import Any, Dict, Optional, Union, Tuple
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-import redis
-from redis.asyncio import Redis
-from fastapi import Depends
+import redis.asyncio as redis
+import structlog
+from prometheus_client import Counter
 
 from app.config import settings
-from app.utils.logger import get_logger
-from app.models.cache import CachePolicy
-
-logger = get_logger(__name__)
-
-# Initialize Redis connection pool
-redis_pool = None
-
-async def get_redis_connection() -> Redis:
-    """Get an async Redis connection from the connection pool."""
-    global redis_pool
-    if redis_pool is None:
-        redis_pool = redis.asyncio.ConnectionPool(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True,
-            max_connections=50  # Adjust based on expected load
-        )
-    return Redis(connection_pool=redis_pool)
-
-def generate_cache_key(content: str, *args, **kwargs) -> str:
+from app.services.content_cache import ContentCache
+from app.services.resources import redis_binary_pool
+from app.utils.codec import Codec, cache_codec
+from app.utils.hashing import content_hash
+
+logger = structlog.get_logger()
+
+CACHE_LOOKUPS = Counter(
+    "two_tier_cache_lookups_total",
+    "Two-tier cache lookups by the tier that answered and entry state",
+    ["cache", "tier", "state"]
+)
+CACHE_COALESCED = Counter(
+    "two_tier_cache_coalesced_total",
+    "Cache misses that waited for a computation already running elsewhere",
+    ["cache", "scope"]
+)
+CACHE_ERRORS = Counter(
+    "two_tier_cache_errors_total",
+    "Redis errors in the two-tier cache",
+    ["cache", "operation"]
+)
+
+FRESH = "fresh"
+STALE = "stale"
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def generate_cache_key(text: str, include_word_analysis: bool = False,
+                       include_sentence_analysis: bool = True, kind: str = "analysis") -> str:
     """
-    Generate a unique cache key based on content and optional parameters.
-    
+    Generate a deterministic cache key based on text content and analysis options.
+
     Args:
-        content: The main content to hash
-        *args: Additional positional arguments to include in the key
-        **kwargs: Additional keyword arguments to include in the key
-    
+        text: Analyzed text
+        include_word_analysis: Whether the result includes word analysis
+        include_sentence_analysis: Whether the result includes sentence analysis
+        kind: Kind of result, so differently shaped results never share a key
+
     Returns:
-        A unique hash string to use as a cache key
+        Cache key
     """
-    # Create a dictionary of all parameters
-    key_parts = {
-        'content_hash': hashlib.md5(content.encode('utf-8')).hexdigest(),
-        'args': args,
-        'kwargs': kwargs
-    }
-    
-    # Convert to JSON and hash
-    key_json = json.dumps(key_parts, sort_keys=True)
-    return f"lix:cache:{hashlib.md5(key_json.encode('utf-8')).hexdigest()}"
+    options_str = f":w{int(include_word_analysis)}:s{int(include_sentence_analysis)}"
+    return f"{kind}:{content_hash(text)}{options_str}"
+
 
 def get_cache_ttl(text: str) -> int:
     """
-    Calculate cache TTL based on text characteristics.
-    Shorter texts get shorter TTL as they change more frequently.
-    
+    Determine the cache TTL for a result based on the text length.
+
     Args:
-        text: The text to analyze
-        
+        text: Analyzed text
+
     Returns:
         TTL in seconds
     """
-    base_ttl = 3600  # 1 hour base TTL
-    
-    # Adjust TTL based on text length
     text_length = len(text)
-    if text_length < 100:
-        return 60  # 1 minute for very short snippets
-    elif text_length < 500:
-        return 300  # 5 minutes for short texts
-    elif text_length < 2000:
-        return 1800  # 30 minutes for medium texts
+    if text_length < settings.SMALL_TEXT_THRESHOLD:
+        return settings.REDIS_CACHE_TTL_SMALL  # Longer TTL for small texts (more likely to be reused)
+    elif text_length > settings.LARGE_TEXT_THRESHOLD:
+        return settings.REDIS_CACHE_TTL_LARGE  # Shorter TTL for large texts (consume more memory)
     else:
-        return base_ttl  # 1 hour for long texts
+        return settings.REDIS_CACHE_TTL  # Default TTL for medium texts
 
-async def get_from_cache(key: str, redis_client: Redis = None) -> Optional[str]:
-    """
-    Get a value from cache with connection handling.
-    
-    Args:
-        key: The cache key
-        redis_client: Optional Redis client to use
-        
-    Returns:
-        Cached value or None if not found
-    """
-    try:
-        if redis_client is None:
-            redis_client = await get_redis_connection()
-        
-        return await redis_client.get(key)
-    except Exception as e:
-        logger.warning(f"Cache read error: {str(e)}")
-        return None
 
-async def set_in_cache(key: str, value: str, ttl: int = 3600, redis_client: Redis = None) -> bool:
+def _unwrap(raw: bytes) -> Tuple[Any, float]:
     """
-    Set a value in cache with connection handling.
-    
-    Args:
-        key: The cache key
-        value: The value to cache
-        ttl: Time to live in seconds
-        redis_client: Optional Redis client to use
-        
-    Returns:
-        True if successful, False otherwise
+    Decode a Redis entry into its value and freshness deadline.
+
+    Entries written without an envelope are treated as fresh until Redis
+    expires them.
     """
-    try:
-        if redis_client is None:
-            redis_client = await get_redis_connection()
-            
-        return await redis_client.set(key, value, ex=ttl)
-    except Exception as e:
-        logger.warning(f"Cache write error: {str(e)}")
-        return False
-
-async def invalidate_cache(pattern: str = "lix:cache:*", redis_client: Redis = None) -> int:
+    envelope = Codec.decode(raw)
+    if isinstance(envelope, dict) and envelope.keys() == {"value", "fresh_until"}:
+        return envelope["value"], envelope["fresh_until"]
+    return envelope, float("inf")
+
+
+def _copy(value: Any) -> Any:
+    """Shallow-copy dict results so callers can annotate them without touching the cache."""
+    return dict(value) if isinstance(value, dict) else value
+
+
+class TwoTierCache:
     """
-    Invalidate cache entries matching the pattern.
-    
-    Args:
-        pattern: Pattern to match keys
-        redis_client: Optional Redis client to use
-        
-    Returns:
-        Number of keys removed
+    Cache facade with an in-process L1, Redis L2, single-flight and
+    stale-while-revalidate.
+
+    Values must be JSON-compatible (see app.utils.codec) and not None. Callers get a shallow copy
+    of cached dictionaries and may set top-level keys, but must not modify
+    nested ones.
     """
-    try:
-        if redis_client is None:
-            redis_client = await get_redis_connection()
-            
-        cursor = 0
-        count = 0
-        
-        while True:
-            cursor, keys = await redis_client.scan(cursor, match=pattern, count=100)
-            if keys:
-                count += await redis_client.delete(*keys)
-            if cursor == 0:
-                break
-                
-        return count
-    except Exception as e:
-        logger.warning(f"Cache invalidation error: {str(e)}")
-        return 0
-
-class CacheManager:
-    """Advanced cache manager with intelligent caching strategies."""
-    
-    def __init__(self, namespace: str = "lix"):
-        self.namespace = namespace
-        self._cache_policy = CachePolicy.ADAPTIVE
-        self._cache_stats = {
-            "hits": 0,
-            "misses": 0,
-            "writes": 0,
-            "errors": 0
-        }
-    
-    async def get(self, key: str, redis_client: Redis = None) -> Tuple[Any, bool]:
+
+    def __init__(self, name: str, pool: redis.ConnectionPool = redis_binary_pool,
+                 l1_max_bytes: int = 0, l1_max_entries: Optional[int] = None,
+                 l1_ttl: float = 300, stale_ttl: int = 0,
+                 lock_ttl: int = 30, lock_wait: float = 10.0):
         """
-        Get a value from cache with hit/miss tracking.
-        
+        Initialize the cache.
+
         Args:
-            key: Base key (will be prefixed with namespace)
-            redis_client: Optional Redis client
-            
-        Returns:
-            Tuple of (value, hit_status)
+            name: Cache name used in metrics
+            pool: Redis connection pool for L2 (must not decode responses)
+            l1_max_bytes: Byte budget of the in-process tier (0 disables it)
+            l1_max_entries: Optional entry limit of the in-process tier
+            l1_ttl: Seconds an entry is served from L1 before L2 is consulted
+                    again, which bounds how long workers can disagree
+            stale_ttl: Seconds an expired entry may still be served while it
+                       is refreshed (0 disables stale-while-revalidate)
+            lock_ttl: Lifetime of the cross-worker computation lock in seconds
+            lock_wait: Longest time to wait for another worker's result before
+                       computing locally
         """
-        full_key = f"{self.namespace}:{key}"
+        self.name = name
+        self._pool = pool
+        self._l1 = ContentCache(f"{name}_l1", l1_max_bytes, l1_max_entries) if l1_max_bytes > 0 else None
+        self._l1_ttl = l1_ttl
+        self._stale_ttl = stale_ttl
+        self._lock_ttl = lock_ttl
+        self._lock_wait = lock_wait
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _redis(self) -> redis.Redis:
+        """Get a Redis client on the shared pool."""
+        return redis.Redis(connection_pool=self._pool)
+
+    async def _l2_get(self, key: str) -> Optional[bytes]:
+        """Read a raw entry from Redis, treating errors as a miss."""
         try:
-            if redis_client is None:
-                redis_client = await get_redis_connection()
-                
-            result = await redis_client.get(full_key)
-            
-            if result:
-                self._cache_stats["hits"] += 1
-                return json.loads(result), True
-            else:
-                self._cache_stats["misses"] += 1
-                return None, False
-                
+            async with self._redis() as r:
+                return await r.get(key)
         except Exception as e:
-            self._cache_stats["errors"] += 1
-            logger.warning(f"Cache get error: {str(e)}")
-            return None, False
-    
-    async def set(self, key: str, value: Any, ttl: int = None, 
-                  policy: CachePolicy = None, redis_client: Redis = None) -> bool:
+            CACHE_ERRORS.labels(cache=self.name, operation="get").inc()
+            logger.warning("Cache read error", cache=self.name, error=str(e))
+            return None
+
+    def _l1_store(self, key: str, value: Any, fresh_until: float) -> None:
+        """Keep an entry in the in-process tier."""
+        if self._l1 is not None:
+            # Size is estimated from the decoded value: encoded entries may
+            # be compressed and say little about the memory they take
+            self._l1.set(key, (value, fresh_until, time.time() + self._l1_ttl))
+
+    def _l1_lookup(self, key: str, now: float, local_only: bool) -> Tuple[Any, Optional[str]]:
+        """Find an entry in L1; returns (value, FRESH or STALE), or (None, None)."""
+        if self._l1 is not None:
+            entry = self._l1.get(key)
+            if entry is not None:
+                value, fresh_until, l1_until = entry
+                if now < l1_until or local_only:
+                    if now < fresh_until:
+                        CACHE_LOOKUPS.labels(cache=self.name, tier="l1", state=FRESH).inc()
+                        return value, FRESH
+                    if now < fresh_until + self._stale_ttl:
+                        CACHE_LOOKUPS.labels(cache=self.name, tier="l1", state=STALE).inc()
+                        return value, STALE
+        return None, None
+
+    def _l2_found(self, key: str, raw: bytes, now: float) -> Tuple[Any, str]:
+        """Decode an entry read from L2 and keep it in L1."""
+        value, fresh_until = _unwrap(raw)
+        self._l1_store(key, value, fresh_until)
+        state = FRESH if now < fresh_until else STALE
+        CACHE_LOOKUPS.labels(cache=self.name, tier="l2", state=state).inc()
+        return value, state
+
+    async def _lookup(self, key: str, local_only: bool = False) -> Tuple[Any, Optional[str]]:
+        """
+        Find an entry in L1, then L2.
+
+        Returns:
+            Tuple of (value, FRESH or STALE), or (None, None) on a miss
+        """
+        now = time.time()
+        value, state = self._l1_lookup(key, now, local_only)
+        if state is not None:
+            return value, state
+
+        if not local_only:
+            raw = await self._l2_get(key)
+            if raw is not None:
+                return self._l2_found(key, raw, now)
+
+        CACHE_LOOKUPS.labels(cache=self.name, tier="none", state="miss").inc()
+        return None, None
+
+    async def get(self, key: str, local_only: bool = False) -> Optional[Any]:
         """
-        Set a value in cache with smart TTL management.
-        
+        Get a cached value, fresh or stale.
+
         Args:
-            key: Base key (will be prefixed with namespace)
-            value: Value to cache (will be JSON serialized)
-            ttl: Optional TTL override
-            policy: Optional cache policy override
-            redis_client: Optional Redis client
-            
+            key: Cache key
+            local_only: Only consult the in-process tier
+
         Returns:
-            True if successful
+            Cached value or None if not found
+        """
+        value, _ = await self._lookup(key, local_only)
+        return _copy(value)
+
+    async def set(self, key: str, value: Any, ttl: int, local_only: bool = False) -> bool:
         """
-        full_key = f"{self.namespace}:{key}"
-        active_policy = policy or self._cache_policy
-        
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key
+            value: JSON-compatible value
+            ttl: Seconds the value is fresh
+            local_only: Only store it in the in-process tier
+
+        Returns:
+            True if the value was stored in Redis (or locally when local_only)
+        """
+        fresh_until = time.time() + ttl
+        self._l1_store(key, value, fresh_until)
+        if local_only:
+            return self._l1 is not None
+
+        raw = cache_codec.encode({"value": value, "fresh_until": fresh_until})
         try:
-            if redis_client is None:
-                redis_client = await get_redis_connection()
-            
-            # Apply caching policy
-            if active_policy == CachePolicy.ADAPTIVE:
-                # If no TTL specified, calculate based on value size
-                if ttl is None:
-                    value_size = len(json.dumps(value))
-                    if value_size > 10000:  # Large value
-                        ttl = 3600  # 1 hour
-                    elif value_size > 1000:  # Medium value
-                        ttl = 600  # 10 minutes
-                    else:  # Small value
-                        ttl = 300  # 5 minutes
-            
-            # Default TTL if still None
-            if ttl is None:
-                ttl = 3600  # 1 hour default
-            
-            # Store the value
-            serialized = json.dumps(value)
-            result = await redis_client.set(full_key, serialized, ex=ttl)
-            
-            if result:
-                self._cache_stats["writes"] += 1
-                return True
+            async with self._redis() as r:
+                return bool(await r.set(key, raw, ex=ttl + self._stale_ttl))
+        except Exception as e:
+            CACHE_ERRORS.labels(cache=self.name, operation="set").inc()
+            logger.warning("Cache write error", cache=self.name, error=str(e))
             return False
-            
+
+    async def get_many(self, keys: Sequence[str], local_only: bool = False) -> List[Optional[Any]]:
+        """
+        Get several cached values, fresh or stale, with one Redis round trip.
+
+        Stale entries are returned as they are; they are refreshed by the
+        next get_or_compute for their key.
+
+        Args:
+            keys: Cache keys
+            local_only: Only consult the in-process tier
+
+        Returns:
+            List with the cached value or None for every key, in key order
+        """
+        now = time.time()
+        values: List[Optional[Any]] = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            value, state = self._l1_lookup(key, now, local_only)
+            if state is not None:
+                values[i] = _copy(value)
+            else:
+                missing.append(i)
+
+        if missing and not local_only:
+            try:
+                async with self._redis() as r:
+                    raws = await r.mget([keys[i] for i in missing])
+            except Exception as e:
+                CACHE_ERRORS.labels(cache=self.name, operation="get").inc()
+                logger.warning("Cache read error", cache=self.name, error=str(e))
+                raws = [None] * len(missing)
+            still_missing = []
+            for i, raw in zip(missing, raws):
+                if raw is not None:
+                    values[i] = _copy(self._l2_found(keys[i], raw, now)[0])
+                else:
+                    still_missing.append(i)
+            missing = still_missing
+
+        if missing:
+            CACHE_LOOKUPS.labels(cache=self.name, tier="none", state="miss").inc(len(missing))
+        return values
+
+    async def set_many(self, entries: Iterable[Tuple[str, Any, int]]) -> bool:
+        """
+        Store several values in both tiers with one pipelined Redis round trip.
+
+        Args:
+            entries: (key, value, ttl) tuples
+
+        Returns:
+            True if all values were stored in Redis
+        """
+        now = time.time()
+        commands = []
+        for key, value, ttl in entries:
+            fresh_until = now + ttl
+            self._l1_store(key, value, fresh_until)
+            commands.append((key, cache_codec.encode({"value": value, "fresh_until": fresh_until}),
+                             ttl + self._stale_ttl))
+        if not commands:
+            return True
+
+        try:
+            async with self._redis() as r:
+                pipe = r.pipeline(transaction=False)
+                for key, raw, ex in commands:
+                    pipe.set(key, raw, ex=ex)
+                return all(await pipe.execute())
         except Exception as e:
-            self._cache_stats["errors"] += 1
-            logger.warning(f"Cache set error: {str(e)}")
+            CACHE_ERRORS.labels(cache=self.name, operation="set").inc()
+            logger.warning("Cache write error", cache=self.name, error=str(e))
             return False
-    
-    async def get_stats(self) -> Dict[str, int]:
-        """Get cache statistics."""
-        return self._cache_stats
-    
-    async def clear_namespace(self, redis_client: Redis = None) -> int:
-        """Clear all cache entries in this namespace."""
-        pattern = f"{self.namespace}:*"
-        return await invalidate_cache(pattern, redis_client)
\ No newline at end of file
+
+    async def delete(self, key: str) -> None:
+        """Remove a key from both tiers on this worker and from Redis."""
+        if self._l1 is not None:
+            self._l1.delete(key)
+        try:
+            async with self._redis() as r:
+                await r.delete(key)
+        except Exception as e:
+            CACHE_ERRORS.labels(cache=self.name, operation="delete").inc()
+            logger.warning("Cache delete error", cache=self.name, error=str(e))
+
+    async def invalidate(self, pattern: str) -> int:
+        """
+        Remove Redis entries matching a pattern and clear this worker's L1.
+
+        Other workers drop their L1 copies within l1_ttl seconds.
+
+        Args:
+            pattern: Redis key pattern
+
+        Returns:
+            Number of Redis keys removed
+        """
+        if self._l1 is not None:
+            self._l1.clear()
+        count = 0
+        try:
+            async with self._redis() as r:
+                async for key in r.scan_iter(match=pattern, count=100):
+                    count += await r.delete(key)
+        except Exception as e:
+            CACHE_ERRORS.labels(cache=self.name, operation="invalidate").inc()
+            logger.warning("Cache invalidation error", cache=self.name, error=str(e))
+        return count
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: int, cache_if: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        Get a cached value, computing and storing it once on a miss.
+
+        Concurrent callers for the same key share one computation. A stale
+        value is returned immediately while one refresh runs in the background.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the value
+            ttl: Seconds a computed value is fresh
+            cache_if: Optional predicate; computed values it rejects (for
+                      example degraded results) are returned but not stored
+
+        Returns:
+            Tuple of (value, True if it came from the cache or from a
+            computation started by another caller)
+        """
+        value, state = await self._lookup(key)
+        if state == STALE:
+            if key not in self._inflight:
+                self._start(key, compute, ttl, cache_if, wait_for_peer=False)
+            return _copy(value), True
+        if state == FRESH:
+            return _copy(value), True
+
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            CACHE_COALESCED.labels(cache=self.name, scope="local").inc()
+        else:
+            task = self._start(key, compute, ttl, cache_if, wait_for_peer=True)
+        # Shielded, so a cancelled caller does not cancel the shared computation
+        value = await asyncio.shield(task)
+        if value is None:
+            # A background refresh that left the work to another worker
+            shared = False
+            value = await asyncio.shield(self._start(key, compute, ttl, cache_if, wait_for_peer=True))
+        return _copy(value), shared
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+               cache_if: Optional[Callable[[Any], bool]], wait_for_peer: bool) -> asyncio.Task:
+        """Start the single computation for a key on this worker."""
+        task = asyncio.ensure_future(self._compute_once(key, compute, ttl, cache_if, wait_for_peer))
+        self._inflight[key] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            self._inflight.pop(key, None)
+            if not finished.cancelled() and finished.exception() is not None and not wait_for_peer:
+                logger.warning("Background cache refresh failed", cache=self.name,
+                               error=str(finished.exception()))
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                            cache_if: Optional[Callable[[Any], bool]], wait_for_peer: bool) -> Any:
+        """
+        Compute a value under the cross-worker lock and store it.
+
+        If another worker holds the lock, wait for its result (misses) or
+        leave the refresh to it (stale entries).
+        """
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            async with self._redis() as r:
+                acquired = await r.set(lock_key, token, nx=True, ex=self._lock_ttl)
+        except Exception as e:
+            CACHE_ERRORS.labels(cache=self.name, operation="lock").inc()
+            logger.warning("Cache lock error", cache=self.name, error=str(e))
+            acquired, lock_key = True, None
+
+        if not acquired:
+            if not wait_for_peer:
+                return None
+            CACHE_COALESCED.labels(cache=self.name, scope="redis").inc()
+            value = await self._wait_for_peer(key, lock_key)
+            if value is not None:
+                return value
+
+        try:
+            value = await compute()
+            if cache_if is None or cache_if(value):
+                await self.set(key, value, ttl)
+            return value
+        finally:
+            if acquired and lock_key is not None:
+                try:
+                    async with self._redis() as r:
+                        await r.eval(_RELEASE_LOCK, 1, lock_key, token)
+                except Exception as e:
+                    CACHE_ERRORS.labels(cache=self.name, operation="unlock").inc()
+                    logger.warning("Cache unlock error", cache=self.name, error=str(e))
+
+    async def _wait_for_peer(self, key: str, lock_key: str) -> Optional[Any]:
+        """
+        Poll Redis for a value another worker is computing.
+
+        Returns:
+            The value, or None if the lock went away without a result or the
+            wait timed out
+        """
+        deadline = time.monotonic() + self._lock_wait
+        delay = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+            try:
+                async with self._redis() as r:
+                    raw, lock = await r.mget(key, lock_key)
+            except Exception as e:
+                CACHE_ERRORS.labels(cache=self.name, operation="get").inc()
+                logger.warning("Cache read error", cache=self.name, error=str(e))
+                return None
+            if raw is not None:
+                value, fresh_until = _unwrap(raw)
+                self._l1_store(key, value, fresh_until)
+                return value
+            if lock is None:
+                return None
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics for the in-process tier."""
+        stats = {"name": self.name, "inflight": len(self._inflight)}
+        if self._l1 is not None:
+            stats["l1"] = self._l1.get_stats()
+        return stats
+
+
+# Analysis results: L1 in front of Redis, with stale-while-revalidate
+analysis_cache = TwoTierCache(
+    "analysis",
+    l1_max_bytes=settings.ANALYSIS_CACHE_L1_MAX_BYTES,
+    l1_max_entries=settings.ANALYSIS_CACHE_L1_MAX_ENTRIES,
+    l1_ttl=settings.ANALYSIS_CACHE_L1_TTL,
+    stale_ttl=settings.ANALYSIS_CACHE_STALE_TTL,
+    lock_ttl=settings.ANALYSIS_CACHE_LOCK_TTL,
+    lock_wait=settings.ANALYSIS_CACHE_LOCK_WAIT
+)
+
+# Task status records change while a task runs, so they bypass L1
+task_cache = TwoTierCache("tasks")
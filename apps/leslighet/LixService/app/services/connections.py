@@ -0,0 +1,302 @@
+"""
+WebSocket connection registry with per-connection writers.
+
+Every connection has a bounded outbound queue drained by its own writer task,
+so a slow client only delays its own messages. Replies to one client wait for
+queue space; broadcasts never wait. A broadcast is serialized once and offered
+to every queue, and a full queue is handled by the slow-consumer policy:
+
+- drop: the new message is discarded for that client
+- coalesce: a message with a key replaces the queued message with the same
+  key; otherwise the oldest queued message is discarded
+- disconnect: the client is disconnected
+
+A client whose send does not complete within the send timeout is
+disconnected under every policy. Once a connection is closed, senders waiting
+for queue space are woken and get WebSocketDisconnect, like a send on a
+closed socket.
+"""
+import asyncio
+import itertools
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import structlog
+from fastapi import WebSocket, WebSocketDisconnect
+from prometheus_client import Counter
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+DROP = "drop"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+POLICIES = (DROP, COALESCE, DISCONNECT)
+
+# Close code for clients that cannot keep up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+WEBSOCKET_OUTBOUND_DISCARDED = Counter(
+    "websocket_outbound_discarded_total",
+    "Outbound WebSocket messages discarded for slow clients",
+    ["reason"]
+)
+WEBSOCKET_SLOW_DISCONNECTS = Counter(
+    "websocket_slow_consumer_disconnects_total",
+    "WebSocket clients disconnected for not keeping up"
+)
+
+
+class Connection:
+    """One WebSocket with its outbound queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self._manager = manager
+        # Queued messages by key, oldest first; unkeyed messages get unique keys
+        self._queue: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._unkeyed = itertools.count()
+        self._ready = asyncio.Event()
+        # Set whenever a queued message is taken or the connection closes
+        self._space = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.discarded = 0
+
+    def start(self) -> None:
+        """Start the writer task."""
+        self._writer = asyncio.create_task(self._write())
+
+    @property
+    def queued(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._queue)
+
+    async def send_text(self, message: str) -> None:
+        """
+        Queue a message for this client, waiting while its queue is full.
+
+        Args:
+            message: Text to send
+
+        Raises:
+            WebSocketDisconnect: The connection is closed, or closed while
+                                 waiting for queue space
+        """
+        while not self.closed and len(self._queue) >= self._manager.queue_size:
+            self._space.clear()
+            await self._space.wait()
+        if self.closed:
+            raise WebSocketDisconnect()
+        self._queue[("unkeyed", next(self._unkeyed))] = message
+        self._ready.set()
+
+    async def send_json(self, data: Any) -> None:
+        """
+        Queue a JSON message for this client, waiting while its queue is full.
+
+        Args:
+            data: JSON-serializable message
+
+        Raises:
+            WebSocketDisconnect: The connection is closed
+        """
+        await self.send_text(json.dumps(data))
+
+    def offer(self, message: str, key: Optional[Hashable] = None) -> bool:
+        """
+        Queue a message without waiting, applying the slow-consumer policy.
+
+        Args:
+            message: Serialized message
+            key: Coalescing key; with the coalesce policy a queued message
+                 with the same key is replaced
+
+        Returns:
+            True if the message was queued
+        """
+        if self.closed:
+            return False
+        policy = self._manager.policy
+        if policy != COALESCE:
+            key = None
+        elif key in self._queue:
+            self._queue[key] = message
+            self._discard("coalesced")
+            return True
+        if len(self._queue) >= self._manager.queue_size:
+            if policy == DISCONNECT:
+                WEBSOCKET_SLOW_DISCONNECTS.inc()
+                self._manager.kick(self)
+                return False
+            if policy == DROP:
+                self._discard("dropped")
+                return False
+            self._queue.popitem(last=False)
+            self._discard("dropped")
+        if key is None:
+            key = ("unkeyed", next(self._unkeyed))
+        self._queue[key] = message
+        self._ready.set()
+        return True
+
+    def _discard(self, reason: str) -> None:
+        self.discarded += 1
+        WEBSOCKET_OUTBOUND_DISCARDED.labels(reason=reason).inc()
+
+    async def _write(self) -> None:
+        """Send queued messages in order until the connection is closed."""
+        try:
+            while True:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, message = self._queue.popitem(last=False)
+                self._space.set()
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(message), self._manager.send_timeout)
+                    self.sent += 1
+                except asyncio.TimeoutError:
+                    WEBSOCKET_SLOW_DISCONNECTS.inc()
+                    self._manager.kick(self)
+                    return
+                except Exception as e:
+                    # The client is gone; the endpoint unregisters it
+                    logger.debug("WebSocket send failed", error=str(e))
+                    return
+        finally:
+            # Nothing drains the queue any more
+            self._mark_closed()
+
+    def _mark_closed(self) -> None:
+        """Discard queued messages and wake senders waiting for space."""
+        self.closed = True
+        self._queue.clear()
+        self._space.set()
+
+    def close(self) -> None:
+        """Stop the writer; queued messages are discarded."""
+        if self._writer is not None:
+            # The writer holds no state, so it is not waited for
+            self._writer.cancel()
+            self._writer = None
+        self._mark_closed()
+
+
+class ConnectionManager:
+    """Registry of open WebSockets with non-blocking broadcast."""
+
+    def __init__(self, queue_size: int = 64, policy: str = DROP, send_timeout: float = 5.0):
+        """
+        Initialize the manager.
+
+        Args:
+            queue_size: Outbound messages queued per connection
+            policy: Slow-consumer policy for broadcasts: drop, coalesce or disconnect
+            send_timeout: Seconds a single send may take before the client
+                          is disconnected
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._connections: Dict[int, Connection] = {}
+        # Close tasks of kicked connections
+        self._closing: Dict[Connection, asyncio.Task] = {}
+
+    async def connect(self, websocket: WebSocket) -> Connection:
+        """
+        Accept a WebSocket and register it.
+
+        Args:
+            websocket: WebSocket to accept
+
+        Returns:
+            The connection; send to the client through it
+        """
+        await websocket.accept()
+        connection = Connection(websocket, self)
+        self._connections[id(websocket)] = connection
+        connection.start()
+        logger.info("WebSocket connected")
+        return connection
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        """
+        Unregister a WebSocket and stop its writer.
+
+        Args:
+            websocket: WebSocket to unregister
+        """
+        connection = self._connections.pop(id(websocket), None)
+        if connection is not None:
+            connection.close()
+            logger.info("WebSocket disconnected")
+
+    def kick(self, connection: Connection) -> None:
+        """Close a client that cannot keep up; its endpoint then disconnects it."""
+        if connection in self._closing:
+            return
+        logger.warning("Disconnecting slow WebSocket client", discarded=connection.discarded)
+
+        async def close():
+            try:
+                await connection.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception:
+                pass
+            finally:
+                self.disconnect(connection.websocket)
+                self._closing.pop(connection, None)
+
+        self._closing[connection] = asyncio.create_task(close())
+
+    async def send_personal_message(self, message: str, websocket: WebSocket) -> None:
+        """Queue a message for one client, waiting while its queue is full."""
+        connection = self._connections.get(id(websocket))
+        if connection is not None:
+            await connection.send_text(message)
+
+    def broadcast(self, message: Any, key: Optional[Hashable] = None) -> int:
+        """
+        Offer a message to every client without waiting.
+
+        Args:
+            message: Text, or a JSON-serializable value serialized once for
+                     all clients
+            key: Coalescing key for the coalesce policy
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        return sum(connection.offer(message, key) for connection in list(self._connections.values()))
+
+    @property
+    def active_connections(self) -> int:
+        """Number of registered connections."""
+        return len(self._connections)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection and queue counts and the configured policy."""
+        connections = list(self._connections.values())
+        return {
+            "connections": len(connections),
+            "queued": sum(connection.queued for connection in connections),
+            "discarded": sum(connection.discarded for connection in connections),
+            "policy": self.policy,
+            "queue_size": self.queue_size
+        }
+
+
+# Shared manager configured from settings
+connection_manager = ConnectionManager(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    policy=settings.WS_SLOW_CONSUMER_POLICY,
+    send_timeout=settings.WS_SEND_TIMEOUT
+)
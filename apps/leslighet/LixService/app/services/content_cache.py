@@ -0,0 +1,209 @@
+"""
+Bounded in-process cache tier keyed by content hash.
+Evicts least recently used entries when either the byte budget or the entry
+limit is exceeded, and exports hit/miss/eviction counters to Prometheus.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+
+CONTENT_CACHE_HITS = Counter(
+    "content_cache_hits_total",
+    "Total count of in-process content cache hits",
+    ["cache"]
+)
+CONTENT_CACHE_MISSES = Counter(
+    "content_cache_misses_total",
+    "Total count of in-process content cache misses",
+    ["cache"]
+)
+CONTENT_CACHE_EVICTIONS = Counter(
+    "content_cache_evictions_total",
+    "Total count of in-process content cache evictions",
+    ["cache"]
+)
+CONTENT_CACHE_BYTES = Gauge(
+    "content_cache_size_bytes",
+    "Estimated size of the in-process content cache in bytes",
+    ["cache"]
+)
+CONTENT_CACHE_ENTRIES = Gauge(
+    "content_cache_entries",
+    "Number of entries in the in-process content cache",
+    ["cache"]
+)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+    
+    Objects may define an `nbytes()` method to report their own size;
+    containers are walked recursively.
+    
+    Args:
+        value: The value to measure
+        
+    Returns:
+        Approximate size in bytes
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if callable(nbytes):
+        return nbytes()
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ContentCache:
+    """
+    Thread-safe, byte-size-aware LRU cache for analysis artifacts.
+    
+    Keys are expected to be content hashes (see app.utils.hashing), so two
+    different texts never share an entry regardless of length or prefix.
+    """
+    
+    def __init__(self, name: str, max_bytes: int, max_entries: Optional[int] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            name: Cache name, used as the Prometheus label
+            max_bytes: Upper bound for the estimated size of all entries
+            max_entries: Optional upper bound for the number of entries
+        """
+        self.name = name
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value and mark it as recently used.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value or None if not present
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                CONTENT_CACHE_MISSES.labels(cache=self.name).inc()
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        CONTENT_CACHE_HITS.labels(cache=self.name).inc()
+        return entry[0]
+    
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> bool:
+        """
+        Store a value, evicting least recently used entries to stay within budget.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            size: Size in bytes; estimated from the value when omitted
+            
+        Returns:
+            True if stored, False if the value alone exceeds the byte budget
+        """
+        if size is None:
+            size = estimate_size(value)
+        if size > self._max_bytes:
+            return False
+        
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            
+            while self._entries and (
+                self._bytes > self._max_bytes or
+                (self._max_entries is not None and len(self._entries) > self._max_entries)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                evicted += 1
+            
+            self._stats["evictions"] += evicted
+            current_bytes = self._bytes
+            current_entries = len(self._entries)
+        
+        if evicted:
+            CONTENT_CACHE_EVICTIONS.labels(cache=self.name).inc(evicted)
+        CONTENT_CACHE_BYTES.labels(cache=self.name).set(current_bytes)
+        CONTENT_CACHE_ENTRIES.labels(cache=self.name).set(current_entries)
+        return True
+    
+    def delete(self, key: str) -> bool:
+        """
+        Remove a single entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            True if the key was present
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+            current_bytes = self._bytes
+            current_entries = len(self._entries)
+        CONTENT_CACHE_BYTES.labels(cache=self.name).set(current_bytes)
+        CONTENT_CACHE_ENTRIES.labels(cache=self.name).set(current_entries)
+        return entry is not None
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        CONTENT_CACHE_BYTES.labels(cache=self.name).set(0)
+        CONTENT_CACHE_ENTRIES.labels(cache=self.name).set(0)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared in-process cache for readability results and parsed texts
+shared_content_cache = ContentCache(
+    "analysis",
+    max_bytes=settings.CONTENT_CACHE_MAX_BYTES,
+    max_entries=settings.CONTENT_CACHE_MAX_ENTRIES
+)
+
+# Memory-budgeted cache for token streams, shared by every caching tokenizer
+parse_cache = ContentCache(
+    "parse",
+    max_bytes=settings.PARSE_CACHE_MAX_BYTES,
+    max_entries=settings.PARSE_CACHE_MAX_ENTRIES
+)
@@ -2,11 +2,12 @@
 Enhanced readability service that provides multiple metrics for text analysis.
 Calculates LIX, SMOG, CLI, Flesch, and other readability metrics.
 """
-import re
 import math
 import logging
 from typing import Dict, Any, List, Tuple, Optional
 
+from app.services.statistics import TextStatistics, count_syllables, COMPLEX_WORD_SYLLABLES
+
 class EnhancedReadabilityService:
     """
     Service for analyzing text readability using multiple algorithms.
@@ -30,6 +31,19 @@ class EnhancedReadabilityService:
         """
         Analyze text and return comprehensive readability metrics.
         
+        Args:
+            text: The text to analyze
+            options: Optional analysis configuration
+            
+        Returns:
+            Dictionary containing various readability metrics
+        """
+        return self.analyze(text, options)
+    
+    def analyze(self, text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Synchronous analyze_text, for running on an executor.
+        
         Args:
             text: The text to analyze
             options: Optional analysis configuration
@@ -43,6 +57,46 @@ class EnhancedReadabilityService:
         # Basic text statistics
         stats = self._get_text_statistics(text)
         
+        return self._build_metrics(stats)
+    
+    def analyze_many(self, texts: List[str], options: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Analyze several texts in one call, for example a micro-batch of
+        realtime requests handed to an executor at once.
+        
+        Args:
+            texts: Texts to analyze
+            options: Optional analysis configuration per text
+            
+        Returns:
+            Metrics for every text, in order, as analyze_text
+        """
+        options = options or [None] * len(texts)
+        return [self.analyze(text, opts) for text, opts in zip(texts, options)]
+    
+    def analyze_record(self, record: TextStatistics) -> Dict[str, Any]:
+        """
+        Calculate all readability metrics from a mergeable statistics record,
+        for example one merged from the chunks of a large or streamed text.
+        
+        Args:
+            record: Statistics record for the whole text
+            
+        Returns:
+            Dictionary containing various readability metrics, as analyze_text
+        """
+        return self._build_metrics(self.statistics_from_record(record))
+    
+    def _build_metrics(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calculate all metrics, interpretation and recommendations from statistics.
+        
+        Args:
+            stats: Text statistics dictionary
+            
+        Returns:
+            Dictionary containing various readability metrics
+        """
         # Calculate all metrics
         metrics = {
             'lix': self.calculate_lix(stats),
@@ -71,11 +125,24 @@ class EnhancedReadabilityService:
         Returns:
             Dictionary of text statistics
         """
-        # Clean and normalize text
-        text = text.strip()
-        if not text:
+        return self.statistics_from_record(TextStatistics.from_text(text, self._language))
+    
+    def statistics_from_record(self, record: TextStatistics) -> Dict[str, Any]:
+        """
+        Build the statistics dictionary used by the metric calculations from a
+        mergeable statistics record, so that chunked or streamed input can be
+        scored without re-scanning the text.
+        
+        Args:
+            record: Statistics record for the whole text
+            
+        Returns:
+            Dictionary of text statistics
+        """
+        word_count = record.word_count
+        if not word_count:
             return {
-                'char_count': 0,
+                'char_count': record.stripped_char_count,
                 'word_count': 0,
                 'sentence_count': 0,
                 'long_word_count': 0,
@@ -86,43 +153,17 @@ class EnhancedReadabilityService:
                 'complex_word_count': 0
             }
         
-        # Basic counts
-        char_count = len(text)
-        
-        # Split into sentences
-        # This is a simplified approach; more sophisticated NLP techniques 
-        # could be used for better accuracy
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        sentence_count = len(sentences)
-        
-        # Split into words and count
-        words = re.findall(r'\b\w+\b', text.lower())
-        word_count = len(words)
-        
-        # Count long words (>6 characters)
-        long_word_count = sum(1 for w in words if len(w) > 6)
-        
-        # Calculate average word length
-        avg_word_length = sum(len(w) for w in words) / max(1, word_count)
-        
-        # Calculate average sentence length in words
-        avg_sentence_length = word_count / max(1, sentence_count)
-        
-        # Count syllables (language dependent)
-        syllable_count, complex_word_count = self._count_syllables(words)
-        avg_syllables_per_word = syllable_count / max(1, word_count)
-        
+        sentence_count = record.sentence_count
         return {
-            'char_count': char_count,
+            'char_count': record.stripped_char_count,
             'word_count': word_count,
             'sentence_count': sentence_count,
-            'long_word_count': long_word_count,
-            'avg_word_length': avg_word_length,
-            'avg_sentence_length': avg_sentence_length,
-            'syllable_count': syllable_count,
-            'avg_syllables_per_word': avg_syllables_per_word,
-            'complex_word_count': complex_word_count
+            'long_word_count': record.long_words_count,
+            'avg_word_length': record.letter_count / word_count,
+            'avg_sentence_length': word_count / max(1, sentence_count),
+            'syllable_count': record.syllable_count,
+            'avg_syllables_per_word': record.syllable_count / word_count,
+            'complex_word_count': record.complex_word_count
         }
     
     def _count_syllables(self, words: List[str]) -> Tuple[int, int]:
@@ -139,39 +180,11 @@ class EnhancedReadabilityService:
         complex_words = 0
         
         for word in words:
-            # Count vowel groups as an approximation of syllables
-            count = 0
-            
-            # Norwegian-specific syllable counting logic
-            if self._language == 'nb':
-                # Count vowel groups: a, e, i, o, u, y, æ, ø, å
-                vowels = 'aeiouyæøå'
-                prev_char = None
-                
-                for char in word:
-                    if char.lower() in vowels and prev_char not in vowels:
-                        count += 1
-                    prev_char = char.lower()
-            else:
-                # Default English syllable counting
-                word = word.lower()
-                if word.endswith('e'):
-                    word = word[:-1]
-                
-                vowels = 'aeiouy'
-                prev_char = None
-                
-                for char in word:
-                    if char in vowels and prev_char not in vowels:
-                        count += 1
-                    prev_char = char
-            
-            # Ensure each word has at least one syllable
-            count = max(1, count)
+            count = count_syllables(word, self._language)
             total_syllables += count
             
             # Words with 3+ syllables are considered complex
-            if count >= 3:
+            if count >= COMPLEX_WORD_SYLLABLES:
                 complex_words += 1
                 
         return total_syllables, complex_words
@@ -0,0 +1,251 @@
+"""
+Execution backends for CPU-bound analysis.
+
+Analysis is synchronous Python; running it directly inside an async handler
+blocks the event loop and every other request and WebSocket on the worker.
+AnalysisExecutor runs small texts inline, medium texts on a thread pool and
+large texts on the BatchedTextProcessor's process pool, and reports queue
+depth and wait time per backend. Very large documents are split across the
+pool by the BatchedTextProcessor itself.
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import structlog
+from prometheus_client import Gauge, Histogram
+
+from app.config import settings
+from app.services.batched_text_processor import BatchedTextProcessor
+from app.services.analysis import analyze_document
+
+logger = structlog.get_logger()
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+PARALLEL = "parallel"
+BACKENDS = (INLINE, THREAD, PROCESS)
+
+ANALYSIS_QUEUE_DEPTH = Gauge(
+    "analysis_executor_queue_depth",
+    "Number of analysis tasks submitted and not yet finished",
+    ["backend"]
+)
+ANALYSIS_WAIT_TIME = Histogram(
+    "analysis_executor_wait_seconds",
+    "Time analysis tasks spend queued before a worker picks them up",
+    ["backend"]
+)
+ANALYSIS_RUN_TIME = Histogram(
+    "analysis_executor_run_seconds",
+    "Time spent running analysis tasks",
+    ["backend"]
+)
+
+
+def _timed_call(submitted_at: float, func: Callable, args: Tuple, kwargs: dict) -> Tuple[float, Any]:
+    """
+    Run a task and report when it started, so wait time can be measured
+    across thread and process boundaries.
+
+    Args:
+        submitted_at: Wall-clock time the task was submitted
+        func: Function to call
+        args: Positional arguments
+        kwargs: Keyword arguments
+
+    Returns:
+        Tuple of (seconds spent waiting, function result)
+    """
+    started_at = time.time()
+    return started_at - submitted_at, func(*args, **kwargs)
+
+
+class AnalysisExecutor:
+    """
+    Size-aware executor for CPU-bound analysis functions.
+
+    Functions sent to the process backend must be picklable module-level
+    functions (see app.services.analysis) and must not rely on mutable
+    in-process state.
+    """
+
+    def __init__(self, mode: str = "auto", thread_threshold: int = 2000,
+                 process_threshold: int = 20000, thread_workers: int = 4,
+                 process_workers: Optional[int] = None,
+                 parallel_threshold: int = 200000, chunk_size: int = 65536):
+        """
+        Initialize the executor. Pools are created on first use.
+
+        Args:
+            mode: "auto" to choose by text size, or a fixed backend name
+            thread_threshold: Text length above which work leaves the event loop
+            process_threshold: Text length above which work uses the process pool
+            thread_workers: Size of the thread pool
+            process_workers: Size of the process pool (None for CPU count)
+            parallel_threshold: Text length above which a document is split
+                                across the process pool (0 disables)
+            chunk_size: Minimum chunk size for split documents
+        """
+        if mode != "auto" and mode not in BACKENDS:
+            raise ValueError(f"Unknown analysis executor mode: {mode}")
+        self._mode = mode
+        self._thread_threshold = thread_threshold
+        self._process_threshold = process_threshold
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._parallel_threshold = parallel_threshold
+        self._chunk_size = chunk_size
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._batch_processor: Optional[BatchedTextProcessor] = None
+        self._lock = threading.Lock()
+
+    def backend_for(self, size: int, allow_process: bool = True) -> str:
+        """
+        Choose a backend for a task of the given size.
+
+        Args:
+            size: Size of the work, normally the text length in characters
+            allow_process: Whether the task may run in another process
+
+        Returns:
+            Backend name
+        """
+        if self._mode != "auto":
+            backend = self._mode
+        elif size > self._process_threshold:
+            backend = PROCESS
+        elif size > self._thread_threshold:
+            backend = THREAD
+        else:
+            backend = INLINE
+        if backend == PROCESS and not allow_process:
+            backend = THREAD
+        return backend
+
+    def _get_pool(self, backend: str):
+        """Get (and lazily create) the pool for a backend."""
+        with self._lock:
+            if backend == THREAD:
+                if self._thread_pool is None:
+                    self._thread_pool = ThreadPoolExecutor(
+                        max_workers=self._thread_workers,
+                        thread_name_prefix="analysis"
+                    )
+                return self._thread_pool
+            return self._get_batch_processor().executor
+
+    def _get_batch_processor(self) -> BatchedTextProcessor:
+        """Get (and lazily create) the batch processor; call with the lock held."""
+        if self._batch_processor is None:
+            self._batch_processor = BatchedTextProcessor(
+                max_workers=self._process_workers,
+                chunk_size=self._chunk_size
+            )
+        return self._batch_processor
+
+    async def run(self, func: Callable, *args, size: int = 0,
+                  allow_process: bool = True, background: bool = False, **kwargs) -> Any:
+        """
+        Run a CPU-bound function on the backend chosen for its size.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments for the function
+            size: Size of the work, normally the text length in characters
+            allow_process: Set to False for functions that touch in-process state
+            background: Throughput work (such as batch jobs) that should use
+                        the process pool whatever its size, in "auto" mode
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The function's result
+        """
+        backend = self.backend_for(size, allow_process)
+        if background and self._mode == "auto" and allow_process:
+            backend = PROCESS
+        if backend == INLINE:
+            with ANALYSIS_RUN_TIME.labels(backend=INLINE).time():
+                return func(*args, **kwargs)
+
+        pool = self._get_pool(backend)
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        ANALYSIS_QUEUE_DEPTH.labels(backend=backend).inc()
+        try:
+            waited, result = await loop.run_in_executor(
+                pool, functools.partial(_timed_call, submitted_at, func, args, kwargs)
+            )
+        finally:
+            ANALYSIS_QUEUE_DEPTH.labels(backend=backend).dec()
+        ANALYSIS_WAIT_TIME.labels(backend=backend).observe(max(0.0, waited))
+        ANALYSIS_RUN_TIME.labels(backend=backend).observe(
+            max(0.0, time.time() - submitted_at - waited)
+        )
+        return result
+
+    async def analyze_document(self, text: str, background: bool = False,
+                               progress: Optional[Callable[[int], None]] = None,
+                               **options) -> Dict[str, Any]:
+        """
+        Run the full analysis pipeline for a text on the most suitable backend.
+
+        Documents above the parallel threshold are split into chunks and
+        analyzed across the process pool; everything else runs analyze_document
+        on the backend chosen by run(). With a progress callback, documents
+        take the chunked path whatever their size, so progress is reported
+        per chunk.
+
+        Args:
+            text: Text to analyze
+            background: Use the process pool whatever the text size (see run())
+            progress: Called with the number of characters analyzed, as
+                      chunks finish
+            **options: Options accepted by analyze_document
+
+        Returns:
+            Analysis result as returned by analyze_document
+        """
+        chunked = progress is not None or (
+            self._parallel_threshold and len(text) > self._parallel_threshold
+        )
+        if chunked and self._mode in ("auto", PROCESS):
+            with self._lock:
+                processor = self._get_batch_processor()
+            ANALYSIS_QUEUE_DEPTH.labels(backend=PARALLEL).inc()
+            try:
+                with ANALYSIS_RUN_TIME.labels(backend=PARALLEL).time():
+                    return await processor.analyze(text, progress=progress, **options)
+            finally:
+                ANALYSIS_QUEUE_DEPTH.labels(backend=PARALLEL).dec()
+        result = await self.run(analyze_document, text, size=len(text), background=background, **options)
+        if progress is not None:
+            progress(len(text))
+        return result
+
+    def shutdown(self) -> None:
+        """Shut down the pools, waiting for running tasks to finish."""
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown()
+                self._thread_pool = None
+            if self._batch_processor is not None:
+                self._batch_processor.close()
+                self._batch_processor = None
+        logger.info("Analysis executor shut down")
+
+
+# Shared executor configured from settings
+analysis_executor = AnalysisExecutor(
+    mode=settings.ANALYSIS_EXECUTOR_MODE,
+    thread_threshold=settings.ANALYSIS_THREAD_THRESHOLD,
+    process_threshold=settings.ANALYSIS_PROCESS_THRESHOLD,
+    thread_workers=settings.ANALYSIS_THREAD_WORKERS,
+    process_workers=settings.ANALYSIS_PROCESS_WORKERS or None,
+    parallel_threshold=settings.PARALLEL_ANALYSIS_THRESHOLD,
+    chunk_size=settings.PARALLEL_CHUNK_SIZE
+)
@@ -5,6 +5,8 @@ Provides a centralized way to instantiate and configure various text processors.
 from typing import Dict, Any, Optional
 import logging
 
+from app.services.tokenizer import Tokenizer, CachingTokenizer
+from app.services.content_cache import parse_cache
 from app.services.text_parser import TextParser
 from app.services.word_analyzer import WordAnalyzer
 from app.services.sentence_analyzer import SentenceAnalyzer
@@ -16,6 +18,20 @@ from app.services.metrics import LixMetric, RixMetric
 # Singleton cache for service instances
 _service_instances: Dict[str, Any] = {}
 
+def get_tokenizer(config: Optional[Dict[str, Any]] = None) -> Tokenizer:
+    """
+    Get or create the shared tokenizer, backed by the memory-budgeted parse cache.
+    
+    Args:
+        config: Optional configuration parameters for the tokenizer
+        
+    Returns:
+        Shared Tokenizer instance
+    """
+    if 'tokenizer' not in _service_instances:
+        _service_instances['tokenizer'] = CachingTokenizer(parse_cache)
+    return _service_instances['tokenizer']
+
 def get_text_parser(config: Optional[Dict[str, Any]] = None) -> TextParser:
     """
     Get or create a TextParser instance.
@@ -27,7 +43,7 @@ def get_text_parser(config: Optional[Dict[str, Any]] = None) -> TextParser:
         Configured TextParser instance
     """
     if 'text_parser' not in _service_instances:
-        _service_instances['text_parser'] = TextParser()
+        _service_instances['text_parser'] = TextParser(get_tokenizer())
     return _service_instances['text_parser']
 
 def get_word_analyzer(config: Optional[Dict[str, Any]] = None) -> WordAnalyzer:
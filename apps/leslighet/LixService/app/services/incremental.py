@@ -0,0 +1,296 @@
+"""
+Incremental re-analysis engine for the real-time typing path.
+
+Keeps a document split into paragraph segments together with per-segment
+counts. On every update the new text is diffed against the previous one by
+common prefix and suffix, only the paragraphs touched by the edit (plus one
+neighbour on each side, so merged or split paragraphs are picked up) are
+re-tokenized, and the running totals are adjusted by the difference.
+
+Sentences never cross a paragraph break, so tokenizing paragraphs one by one
+gives exactly the same counts as tokenizing the whole text.
+"""
+import re
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.tokenizer import Tokenizer
+from app.services.statistics import TextStatistics, LONG_WORD_LENGTH
+from app.services.readability import ReadabilityService
+from app.services.text_analysis import TextAnalysisService
+
+# Same paragraph break definition as the tokenizer
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+class SegmentStats:
+    """
+    Statistics for one paragraph segment of a document.
+
+    A segment covers a paragraph and the break that follows it, so the
+    segments of a document are contiguous and their lengths sum to the
+    document length.
+    """
+
+    __slots__ = ('length', 'stats', 'sentence_lengths', 'sentence_long_words')
+
+    def __init__(self, text: str, tokenizer: Tokenizer):
+        """
+        Tokenize a segment and record its statistics.
+
+        Args:
+            text: Segment text
+            tokenizer: Tokenizer used for the segment
+        """
+        stream = tokenizer.tokenize(text)
+        self.length = len(text)
+        self.stats = TextStatistics.from_stream(stream)
+        self.sentence_lengths = stream.sentence_lengths()
+
+        # Long words per sentence, for per-sentence LIX
+        self.sentence_long_words = array(
+            'i', stream.length_profile().sentence_counts_longer_than(LONG_WORD_LENGTH).tolist()
+        )
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix of two strings, using C-level slice compares."""
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    lo, hi = 0, n
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of two strings, capped at `limit`."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class IncrementalAnalyzer:
+    """
+    Per-connection incremental analyzer.
+
+    Call `update()` with the full current text after every edit, then read
+    `readability()` or `statistics()`; both are built from running counts
+    without touching the text again.
+    """
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        """
+        Initialize an empty analyzer.
+
+        Args:
+            tokenizer: Tokenizer used for dirty segments. Segments are short and
+                       rarely repeat, so an uncached tokenizer is the default.
+        """
+        self._tokenizer = tokenizer or Tokenizer()
+        self.text = ""
+        self._segments: List[SegmentStats] = []
+
+        # Running totals over all segments
+        self.word_count = 0
+        self.letter_count = 0
+        self.long_words_count = 0
+        self.very_long_words_count = 0
+        self.sentence_count = 0
+        self.paragraph_count = 0
+
+        # Segments re-tokenized by the last update, for monitoring
+        self.last_dirty_segments = 0
+
+    def update(self, text: str) -> int:
+        """
+        Bring the analyzer up to date with a new version of the document.
+
+        Args:
+            text: Full current text
+
+        Returns:
+            Number of characters that were re-tokenized
+        """
+        if text == self.text:
+            self.last_dirty_segments = 0
+            return 0
+
+        first, last, region_start, region_end = self._changed_range(text)
+        region = text[region_start:region_end]
+
+        new_segments = self._segment(region)
+        for segment in self._segments[first:last]:
+            self._apply(segment, -1)
+        for segment in new_segments:
+            self._apply(segment, 1)
+        self._segments[first:last] = new_segments
+
+        self.text = text
+        self.last_dirty_segments = len(new_segments)
+        return len(region)
+
+    def edit_size(self, text: str) -> int:
+        """
+        Number of characters update() would re-tokenize for a new text.
+
+        Cheap compared to the update itself, so callers can size the work
+        before running it.
+
+        Args:
+            text: Full current text
+
+        Returns:
+            Characters in the dirty region of the new text
+        """
+        if text == self.text:
+            return 0
+        _, _, region_start, region_end = self._changed_range(text)
+        return region_end - region_start
+
+    def _changed_range(self, text: str) -> Tuple[int, int, int, int]:
+        """
+        Find the segments an update to `text` replaces.
+
+        Returns:
+            Tuple of (first segment index, one past the last segment index,
+            region start offset, region end offset), the offsets in new-text
+            coordinates
+        """
+        old = self.text
+
+        # Diff by common prefix and suffix; [prefix, old_end) was replaced
+        prefix = _common_prefix_length(old, text)
+        suffix = _common_suffix_length(old, text, min(len(old), len(text)) - prefix)
+        old_end = len(old) - suffix
+
+        first, last, region_start, region_end = self._dirty_range(prefix, old_end)
+        return first, last, region_start, region_end + len(text) - len(old)
+
+    def _dirty_range(self, start: int, end: int) -> Tuple[int, int, int, int]:
+        """
+        Find the segments touched by an edit of the old text range [start, end).
+
+        Args:
+            start: First changed character in the old text
+            end: One past the last changed character in the old text
+
+        Returns:
+            Tuple of (first segment index, one past the last segment index,
+            region start offset, region end offset) in old-text coordinates
+        """
+        segments = self._segments
+        if not segments:
+            return 0, 0, 0, 0
+
+        # Locate the segments containing both edit edges
+        first = last = len(segments) - 1
+        offset = 0
+        found_first = False
+        for i, segment in enumerate(segments):
+            segment_end = offset + segment.length
+            if not found_first and start < segment_end:
+                first = i
+                found_first = True
+            if end < segment_end:
+                last = i
+                break
+            offset = segment_end
+
+        # Widen by one neighbour on each side so edits to a paragraph break
+        # (merging or splitting paragraphs) are re-segmented correctly
+        first = max(0, first - 1)
+        last = min(len(segments), last + 2)
+
+        region_start = sum(segment.length for segment in segments[:first])
+        region_end = region_start + sum(segment.length for segment in segments[first:last])
+        return first, last, region_start, region_end
+
+    def _segment(self, region: str) -> List[SegmentStats]:
+        """Split a region at paragraph breaks and tokenize each segment."""
+        segments = []
+        start = 0
+        for match in _PARAGRAPH_BREAK.finditer(region):
+            segments.append(SegmentStats(region[start:match.end()], self._tokenizer))
+            start = match.end()
+        if start < len(region):
+            segments.append(SegmentStats(region[start:], self._tokenizer))
+        return segments
+
+    def _apply(self, segment: SegmentStats, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a segment's counts from the totals."""
+        stats = segment.stats
+        self.word_count += sign * stats.word_count
+        self.letter_count += sign * stats.letter_count
+        self.long_words_count += sign * stats.long_words_count
+        self.very_long_words_count += sign * stats.very_long_words_count
+        self.sentence_count += sign * stats.sentence_count
+        self.paragraph_count += sign * stats.paragraph_count
+
+    def record(self) -> TextStatistics:
+        """
+        Get the full mergeable statistics record for the current text, for
+        metrics that need more than the running counts (such as syllables).
+
+        Returns:
+            Statistics record merged from the segment records
+        """
+        return TextStatistics.merge_all(segment.stats for segment in self._segments)
+
+    def reset(self) -> None:
+        """Forget the current document."""
+        self.__init__(self._tokenizer)
+
+    def sentence_lix(self) -> List[float]:
+        """
+        Get the LIX score of every sentence in document order.
+
+        Returns:
+            List of per-sentence LIX scores
+        """
+        scores = []
+        for segment in self._segments:
+            for length, long_words in zip(segment.sentence_lengths, segment.sentence_long_words):
+                scores.append(round(length + (long_words / length) * 100, 1))
+        return scores
+
+    def readability(self) -> Dict[str, Any]:
+        """
+        Get readability metrics for the current text.
+
+        Returns:
+            Same structure as ReadabilityService.get_readability
+        """
+        if not self.text or self.text.isspace():
+            return ReadabilityService.get_readability(self.text)
+        return ReadabilityService.build_result(
+            self.word_count, max(1, self.sentence_count), self.long_words_count
+        )
+
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Get basic statistics for the current text.
+
+        Returns:
+            Same structure as TextAnalysisService.get_basic_statistics()["statistics"]
+        """
+        if not self.text.strip():
+            return TextAnalysisService.get_basic_statistics(self.text)["statistics"]
+        return TextAnalysisService.build_basic_statistics(
+            word_count=self.word_count,
+            sentence_count=self.sentence_count,
+            paragraph_count=self.paragraph_count,
+            letter_count=self.letter_count,
+            long_words_count=self.long_words_count,
+            very_long_words_count=self.very_long_words_count
+        )
@@ -1,7 +1,10 @@
 from typing import Dict, List, Any, Protocol, Optional
+from app.services.tokenizer import TokenStream
+from app.services.word_analyzer import WordFrequencyIndex
 
 class TextParser(Protocol):
     """Interface for text parsing operations."""
+    def tokenize(self, text: str) -> TokenStream: ...
     def split_words(self, text: str) -> List[str]: ...
     def split_sentences(self, text: str) -> List[str]: ...
     def split_paragraphs(self, text: str) -> List[str]: ...
@@ -16,7 +19,7 @@ class ReadabilityMetric(Protocol):
 class WordAnalyzer(Protocol):
     """Interface for analyzing words."""
     def get_long_words(self, words: List[str], min_length: float = 6.9) -> List[str]: ...
-    def analyze_word(self, word: str, index: int, sentence_index: int, position_in_sentence: int, word_frequency: Dict[str, int]) -> Dict[str, Any]: ...
+    def analyze_word(self, word: str, index: int, sentence_index: int, position_in_sentence: int, frequency_index: WordFrequencyIndex) -> Dict[str, Any]: ...
 
 
 class SentenceAnalyzer(Protocol):
@@ -0,0 +1,163 @@
+"""
+Vectorized word length statistics.
+
+A LengthProfile holds one int array with the length of every word in a
+document, and the word offset of every sentence. All word length counts,
+histograms and per-sentence aggregates used by the metrics and analyzers
+are derived from these arrays with NumPy instead of Python loops over the
+words.
+"""
+from collections import Counter
+from typing import List, Sequence
+
+import numpy as np
+
+from app.services.tokenizer import TokenStream
+
+
+def word_length_array(words: Sequence[str]) -> np.ndarray:
+    """
+    Build the length array for a list of words.
+
+    Args:
+        words: Words to measure
+
+    Returns:
+        Array with the character length of every word
+    """
+    return np.fromiter(map(len, words), dtype=np.intc, count=len(words))
+
+
+def long_words(words: Sequence[str], min_length: float) -> List[str]:
+    """
+    Select the words longer than `min_length`, keeping their order.
+
+    Args:
+        words: Words to filter
+        min_length: Words must be strictly longer than this
+
+    Returns:
+        List of long words
+    """
+    return [words[i] for i in np.flatnonzero(word_length_array(words) > min_length)]
+
+
+def _histogram(values: np.ndarray) -> Counter:
+    """Count the occurrences of each value, in ascending order of value."""
+    if not values.size:
+        return Counter()
+    counts = np.bincount(values)
+    present = np.flatnonzero(counts)
+    return Counter(dict(zip(present.tolist(), counts[present].tolist())))
+
+
+class LengthProfile:
+    """
+    Word and sentence length arrays for one token stream.
+
+    Word lengths are measured on the source text (word end minus word start),
+    so building a profile never touches the words themselves.
+    """
+
+    __slots__ = ('lengths', 'sentence_offsets')
+
+    def __init__(self, lengths: np.ndarray, sentence_offsets: np.ndarray):
+        """
+        Initialize a profile from prepared arrays.
+
+        Args:
+            lengths: Length of every word in document order
+            sentence_offsets: Index of the first word of every sentence, plus
+                              the total word count as a final sentinel
+        """
+        self.lengths = lengths
+        self.sentence_offsets = sentence_offsets
+
+    @classmethod
+    def from_stream(cls, stream: TokenStream) -> 'LengthProfile':
+        """
+        Build the profile of a token stream from its offset arrays.
+
+        Args:
+            stream: Token stream of the text
+
+        Returns:
+            Length profile for the stream
+        """
+        starts = np.frombuffer(stream.word_starts, dtype=np.intc)
+        ends = np.frombuffer(stream.word_ends, dtype=np.intc)
+        offsets = np.frombuffer(stream.sentence_word_starts, dtype=np.intc)
+        return cls(ends - starts, offsets.copy())
+
+    @property
+    def word_count(self) -> int:
+        """Number of words."""
+        return int(self.lengths.size)
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of sentences."""
+        return max(0, int(self.sentence_offsets.size) - 1)
+
+    def nbytes(self) -> int:
+        """Memory held by the arrays."""
+        return int(self.lengths.nbytes + self.sentence_offsets.nbytes)
+
+    def letter_count(self) -> int:
+        """Total length of all words."""
+        return int(self.lengths.sum())
+
+    def count_longer_than(self, min_length: float) -> int:
+        """
+        Count words strictly longer than `min_length` characters.
+
+        Args:
+            min_length: Length threshold
+
+        Returns:
+            Number of longer words
+        """
+        return int(np.count_nonzero(self.lengths > min_length))
+
+    def length_histogram(self) -> Counter:
+        """Number of words of each length."""
+        return _histogram(self.lengths)
+
+    def sentence_lengths(self) -> np.ndarray:
+        """Word count of every sentence."""
+        return np.diff(self.sentence_offsets)
+
+    def sentence_length_histogram(self) -> Counter:
+        """Number of sentences of each word count."""
+        return _histogram(self.sentence_lengths())
+
+    def sentence_sums(self, values: np.ndarray) -> np.ndarray:
+        """
+        Sum a per-word array within every sentence.
+
+        Args:
+            values: Array with one value per word
+
+        Returns:
+            Array with one sum per sentence
+        """
+        if not self.sentence_count:
+            return np.zeros(0, dtype=np.int64)
+        # Sentences always contain at least one word, so no reduceat index repeats
+        return np.add.reduceat(values, self.sentence_offsets[:-1])
+
+    def sentence_letter_counts(self) -> np.ndarray:
+        """Total word length of every sentence."""
+        return self.sentence_sums(self.lengths.astype(np.int64))
+
+    def sentence_counts_longer_than(self, min_length: float) -> np.ndarray:
+        """
+        Count the words strictly longer than `min_length` in every sentence.
+
+        Args:
+            min_length: Length threshold
+
+        Returns:
+            Array with one count per sentence
+        """
+        return self.sentence_sums((self.lengths > min_length).astype(np.intc))
@@ -0,0 +1,123 @@
+"""
+Shared system load snapshot.
+
+psutil calls cost syscalls; making them per WebSocket message or per health
+probe multiplies that cost by the number of clients. LoadSampler refreshes one
+immutable snapshot at a fixed interval in a background task, updates the
+system Prometheus gauges from it, and every reader just takes the latest one.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import psutil
+import structlog
+from prometheus_client import Gauge
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+SYSTEM_MEMORY = Gauge(
+    "system_memory_usage_bytes",
+    "Memory usage of the system",
+    ["type"]
+)
+SYSTEM_CPU = Gauge(
+    "system_cpu_usage_percent",
+    "CPU usage percentage",
+    ["cpu"]
+)
+
+
+@dataclass(frozen=True)
+class LoadSnapshot:
+    """System load at one point in time."""
+    timestamp: float
+    cpu_percent: float
+    per_cpu_percent: Tuple[float, ...]
+    memory_percent: float
+    memory_total: int
+    memory_available: int
+    memory_used: int
+    disk_percent: float
+
+
+def _sample() -> LoadSnapshot:
+    """Take a snapshot; CPU usage is measured since the previous call."""
+    per_cpu = tuple(psutil.cpu_percent(interval=None, percpu=True))
+    memory = psutil.virtual_memory()
+    return LoadSnapshot(
+        timestamp=time.time(),
+        cpu_percent=sum(per_cpu) / len(per_cpu) if per_cpu else 0.0,
+        per_cpu_percent=per_cpu,
+        memory_percent=memory.percent,
+        memory_total=memory.total,
+        memory_available=memory.available,
+        memory_used=memory.used,
+        disk_percent=psutil.disk_usage('/').percent
+    )
+
+
+class LoadSampler:
+    """Background task that refreshes the shared load snapshot."""
+
+    def __init__(self, interval: float = 1.0):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self._interval = interval
+        self._snapshot: Optional[LoadSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> LoadSnapshot:
+        """Latest snapshot; sampled on demand if the sampler has not run yet."""
+        if self._snapshot is None:
+            self._refresh()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        """Take a new snapshot and publish it to the gauges."""
+        snapshot = _sample()
+        self._snapshot = snapshot
+        if settings.ENABLE_METRICS:
+            SYSTEM_MEMORY.labels(type="total").set(snapshot.memory_total)
+            SYSTEM_MEMORY.labels(type="available").set(snapshot.memory_available)
+            SYSTEM_MEMORY.labels(type="used").set(snapshot.memory_used)
+            for i, cpu_percent in enumerate(snapshot.per_cpu_percent):
+                SYSTEM_CPU.labels(cpu=f"cpu{i}").set(cpu_percent)
+
+    async def start(self) -> None:
+        """Start sampling in the background."""
+        if self._task is not None:
+            return
+        self._refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning("System load sampling failed", error=str(e))
+
+
+# Shared sampler configured from settings
+load_sampler = LoadSampler(interval=settings.LOAD_SAMPLE_INTERVAL)
@@ -4,6 +4,11 @@ Optimized readability metrics implementations for LIX and RIX scores.
 from typing import Dict, List, Any
 from functools import lru_cache
 
+import numpy as np
+
+from app.services.length_profile import word_length_array
+from app.services.statistics import TextStatistics
+
 class LixMetric:
     """
     LIX (Läsbarhetsindex) readability metric.
@@ -44,11 +49,25 @@ class LixMetric:
         if not words or sentence_count == 0:
             return 0
             
-        word_count = len(words)
+        # Vectorized word length counting
+        long_words_count = int(np.count_nonzero(word_length_array(words) > self.LONG_WORD_THRESHOLD))
         
-        # Fast word length counting using generator expression and sum
-        # Avoid creating new lists with list comprehensions
-        long_words_count = sum(1 for word in words if len(word) > self.LONG_WORD_THRESHOLD)
+        return self.compute_from_counts(len(words), sentence_count, long_words_count)
+    
+    def compute_from_counts(self, word_count: int, sentence_count: int, long_words_count: int) -> float:
+        """
+        Calculate LIX score from precomputed counts.
+        
+        Args:
+            word_count: Number of words in the text
+            sentence_count: Number of sentences in the text
+            long_words_count: Number of words longer than LONG_WORD_THRESHOLD
+            
+        Returns:
+            LIX score
+        """
+        if word_count == 0 or sentence_count == 0:
+            return 0
         
         # Calculate average sentence length
         avg_sentence_length = word_count / sentence_count
@@ -61,6 +80,18 @@ class LixMetric:
         
         return round(lix_score, 1)
     
+    def compute_from_stats(self, stats: TextStatistics) -> float:
+        """
+        Calculate LIX score from a mergeable statistics record.
+        
+        Args:
+            stats: Statistics record for the text
+            
+        Returns:
+            LIX score
+        """
+        return self.compute_from_counts(stats.word_count, stats.sentence_count, stats.long_words_count)
+    
     def classify(self, score: float) -> Dict[str, Any]:
         """
         Classify a text based on its LIX score.
@@ -1,5 +1,10 @@
 from typing import Dict, List, Any
+
+import numpy as np
+
+from app.services.length_profile import word_length_array, long_words
 from app.services.metrics.base import BaseMetric
+from app.services.statistics import TextStatistics
 
 class RIXMetric(BaseMetric):
     """
@@ -35,7 +40,7 @@ class RIXMetric(BaseMetric):
         Returns:
             List of long words
         """
-        return [word for word in words if len(word) > min_length]
+        return long_words(words, min_length)
     
     def compute(self, words: List[str], sentence_count: int) -> float:
         """
@@ -52,13 +57,41 @@ class RIXMetric(BaseMetric):
             return 0.0
         
         # Count long words (7+ characters)
-        long_words = self.get_long_words(words)
+        long_words_count = int(np.count_nonzero(word_length_array(words) > 6.9))
+        
+        return self.compute_from_counts(long_words_count, sentence_count)
+    
+    def compute_from_counts(self, long_words_count: int, sentence_count: int) -> float:
+        """
+        Calculate RIX score from precomputed counts.
+        
+        Args:
+            long_words_count: Number of words with 7+ characters
+            sentence_count: Number of sentences
+            
+        Returns:
+            RIX score (float)
+        """
+        if sentence_count == 0:
+            return 0.0
         
         # Calculate RIX
-        rix_score = len(long_words) / sentence_count
+        rix_score = long_words_count / sentence_count
         
         return round(rix_score, 2)
     
+    def compute_from_stats(self, stats: TextStatistics) -> float:
+        """
+        Calculate RIX score from a mergeable statistics record.
+        
+        Args:
+            stats: Statistics record for the text
+            
+        Returns:
+            RIX score (float)
+        """
+        return self.compute_from_counts(stats.long_words_count, stats.sentence_count)
+    
     def classify(self, score: float) -> Dict[str, Any]:
         """
         Classify text based on RIX score with detailed information.
@@ -2,11 +2,13 @@
 Optimized Readability Service for fast text analysis.
 Calculates LIX and RIX readability scores with performance optimizations.
 """
-import re
 from typing import Dict, Any, List, Optional, Tuple
-from functools import lru_cache
 
 from app.services.metrics import LixMetric, RixMetric
+from app.services.tokenizer import CachingTokenizer, TokenStream
+from app.services.statistics import TextStatistics
+from app.services.content_cache import shared_content_cache, parse_cache
+from app.utils.hashing import content_hash
 
 class ReadabilityService:
     """
@@ -14,23 +16,20 @@ class ReadabilityService:
     Optimized for fast calculation and real-time usage.
     """
     
-    # Pre-compile regex patterns for better performance
-    _SENTENCE_PATTERN = re.compile(r'[.!?]+["»]?|\n\n')
-    _WORD_PATTERN = re.compile(r'\w+')
+    # Single-pass tokenizer backed by the memory-budgeted parse cache
+    _tokenizer = CachingTokenizer(parse_cache)
     
     # Initialize metrics once as class variables
     _lix_metric = LixMetric()
     _rix_metric = RixMetric()
     
-    # Result cache (limited to 1000 entries to manage memory)
-    _result_cache = {}
-    _MAX_CACHE_SIZE = 1000
+    # Shared, byte-bounded LRU cache keyed by content hash
+    _result_cache = shared_content_cache
     
     # Define readability categories for consistent reference
     _CATEGORIES = ['svært lett', 'lett', 'middels', 'vanskelig', 'svært vanskelig']
     
     @classmethod
-    @lru_cache(maxsize=256)  # Cache small, common texts
     def _extract_words(cls, text: str) -> List[str]:
         """
         Extract words from text using regex for better performance.
@@ -41,10 +40,9 @@ class ReadabilityService:
         Returns:
             List of words
         """
-        return cls._WORD_PATTERN.findall(text)
+        return cls._tokenizer.tokenize(text).words()
     
     @classmethod
-    @lru_cache(maxsize=256)  # Cache sentence count for small texts
     def _get_sentence_count(cls, text: str) -> int:
         """
         Count sentences in text using optimized regex.
@@ -59,45 +57,43 @@ class ReadabilityService:
         if not text or text.isspace():
             return 0
             
-        # Split by sentence-ending punctuation
-        sentences = cls._SENTENCE_PATTERN.split(text)
-        
-        # Filter out empty strings
-        sentences = [s for s in sentences if s and not s.isspace()]
-        
         # Ensure we have at least one sentence
-        return max(1, len(sentences))
+        return max(1, cls._tokenizer.tokenize(text).sentence_count)
     
     @classmethod
-    def _get_cache_key(cls, text: str) -> str:
+    def _get_cache_key(cls, text: str, digest: Optional[str] = None) -> str:
         """
-        Generate a compact cache key for a text.
+        Generate a cache key from the full content of a text.
         
         Args:
             text: The text to generate a key for
+            digest: Optional precomputed content hash of the text
             
         Returns:
             A cache key string
         """
-        # Use first 100 chars + length as a simple but effective cache key
-        text_preview = text[:100].strip()
-        return f"{text_preview}_{len(text)}"
+        return f"readability:{digest or content_hash(text)}"
     
     @classmethod
-    def get_readability(cls, text: str) -> Dict[str, Any]:
+    def get_readability(cls, text: str, stream: Optional[TokenStream] = None) -> Dict[str, Any]:
         """
         Get readability metrics for a text.
         
         Args:
             text: Text to analyze
+            stream: Optional pre-computed token stream for the same text,
+                    so callers that already tokenized it don't pay twice
             
         Returns:
             Dictionary with LIX and RIX scores and classifications
         """
-        # Check cache first
-        cache_key = cls._get_cache_key(text)
-        if cache_key in cls._result_cache:
-            return cls._result_cache[cache_key]
+        # Check cache first; hand out a shallow copy since callers attach
+        # request-specific keys such as "recommendations"
+        digest = content_hash(text)
+        cache_key = cls._get_cache_key(text, digest)
+        cached = cls._result_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
             
         # Handle empty text
         if not text or text.isspace():
@@ -115,23 +111,56 @@ class ReadabilityService:
                 "combined_description": "Teksten er for kort for analyse."
             }
             
-        # Extract words and count sentences in one pass when possible
-        words = cls._extract_words(text)
-        sentence_count = cls._get_sentence_count(text)
+        # Count words, long words and sentences from one tokenizer pass
+        if stream is None:
+            stream = cls._tokenizer.tokenize(text, digest)
+        profile = stream.length_profile()
+        long_words_count = profile.count_longer_than(cls._lix_metric.LONG_WORD_THRESHOLD)
+        result = cls.build_result(profile.word_count, max(1, stream.sentence_count), long_words_count)
+        
+        # Cache result; the LRU tier evicts by byte budget
+        cls._result_cache.set(cache_key, result)
+        return dict(result)
+    
+    @classmethod
+    def build_result_from_stats(cls, stats: TextStatistics) -> Dict[str, Any]:
+        """
+        Build a readability result from a mergeable statistics record, such as
+        one merged from the chunks of a document analyzed in parallel.
         
+        Args:
+            stats: Statistics record for the whole text
+            
+        Returns:
+            Dictionary with LIX and RIX scores and classifications
+        """
+        return cls.build_result(stats.word_count, max(1, stats.sentence_count), stats.long_words_count)
+    
+    @classmethod
+    def build_result(cls, word_count: int, sentence_count: int, long_words_count: int) -> Dict[str, Any]:
+        """
+        Build a readability result from precomputed counts.
+        
+        Used by get_readability and by callers that maintain running counts,
+        such as the incremental analyzer behind the WebSocket endpoint.
+        
+        Args:
+            word_count: Number of words in the text
+            sentence_count: Number of sentences (at least 1 for non-empty text)
+            long_words_count: Number of words with more than 6 characters
+            
+        Returns:
+            Dictionary with LIX and RIX scores and classifications
+        """
         # Calculate LIX score
-        lix_score = cls._lix_metric.compute(words, sentence_count)
+        lix_score = cls._lix_metric.compute_from_counts(word_count, sentence_count, long_words_count)
         lix_classification = cls._lix_metric.classify(lix_score)
         
         # Calculate RIX score
-        rix_score = cls._rix_metric.compute(words, sentence_count)
+        rix_score = cls._rix_metric.compute_from_counts(long_words_count, sentence_count)
         rix_classification = cls._rix_metric.classify(rix_score)
         
         # Create text statistics for both metrics to use
-        word_count = len(words)
-        long_words = [word for word in words if len(word) > 6]
-        long_words_count = len(long_words)
-        
         text_statistics = {
             "word_count": word_count,
             "sentence_count": sentence_count,
@@ -146,7 +175,7 @@ class ReadabilityService:
         )
         
         # Build complete result
-        result = {
+        return {
             "lix": {
                 "score": lix_score,
                 "category": lix_classification["category"],
@@ -164,16 +193,6 @@ class ReadabilityService:
             "combined_description": combined_description,
             "text_statistics": text_statistics
         }
-        
-        # Cache result
-        if len(cls._result_cache) >= cls._MAX_CACHE_SIZE:
-            # Simple cache eviction: clear oldest 25% of entries when full
-            keys = list(cls._result_cache.keys())
-            for key in keys[:cls._MAX_CACHE_SIZE // 4]:
-                cls._result_cache.pop(key, None)
-        
-        cls._result_cache[cache_key] = result
-        return result
     
     @staticmethod
     def _generate_combined_description(
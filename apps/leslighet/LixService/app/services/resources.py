@@ -0,0 +1,199 @@
+"""
+Shared network clients for LixService.
+
+All Redis access goes through the pools defined here: `redis_pool` for text
+values (job records, pubsub-style JSON), `redis_binary_pool` for codec-encoded
+cache entries and `pubsub_pool` for the Pub/Sub adapter, which may point at a
+dedicated Redis. The pools are blocking: when all connections are in use,
+callers wait up to REDIS_POOL_TIMEOUT seconds instead of failing.
+
+The ResourceManager is started and stopped by the application lifespan. It
+warms the pools up so the first requests do not pay connection setup,
+connects the Pub/Sub and AMQP clients, reports their status for health checks
+without reconnecting, and closes everything on shutdown. Pool utilization is
+exported to Prometheus at scrape time.
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+import redis.asyncio as redis
+import structlog
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+def _make_pool(host: str, port: int, db: int, password: str, decode_responses: bool,
+               max_connections: int, socket_timeout: Optional[float] = 2.0) -> redis.BlockingConnectionPool:
+    """Create a blocking Redis connection pool with the service's socket options."""
+    return redis.BlockingConnectionPool(
+        host=host,
+        port=port,
+        db=db,
+        password=password or None,
+        decode_responses=decode_responses,
+        max_connections=max_connections,
+        timeout=settings.REDIS_POOL_TIMEOUT,  # Wait this long for a free connection
+        socket_timeout=socket_timeout,  # Reduce timeout for faster failure detection
+        socket_keepalive=True,  # Keep connections alive
+        health_check_interval=30  # Check connection health periodically
+    )
+
+
+# Text values: job records, task status, pubsub-style JSON
+redis_pool = _make_pool(
+    settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_DB, settings.REDIS_PASSWORD,
+    decode_responses=True, max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+
+# Codec-encoded cache entries, which are bytes rather than text
+redis_binary_pool = _make_pool(
+    settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_DB, settings.REDIS_PASSWORD,
+    decode_responses=False, max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+
+# Pub/Sub traffic; a dedicated Redis if PUBSUB_REDIS_* is configured
+pubsub_pool = _make_pool(
+    settings.PUBSUB_REDIS_HOST, settings.PUBSUB_REDIS_PORT, settings.PUBSUB_REDIS_DB,
+    settings.PUBSUB_REDIS_PASSWORD,
+    decode_responses=True, max_connections=settings.PUBSUB_MAX_CONNECTIONS
+)
+
+POOLS: Dict[str, redis.ConnectionPool] = {
+    "text": redis_pool,
+    "binary": redis_binary_pool,
+    "pubsub": pubsub_pool,
+}
+
+
+def _pool_usage(pool: redis.ConnectionPool) -> Dict[str, int]:
+    """Count in-use and open idle connections of a pool."""
+    idle = sum(1 for conn in pool._available_connections if conn.is_connected)
+    return {
+        "in_use": len(pool._in_use_connections),
+        "idle": idle,
+        "max": pool.max_connections
+    }
+
+
+class _PoolCollector:
+    """Reports connection pool utilization when Prometheus scrapes."""
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            "redis_pool_connections",
+            "Redis pool connections by state",
+            labels=["pool", "state"]
+        )
+        utilization = GaugeMetricFamily(
+            "redis_pool_utilization_ratio",
+            "Share of the pool's maximum connections in use",
+            labels=["pool"]
+        )
+        for name, pool in POOLS.items():
+            usage = _pool_usage(pool)
+            for state, count in usage.items():
+                connections.add_metric([name, state], count)
+            utilization.add_metric([name], usage["in_use"] / usage["max"] if usage["max"] else 0)
+        yield connections
+        yield utilization
+
+
+REGISTRY.register(_PoolCollector())
+
+
+class ResourceManager:
+    """Owns the lifecycle of the service's Redis pools, Pub/Sub and AMQP clients."""
+
+    def __init__(self, warmup_connections: int = 4):
+        """
+        Initialize the manager.
+
+        Args:
+            warmup_connections: Connections opened per pool at startup
+        """
+        self._warmup_connections = warmup_connections
+        self._started = False
+
+    @staticmethod
+    async def _warm_up(name: str, pool: redis.ConnectionPool, count: int) -> int:
+        """Open up to `count` pool connections by pinging on them concurrently."""
+        count = min(count, pool.max_connections)
+
+        async def ping():
+            async with redis.Redis(connection_pool=pool) as r:
+                await r.ping()
+
+        results = await asyncio.gather(*(ping() for _ in range(count)), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("Redis pool warm-up failed", pool=name, error=str(failures[0]))
+        return count - len(failures)
+
+    async def start(self) -> None:
+        """Warm up the Redis pools and connect the Pub/Sub and AMQP clients."""
+        if self._started:
+            return
+        # Imported here: the adapters take their pools from this module
+        from app.adapters.redis_pubsub_adapter import redis_pubsub
+        from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+
+        warmed = await asyncio.gather(*(
+            self._warm_up(name, pool, self._warmup_connections) for name, pool in POOLS.items()
+        ))
+        logger.info("Redis pools warmed up", connections=dict(zip(POOLS, warmed)))
+
+        # Failures are logged by the adapters; the service runs without them
+        pubsub_connected, amqp_connected = await asyncio.gather(
+            redis_pubsub.connect(), rabbitmq_adapter.connect()
+        )
+        logger.info("Messaging clients started", pubsub=pubsub_connected, rabbitmq=amqp_connected)
+        self._started = True
+
+    async def stop(self) -> None:
+        """Close the Pub/Sub and AMQP clients and disconnect all pools."""
+        from app.adapters.redis_pubsub_adapter import redis_pubsub
+        from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+
+        await redis_pubsub.close()
+        await rabbitmq_adapter.close()
+        for name, pool in POOLS.items():
+            try:
+                await pool.disconnect()
+            except Exception as e:
+                logger.warning("Error closing Redis pool", pool=name, error=str(e))
+        self._started = False
+        logger.info("Shared resources closed")
+
+    async def redis_status(self) -> bool:
+        """Ping Redis on a pooled connection."""
+        try:
+            async with redis.Redis(connection_pool=redis_pool) as r:
+                return bool(await r.ping())
+        except Exception as e:
+            logger.warning("Redis health check failed", error=str(e))
+            return False
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Connection status of the messaging clients and pool usage, without
+        opening new connections.
+
+        Returns:
+            Dictionary with "pubsub", "rabbitmq" and "pools" entries
+        """
+        from app.adapters.redis_pubsub_adapter import redis_pubsub
+        from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+
+        return {
+            "pubsub": redis_pubsub.connected,
+            "rabbitmq": rabbitmq_adapter.connected,
+            "pools": {name: _pool_usage(pool) for name, pool in POOLS.items()}
+        }
+
+
+# Shared manager, started by the application lifespan
+resources = ResourceManager(warmup_connections=settings.REDIS_POOL_WARMUP)
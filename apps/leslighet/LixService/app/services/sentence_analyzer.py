@@ -4,6 +4,10 @@ Advanced sentence analyzer with detailed metrics and improvement suggestions.
 import re
 from typing import Dict, List, Any, Optional
 
+import numpy as np
+
+from app.services.length_profile import word_length_array
+
 class SentenceAnalyzer:
     """
     Advanced sentence analyzer with detailed metrics and improvement suggestions.
@@ -41,12 +45,16 @@ class SentenceAnalyzer:
         if not words:
             return 0
             
+        long_words_count = int(np.count_nonzero(word_length_array(words) > 6.9))
+        return self._lix_from_counts(len(words), long_words_count)
+    
+    def _lix_from_counts(self, word_count: int, long_words_count: int) -> float:
+        """Calculate the simplified single-sentence LIX score from counts."""
         # Calculate percentage of long words
-        long_words = [word for word in words if len(word) > 6.9]
-        long_words_percentage = (len(long_words) / len(words)) * 100
+        long_words_percentage = (long_words_count / word_count) * 100
         
         # For single sentences, we compute a simplified LIX
-        lix_score = len(words) + long_words_percentage
+        lix_score = word_count + long_words_percentage
         
         return round(lix_score, 2)
     
@@ -66,6 +74,34 @@ class SentenceAnalyzer:
         if words is None:
             words = self._split_words(sentence)
         
+        lengths = word_length_array(words)
+        return self.analyze_sentence_counts(
+            sentence, sentence_index, words,
+            long_words_count=int(np.count_nonzero(lengths > 6.9)),  # 7+ characters
+            very_long_words_count=int(np.count_nonzero(lengths > 9.9)),  # 10+ characters
+            letter_count=int(lengths.sum())
+        )
+    
+    def analyze_sentence_counts(self, sentence: str, sentence_index: int, words: List[str],
+                                long_words_count: int, very_long_words_count: int,
+                                letter_count: int) -> Dict[str, Any]:
+        """
+        Analyze a single sentence from precomputed word length counts.
+        
+        Used by callers that compute the counts for all sentences of a
+        document at once (see app.services.length_profile).
+        
+        Args:
+            sentence: The sentence to analyze
+            sentence_index: The index of the sentence in the text
+            words: Words of the sentence
+            long_words_count: Number of words with 7+ characters
+            very_long_words_count: Number of words with 10+ characters
+            letter_count: Total length of the words
+            
+        Returns:
+            Dictionary with analysis results
+        """
         # Basic metrics
         word_count = len(words)
         
@@ -84,21 +120,13 @@ class SentenceAnalyzer:
                 "improvement_tips": []
             }
         
-        # Get long words
-        long_words = [word for word in words if len(word) > 6.9]  # 7+ characters
-        long_words_count = len(long_words)
-        long_words_percentage = (long_words_count / word_count) * 100 if word_count > 0 else 0
-        
-        # Get very long words
-        very_long_words = [word for word in words if len(word) > 9.9]  # 10+ characters
-        very_long_words_count = len(very_long_words)
+        long_words_percentage = (long_words_count / word_count) * 100
         
         # Calculate average word length
-        word_lengths = [len(word) for word in words]
-        avg_word_length = sum(word_lengths) / word_count if word_count > 0 else 0
+        avg_word_length = letter_count / word_count
         
         # Calculate LIX score for this sentence
-        lix_score = self._compute_lix_score(words, 1)  # 1 sentence
+        lix_score = self._lix_from_counts(word_count, long_words_count)
         
         # Determine complexity level
         complexity_level = "enkel"
@@ -150,8 +178,9 @@ class SentenceAnalyzer:
             improvement_tips.append("Erstatt lange ord med kortere synonymer")
             
             # Suggest replacements for very long words if any
-            if very_long_words:
-                improvement_tips.append(f"Vurder å erstatte: {', '.join(very_long_words[:3])}")
+            if very_long_words_count:
+                very_long_words = [word for word in words if len(word) > 9.9][:3]
+                improvement_tips.append(f"Vurder å erstatte: {', '.join(very_long_words)}")
         
         # Return complete analysis
         return {
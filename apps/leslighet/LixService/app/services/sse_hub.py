@@ -0,0 +1,253 @@
+"""
+In-process fan-out of server-sent events.
+
+Each pod consumes the bus once, through its own exclusive queue, and hands
+every message to the SSEHub, which serializes it once and broadcasts it to all
+connected SSE clients. Publishing never waits for a client: each client has a
+bounded ring buffer, and when a client reads slower than events arrive, its
+oldest unread events are dropped and it is told how many it missed.
+
+Events are numbered per hub, and the hub keeps the most recent ones, so a
+client that reconnects with a Last-Event-ID header receives the events it
+missed, provided they are still kept and it reconnects to the same pod.
+
+If the bus is unavailable when the hub starts, subscribing is retried in the
+background with exponential backoff; until it succeeds the hub reports that
+it is not consuming.
+"""
+import asyncio
+import json
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+SSE_HUB_CLIENTS = Gauge(
+    "sse_hub_clients",
+    "SSE clients subscribed to the hub"
+)
+SSE_HUB_EVENTS = Counter(
+    "sse_hub_events_total",
+    "Events broadcast by the hub"
+)
+SSE_HUB_DROPPED = Counter(
+    "sse_hub_dropped_total",
+    "Events dropped from the buffers of slow SSE clients"
+)
+
+# (event id, event name, serialized data)
+Event = Tuple[str, str, str]
+
+
+class SSEClient:
+    """One subscriber's ring buffer of pending events."""
+
+    def __init__(self, buffer_size: int):
+        """
+        Initialize the client.
+
+        Args:
+            buffer_size: Maximum unread events; older ones are dropped
+        """
+        self._buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+        self._unreported = 0
+
+    def push(self, event: Event) -> None:
+        """Add an event, dropping the oldest unread one if the buffer is full."""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.mark_missed(1)
+            SSE_HUB_DROPPED.inc()
+        self._buffer.append(event)
+        self._ready.set()
+
+    def mark_missed(self, count: int) -> None:
+        """Record events the client will not receive; it is told before its next event."""
+        self.dropped += count
+        self._unreported += count
+
+    def close(self) -> None:
+        """End the client's event stream once its buffer is drained."""
+        self._closed = True
+        self._ready.set()
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, str]]:
+        """Yield events in the form EventSourceResponse expects."""
+        while True:
+            if not self._buffer:
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            if self._unreported:
+                missed, self._unreported = self._unreported, 0
+                yield {"event": "dropped", "data": json.dumps({"missed": missed})}
+            event_id, name, data = self._buffer.popleft()
+            yield {"event": name, "id": event_id, "data": data}
+
+
+class SSEHub:
+    """Broadcasts events to SSE clients through bounded per-client buffers."""
+
+    def __init__(self, buffer_size: int = 256, history_size: int = 1024,
+                 retry_initial: float = 1.0, retry_max: float = 30.0):
+        """
+        Initialize the hub.
+
+        Args:
+            buffer_size: Unread events kept per client
+            history_size: Recent events kept for clients that resume with
+                          Last-Event-ID
+            retry_initial: Seconds before the first retry of a failed
+                           subscription; doubled after every failure
+            retry_max: Longest wait between subscription retries
+        """
+        self._buffer_size = buffer_size
+        self._retry_initial = retry_initial
+        self._retry_max = retry_max
+        self._retry_task: Optional[asyncio.Task] = None
+        self._history: Deque[Tuple[int, Event]] = deque(maxlen=history_size)
+        self._clients: Set[SSEClient] = set()
+        # Event IDs are only meaningful to the hub that issued them
+        self._epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._source: Optional[Any] = None
+
+    async def start(self, exchange_name: str, routing_key: str) -> None:
+        """
+        Consume the bus messages for SSE clients, once for this pod.
+
+        Subscribes right away; if the bus is unavailable, keeps retrying in
+        the background.
+
+        Args:
+            exchange_name: Exchange the messages are published to
+            routing_key: Routing key of the messages
+        """
+        if await self._subscribe(exchange_name, routing_key):
+            return
+        logger.warning("SSE hub has no bus consumer, retrying", exchange=exchange_name, routing_key=routing_key)
+        self._retry_task = asyncio.create_task(self._retry(exchange_name, routing_key))
+
+    async def _subscribe(self, exchange_name: str, routing_key: str) -> bool:
+        """Subscribe to the bus messages; False if the bus is unavailable."""
+        from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+
+        async def on_message(message: Dict[str, Any]) -> None:
+            self.publish("analysis", message)
+
+        try:
+            self._source = await rabbitmq_adapter.subscribe_broadcast(exchange_name, routing_key, on_message)
+        except Exception as e:
+            logger.warning("SSE hub subscription failed", error=str(e))
+        return self._source is not None
+
+    async def _retry(self, exchange_name: str, routing_key: str) -> None:
+        """Retry subscribing with exponential backoff until it succeeds."""
+        delay = self._retry_initial
+        while True:
+            await asyncio.sleep(delay)
+            if await self._subscribe(exchange_name, routing_key):
+                logger.info("SSE hub consuming after retry", exchange=exchange_name, routing_key=routing_key)
+                self._retry_task = None
+                return
+            delay = min(delay * 2, self._retry_max)
+
+    @property
+    def consuming(self) -> bool:
+        """Whether the hub receives bus messages."""
+        return self._source is not None
+
+    async def stop(self) -> None:
+        """Stop consuming and end every client's stream."""
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            await asyncio.gather(self._retry_task, return_exceptions=True)
+            self._retry_task = None
+        if self._source is not None:
+            from app.adapters.rabbitmq_adapter import rabbitmq_adapter
+            await rabbitmq_adapter.unsubscribe_broadcast(self._source)
+            self._source = None
+        for client in self._clients:
+            client.close()
+
+    def publish(self, name: str, data: Any) -> None:
+        """
+        Broadcast an event to every client; never waits.
+
+        Args:
+            name: Event name
+            data: JSON-serializable event data, serialized once for all clients
+        """
+        self._sequence += 1
+        event = (f"{self._epoch}:{self._sequence}", name, json.dumps(data))
+        self._history.append((self._sequence, event))
+        SSE_HUB_EVENTS.inc()
+        for client in self._clients:
+            client.push(event)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> SSEClient:
+        """
+        Register a client, replaying the events after last_event_id.
+
+        Args:
+            last_event_id: Last-Event-ID header of a reconnecting client
+
+        Returns:
+            The client; iterate over it for its events, and unsubscribe it
+            when done
+        """
+        client = SSEClient(self._buffer_size)
+        if last_event_id:
+            self._replay(client, last_event_id)
+        self._clients.add(client)
+        SSE_HUB_CLIENTS.set(len(self._clients))
+        return client
+
+    def _replay(self, client: SSEClient, last_event_id: str) -> None:
+        """Queue the kept events that follow last_event_id."""
+        epoch, _, sequence = last_event_id.partition(":")
+        if epoch != self._epoch or not sequence.isdigit():
+            # Issued by another pod or an earlier process
+            return
+        last = int(sequence)
+        oldest = self._history[0][0] if self._history else self._sequence + 1
+        if last + 1 < oldest:
+            # Part of the gap is no longer kept
+            client.mark_missed(oldest - last - 1)
+        for number, event in self._history:
+            if number > last:
+                client.push(event)
+
+    def unsubscribe(self, client: SSEClient) -> None:
+        """Remove a client."""
+        self._clients.discard(client)
+        SSE_HUB_CLIENTS.set(len(self._clients))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client, event and drop counts."""
+        return {
+            "clients": len(self._clients),
+            "events": self._sequence,
+            "history": len(self._history),
+            "dropped": sum(client.dropped for client in self._clients),
+            "consuming": self.consuming
+        }
+
+
+# Shared hub configured from settings
+sse_hub = SSEHub(
+    buffer_size=settings.SSE_BUFFER_SIZE,
+    history_size=settings.SSE_HISTORY_SIZE,
+    retry_initial=settings.SSE_SUBSCRIBE_RETRY_INITIAL,
+    retry_max=settings.SSE_SUBSCRIBE_RETRY_MAX
+)
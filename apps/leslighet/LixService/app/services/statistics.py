@@ -0,0 +1,437 @@
+"""
+Mergeable text statistics.
+
+A TextStatistics record holds everything the readability metrics and the
+statistics block of an analysis need (counts, length histograms, word
+frequencies and syllable totals) without keeping the words themselves.
+Records for consecutive pieces of a document can be merged, so chunks
+analyzed in parallel, streamed input or edited paragraphs combine into
+exactly the statistics of the whole document.
+"""
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable
+
+from app.services.tokenizer import TokenStream, Tokenizer
+
+# Same paragraph break definition as the tokenizer
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Anything the tokenizer treats as the end of a sentence: a terminator or a
+# paragraph break
+_SENTENCE_CLOSE = re.compile(r'[.!?]+["»]?(?=[\s)\]]|$)|\n\s*\n')
+
+# Sentence-safe split points: right after a paragraph break, or right after a
+# sentence terminator that the tokenizer would accept (followed by whitespace
+# or a closing bracket). No sentence or word can span such a point, so the
+# pieces on either side can be analyzed separately and merged.
+SPLIT_POINT = re.compile(r'\n\s*\n|[.!?]+["»]?(?=[\s)\]])')
+
+# Word length thresholds shared with the readability metrics
+LONG_WORD_LENGTH = 6
+VERY_LONG_WORD_LENGTH = 10
+
+# Words with at least this many syllables count as complex
+COMPLEX_WORD_SYLLABLES = 3
+
+
+def count_syllables(word: str, language: str = 'nb') -> int:
+    """
+    Approximate the number of syllables in a word by counting vowel groups.
+
+    Args:
+        word: Word to count syllables for
+        language: Language code; 'nb' uses Norwegian vowels, anything else
+                  English rules
+
+    Returns:
+        Number of syllables, at least 1
+    """
+    word = word.lower()
+    if language == 'nb':
+        vowels = 'aeiouyæøå'
+    else:
+        # A silent trailing e does not form a syllable in English
+        if word.endswith('e'):
+            word = word[:-1]
+        vowels = 'aeiouy'
+
+    count = 0
+    after_vowel = False
+    for char in word:
+        is_vowel = char in vowels
+        if is_vowel and not after_vowel:
+            count += 1
+        after_vowel = is_vowel
+    return max(1, count)
+
+
+def _newlines(whitespace: str) -> int:
+    """Number of newlines in a whitespace run, capped at the two that form a break."""
+    return min(2, whitespace.count('\n'))
+
+
+class TextStatistics:
+    """
+    Compact, mergeable statistics for a text or a piece of one.
+
+    A document may be split anywhere a word does not span the split and every
+    piece after the first starts with whitespace, or right after a paragraph
+    break or sentence terminator. Sentences and paragraphs that span pieces,
+    and paragraph breaks whose whitespace is split between them, are joined
+    on merge.
+    """
+
+    __slots__ = (
+        'word_count', 'letter_count', 'long_words_count', 'very_long_words_count',
+        'sentence_count', 'paragraph_count', 'syllable_count', 'complex_word_count',
+        'char_count', 'word_lengths', 'sentence_lengths', 'frequencies',
+        'leading_break', 'open_paragraph', 'leading_close', 'open_sentence',
+        'first_sentence_length', 'last_sentence_length',
+        'leading_space', 'trailing_space', 'leading_newlines', 'trailing_newlines'
+    )
+
+    def __init__(self):
+        self.word_count = 0
+        self.letter_count = 0
+        self.long_words_count = 0
+        self.very_long_words_count = 0
+        self.sentence_count = 0
+        self.paragraph_count = 0
+        self.syllable_count = 0
+        self.complex_word_count = 0
+        self.char_count = 0
+        # Histograms keyed by length
+        self.word_lengths: Counter = Counter()
+        self.sentence_lengths: Counter = Counter()
+        self.frequencies: Counter = Counter()
+        # A paragraph break occurs before the first word (or anywhere, if no words)
+        self.leading_break = False
+        # The last paragraph is not closed by a paragraph break
+        self.open_paragraph = False
+        # A sentence terminator or paragraph break occurs before the first word
+        # (or anywhere, if no words)
+        self.leading_close = False
+        # The last sentence is not closed by a terminator or paragraph break
+        self.open_sentence = False
+        # Word counts of the first and last sentence, for joining sentences
+        self.first_sentence_length = 0
+        self.last_sentence_length = 0
+        # Leading and trailing whitespace (the whole piece if it is blank),
+        # for stripped length and paragraph breaks split between pieces
+        self.leading_space = 0
+        self.trailing_space = 0
+        self.leading_newlines = 0
+        self.trailing_newlines = 0
+
+    @classmethod
+    def from_stream(cls, stream: TokenStream, language: str = 'nb') -> 'TextStatistics':
+        """
+        Collect statistics from a token stream.
+
+        Args:
+            stream: Token stream of the text or piece
+            language: Language code used for syllable counting
+
+        Returns:
+            Statistics record for the stream
+        """
+        stats = cls()
+        words = stream.words()
+        profile = stream.length_profile()
+
+        stats.word_count = profile.word_count
+        stats.letter_count = profile.letter_count()
+        stats.long_words_count = profile.count_longer_than(LONG_WORD_LENGTH)
+        stats.very_long_words_count = profile.count_longer_than(VERY_LONG_WORD_LENGTH)
+        stats.sentence_count = stream.sentence_count
+        stats.paragraph_count = stream.paragraph_count
+        stats.word_lengths = profile.length_histogram()
+        stats.sentence_lengths = profile.sentence_length_histogram()
+        stats.frequencies = Counter(words)
+
+        # Syllables depend only on the word, so count each distinct word once
+        for word, occurrences in stats.frequencies.items():
+            syllables = count_syllables(word, language)
+            stats.syllable_count += syllables * occurrences
+            if syllables >= COMPLEX_WORD_SYLLABLES:
+                stats.complex_word_count += occurrences
+
+        text = stream.text
+        stats.char_count = len(text)
+        stats.leading_space = len(text) - len(text.lstrip())
+        if stats.leading_space == len(text):
+            stats.trailing_space = len(text)
+        else:
+            stats.trailing_space = len(text) - len(text.rstrip())
+        stats.leading_newlines = _newlines(text[:stats.leading_space])
+        stats.trailing_newlines = _newlines(text[len(text) - stats.trailing_space:])
+
+        if words:
+            first_word, last_word = stream.word_starts[0], stream.word_ends[-1]
+            stats.leading_break = _PARAGRAPH_BREAK.search(text, 0, first_word) is not None
+            stats.open_paragraph = _PARAGRAPH_BREAK.search(text, last_word) is None
+            close = _SENTENCE_CLOSE.search(text)
+            stats.leading_close = close is not None and close.start() < first_word
+            stats.open_sentence = _SENTENCE_CLOSE.search(text, last_word) is None
+            offsets = profile.sentence_offsets
+            stats.first_sentence_length = int(offsets[1] - offsets[0])
+            stats.last_sentence_length = int(offsets[-1] - offsets[-2])
+        else:
+            stats.leading_break = _PARAGRAPH_BREAK.search(text) is not None
+            stats.leading_close = _SENTENCE_CLOSE.search(text) is not None
+        return stats
+
+    @classmethod
+    def from_text(cls, text: str, language: str = 'nb') -> 'TextStatistics':
+        """
+        Tokenize a text with the shared caching tokenizer and collect its statistics.
+
+        Args:
+            text: Text or piece of a text
+            language: Language code used for syllable counting
+
+        Returns:
+            Statistics record for the text
+        """
+        # Imported here to keep this module free of service dependencies
+        from app.services.factory import get_tokenizer
+
+        return cls.from_stream(get_tokenizer().tokenize(text), language)
+
+    @property
+    def stripped_char_count(self) -> int:
+        """Number of characters without leading and trailing whitespace."""
+        if self.leading_space == self.char_count:
+            return 0
+        return self.char_count - self.leading_space - self.trailing_space
+
+    def merge(self, other: 'TextStatistics') -> 'TextStatistics':
+        """
+        Combine with the statistics of the piece that directly follows this one.
+
+        Merging is associative, so pieces can be combined in any grouping as
+        long as their order is kept.
+
+        Args:
+            other: Statistics of the following piece
+
+        Returns:
+            New record covering both pieces
+        """
+        merged = TextStatistics()
+        merged.word_count = self.word_count + other.word_count
+        merged.letter_count = self.letter_count + other.letter_count
+        merged.long_words_count = self.long_words_count + other.long_words_count
+        merged.very_long_words_count = self.very_long_words_count + other.very_long_words_count
+        merged.sentence_count = self.sentence_count + other.sentence_count
+        merged.paragraph_count = self.paragraph_count + other.paragraph_count
+        merged.syllable_count = self.syllable_count + other.syllable_count
+        merged.complex_word_count = self.complex_word_count + other.complex_word_count
+        merged.char_count = self.char_count + other.char_count
+        merged.word_lengths = self.word_lengths + other.word_lengths
+        merged.sentence_lengths = self.sentence_lengths + other.sentence_lengths
+        merged.frequencies = self.frequencies + other.frequencies
+
+        # Whitespace runs continue through the boundary; a blank piece is all run
+        self_blank = self.leading_space == self.char_count
+        other_blank = other.leading_space == other.char_count
+        merged.leading_space = self.char_count + other.leading_space if self_blank else self.leading_space
+        merged.trailing_space = other.char_count + self.trailing_space if other_blank else other.trailing_space
+        if self_blank:
+            merged.leading_newlines = min(2, self.leading_newlines + other.leading_newlines)
+        else:
+            merged.leading_newlines = self.leading_newlines
+        if other_blank:
+            merged.trailing_newlines = min(2, self.trailing_newlines + other.trailing_newlines)
+        else:
+            merged.trailing_newlines = other.trailing_newlines
+
+        # A paragraph break formed only by the newlines on both sides of the boundary
+        split_break = (self.trailing_newlines < 2 and other.leading_newlines < 2
+                       and self.trailing_newlines + other.leading_newlines >= 2)
+        other_breaks = other.leading_break or split_break
+        other_closes = other.leading_close or split_break
+
+        # A paragraph left open continues into the next piece unless a break intervenes
+        if self.open_paragraph and other.word_count and not other_breaks:
+            merged.paragraph_count -= 1
+
+        # Likewise a sentence left open continues unless it is closed first
+        merged.first_sentence_length = self.first_sentence_length if self.sentence_count else other.first_sentence_length
+        merged.last_sentence_length = other.last_sentence_length if other.sentence_count else self.last_sentence_length
+        if self.open_sentence and other.word_count and not other_closes:
+            joined = self.last_sentence_length + other.first_sentence_length
+            merged.sentence_count -= 1
+            for length in (self.last_sentence_length, other.first_sentence_length):
+                merged.sentence_lengths[length] -= 1
+                if not merged.sentence_lengths[length]:
+                    del merged.sentence_lengths[length]
+            merged.sentence_lengths[joined] += 1
+            if self.sentence_count == 1:
+                merged.first_sentence_length = joined
+            if other.sentence_count == 1:
+                merged.last_sentence_length = joined
+
+        if self.word_count:
+            merged.leading_break = self.leading_break
+            merged.leading_close = self.leading_close
+        else:
+            merged.leading_break = self.leading_break or other_breaks
+            merged.leading_close = self.leading_close or other_closes
+        if other.word_count:
+            merged.open_paragraph = other.open_paragraph
+            merged.open_sentence = other.open_sentence
+        else:
+            merged.open_paragraph = self.open_paragraph and not other_breaks
+            merged.open_sentence = self.open_sentence and not other_closes
+        return merged
+
+    @classmethod
+    def merge_all(cls, parts: Iterable['TextStatistics']) -> 'TextStatistics':
+        """
+        Merge the statistics of consecutive pieces in document order.
+
+        Args:
+            parts: Statistics records in document order
+
+        Returns:
+            Statistics for the whole document
+        """
+        result = cls()
+        for part in parts:
+            result = result.merge(part)
+        return result
+
+    def summary(self, detailed: bool = False, most_common: int = 15) -> Dict[str, Any]:
+        """
+        Build the statistics block used in analysis responses.
+
+        Args:
+            detailed: Include distributions, most common words and unique counts
+            most_common: Number of most common words to include when detailed
+
+        Returns:
+            Dictionary with the same keys as TextAnalysisService.analyze_text
+        """
+        # Imported here to keep this module free of service dependencies
+        from app.services.factory import get_lix_metric
+
+        words = self.word_count
+        sentences = self.sentence_count
+        statistics = {
+            "word_count": words,
+            "sentence_count": sentences,
+            "paragraph_count": self.paragraph_count,
+            "avg_word_length": round(self.letter_count / words, 2) if words else 0,
+            "avg_sentence_length": round(words / sentences, 2) if sentences else 0,
+            "long_words_percentage": round((self.long_words_count / words) * 100, 2) if words else 0,
+            "very_long_words_percentage": round((self.very_long_words_count / words) * 100, 2) if words else 0,
+            "readability_score": get_lix_metric().compute_from_stats(self),
+            "long_words_count": self.long_words_count
+        }
+        if detailed:
+            unique_words_count = len(self.frequencies)
+            statistics.update({
+                "word_length_distribution": dict(self.word_lengths),
+                "sentence_length_distribution": dict(self.sentence_lengths),
+                "most_common_words": self.frequencies.most_common(most_common),
+                "unique_words_count": unique_words_count,
+                "unique_words_percentage": round((unique_words_count / words) * 100, 2) if words else 0
+            })
+        return statistics
+
+
+def _last_space_run(text: str) -> int:
+    """Start of the last whitespace run in text, or 0 if there is none after the start."""
+    end = len(text)
+    while end and not text[end - 1].isspace():
+        end -= 1
+    while end and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+class StatisticsAccumulator:
+    """
+    Running statistics of a document that arrives in pieces.
+
+    Pieces may be split anywhere, even inside a word. Text up to the last
+    sentence-safe split point is analyzed once and merged into the running
+    record; the rest is held back until more text (or finish()) shows where
+    its sentence ends. The cost is linear in the document length, however
+    small the pieces.
+    """
+
+    def __init__(self, language: str = 'nb', max_pending: int = 0):
+        """
+        Initialize the accumulator.
+
+        Args:
+            language: Language code used for syllable counting
+            max_pending: Hold back at most about this many characters; an
+                         unfinished sentence that grows longer is analyzed up
+                         to its last whitespace instead. 0 for no limit
+        """
+        self._language = language
+        self._max_pending = max_pending
+        # Plain tokenizer: pieces are unique, so caching them would only
+        # churn the shared parse cache
+        self._tokenizer = Tokenizer()
+        self._record = TextStatistics()
+        self._pending = ''
+        self.analyzed_chars = 0
+
+    @property
+    def record(self) -> TextStatistics:
+        """Statistics of the text analyzed so far."""
+        return self._record
+
+    @property
+    def pending_chars(self) -> int:
+        """Number of characters held back until their sentence is complete."""
+        return len(self._pending)
+
+    def _analyze(self, text: str) -> None:
+        stream = self._tokenizer.tokenize(text)
+        self._record = self._record.merge(TextStatistics.from_stream(stream, self._language))
+        self.analyzed_chars += len(text)
+
+    def feed(self, text: str) -> int:
+        """
+        Add the next piece of the document.
+
+        Args:
+            text: Text that directly follows everything fed so far
+
+        Returns:
+            Number of characters analyzed by this call
+        """
+        buffer = self._pending + text
+        # Search only the new text (and the pending tail it may complete)
+        # for the last split point
+        cut = 0
+        for match in SPLIT_POINT.finditer(buffer, max(0, len(self._pending) - 2)):
+            cut = match.end()
+        if not cut and self._max_pending and len(buffer) > self._max_pending:
+            # Pieces that start with whitespace merge exactly as well, so a
+            # very long sentence is split between words rather than buffered
+            cut = _last_space_run(buffer)
+        if not cut:
+            self._pending = buffer
+            return 0
+        self._pending = buffer[cut:]
+        self._analyze(buffer[:cut])
+        return cut
+
+    def finish(self) -> int:
+        """
+        Analyze the text held back; call once the whole document was fed.
+
+        Returns:
+            Number of characters analyzed by this call
+        """
+        pending, self._pending = self._pending, ''
+        if pending:
+            self._analyze(pending)
+        return len(pending)
@@ -0,0 +1,392 @@
+"""
+Background analysis tasks for large texts.
+
+A task is identified by the content hash of its text and analysis options
+(see task_id_for), so the same text submitted again, by any client on any
+worker, joins the task that is running or already done instead of computing
+twice. Its record is a Redis hash (`analysis_task:{id}`) with the status,
+progress counters and, once completed, the result. Progress is written as
+single fields, never by rewriting the record.
+
+Every change of a task is published on a Redis channel. Each worker
+subscribes once and fans the events out to its local listeners (SSE streams),
+so a client can follow a task that runs on another worker instead of polling.
+Pub/Sub may lose messages, so listeners re-read the record when no event has
+arrived for a while.
+
+A running task refreshes its record with a heartbeat. A task whose worker
+stopped reporting is shown as failed, and submitting its text again starts
+it over.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import redis.asyncio as redis
+import structlog
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.services.resources import redis_pool
+from app.utils.hashing import content_hash
+from app.utils.latest_wins import LatestWinsScheduler
+
+logger = structlog.get_logger()
+
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+ANALYSIS_TASKS = Counter(
+    "analysis_tasks_total",
+    "Background analysis task submissions and outcomes",
+    ["outcome"]
+)
+ANALYSIS_TASKS_ACTIVE = Gauge(
+    "analysis_tasks_active",
+    "Background analysis tasks running on this worker"
+)
+
+# Hash fields that are stored as strings but reported as numbers
+_INT_FIELDS = ("total_chars", "done_chars")
+_FLOAT_FIELDS = ("created_at", "started_at", "updated_at", "completed_at", "processing_time")
+
+_TASK_PREFIX = "analysis_task:"
+
+# Start a task unless it is completed or still reported on. ARGV: TTL, stale
+# cutoff, then field/value pairs of the new record.
+_CREATE = """
+local status = redis.call('hget', KEYS[1], 'status')
+if status == 'completed' then
+    return 0
+end
+if status == 'processing' and tonumber(redis.call('hget', KEYS[1], 'updated_at') or 0) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('del', KEYS[1])
+redis.call('hset', KEYS[1], unpack(ARGV, 3))
+redis.call('expire', KEYS[1], ARGV[1])
+return 1
+"""
+
+Progress = Callable[[int], None]
+
+
+def task_id_for(cache_key: str) -> str:
+    """
+    Derive the task ID of an analysis from its cache key.
+
+    Args:
+        cache_key: Cache key of the text and analysis options
+
+    Returns:
+        Task ID shared by all submissions of the same text and options
+    """
+    return f"task-{content_hash(cache_key)}"
+
+
+def _task_key(task_id: str) -> str:
+    return f"{_TASK_PREFIX}{task_id}"
+
+
+class TaskManager:
+    """Runs deduplicated background tasks and streams their progress."""
+
+    def __init__(self, pool: redis.ConnectionPool = redis_pool,
+                 channel: str = "readability:tasks", ttl: int = 3600,
+                 heartbeat_interval: float = 10.0, stale_after: float = 60.0,
+                 event_timeout: float = 15.0):
+        """
+        Initialize the task manager.
+
+        Args:
+            pool: Redis connection pool (must decode responses)
+            channel: Pub/Sub channel for task events
+            ttl: Lifetime of task records in seconds
+            heartbeat_interval: Seconds between record refreshes of running tasks
+            stale_after: Seconds without a refresh after which a running task
+                         counts as interrupted
+            event_timeout: Seconds a listener waits for an event before it
+                           re-reads the record
+        """
+        self._pool = pool
+        self.channel = channel
+        self._ttl = ttl
+        self._heartbeat_interval = heartbeat_interval
+        self._stale_after = stale_after
+        self._event_timeout = event_timeout
+        self._running: Dict[str, asyncio.Task] = {}
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._subscribed = False
+
+    def _redis(self) -> redis.Redis:
+        """Get a Redis client on the shared pool."""
+        return redis.Redis(connection_pool=self._pool)
+
+    async def start(self) -> None:
+        """Subscribe to task events and start the heartbeat."""
+        from app.adapters.redis_pubsub_adapter import redis_pubsub
+        self._subscribed = await redis_pubsub.subscribe(self.channel, self._handle_event)
+        if not self._subscribed:
+            logger.warning("Task events are delivered to this worker only", channel=self.channel)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and mark the tasks still running as failed."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+        interrupted = list(self._running)
+        for runner in self._running.values():
+            runner.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        for task_id in interrupted:
+            try:
+                await self._finish(task_id, FAILED, error="Service stopped; submit the text again")
+            except Exception as e:
+                logger.warning("Could not mark interrupted task", task_id=task_id, error=str(e))
+
+        if self._subscribed:
+            from app.adapters.redis_pubsub_adapter import redis_pubsub
+            await redis_pubsub.unsubscribe(self.channel)
+            self._subscribed = False
+
+    async def submit(self, task_id: str, total_chars: int,
+                     work: Callable[[Progress], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start a task, unless the same task is running or done.
+
+        Args:
+            task_id: Task ID, normally from task_id_for
+            total_chars: Size of the work, for progress
+            work: Async function that computes the result; it is called with
+                  a progress callback taking the number of characters done
+
+        Returns:
+            Tuple of (task status, whether this call started the task)
+        """
+        now = time.time()
+        record = {
+            "status": PROCESSING,
+            "total_chars": total_chars,
+            "done_chars": 0,
+            "created_at": now,
+            "started_at": now,
+            "updated_at": now
+        }
+        fields = [value for pair in record.items() for value in pair]
+        async with self._redis() as r:
+            created = await r.eval(_CREATE, 1, _task_key(task_id),
+                                   self._ttl, now - self._stale_after, *fields)
+        if not created:
+            ANALYSIS_TASKS.labels(outcome="deduplicated").inc()
+            status = await self.get(task_id, include_result=False)
+            if status is not None:
+                return status, False
+            # Expired in between
+            return await self.submit(task_id, total_chars, work)
+        ANALYSIS_TASKS.labels(outcome="started").inc()
+        runner = asyncio.create_task(self._run(task_id, total_chars, work))
+        self._running[task_id] = runner
+        runner.add_done_callback(lambda _: self._running.pop(task_id, None))
+        return self._status(task_id, record), True
+
+    async def _run(self, task_id: str, total_chars: int,
+                   work: Callable[[Progress], Awaitable[Dict[str, Any]]]) -> None:
+        """Run a task's work, reporting progress and the outcome."""
+        done = 0
+        # Progress is written and published one update at a time; updates
+        # that arrive meanwhile collapse into the newest
+        reporter = LatestWinsScheduler("task_progress", lambda chars: self._report(task_id, total_chars, chars))
+
+        def progress(chars: int) -> None:
+            nonlocal done
+            done = min(total_chars, done + chars)
+            reporter.submit(done)
+
+        started_at = time.time()
+        ANALYSIS_TASKS_ACTIVE.inc()
+        try:
+            result = await work(progress)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Background task failed", task_id=task_id, error=str(e))
+            result, error = None, str(e)
+        else:
+            error = None
+        finally:
+            ANALYSIS_TASKS_ACTIVE.dec()
+            await reporter.close()
+
+        if error is not None:
+            ANALYSIS_TASKS.labels(outcome="failed").inc()
+            await self._finish(task_id, FAILED, started_at=started_at, error=error)
+        else:
+            ANALYSIS_TASKS.labels(outcome="completed").inc()
+            await self._finish(task_id, COMPLETED, started_at=started_at,
+                               total_chars=total_chars, result=result)
+
+    async def _report(self, task_id: str, total_chars: int, done_chars: int) -> None:
+        """Write a task's progress and publish it."""
+        async with self._redis() as r:
+            await r.hset(_task_key(task_id), mapping={"done_chars": done_chars, "updated_at": time.time()})
+        await self._publish({
+            "task_id": task_id,
+            "status": PROCESSING,
+            "total_chars": total_chars,
+            "done_chars": done_chars
+        })
+
+    async def _finish(self, task_id: str, status: str, started_at: Optional[float] = None,
+                      total_chars: Optional[int] = None, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None) -> None:
+        """Record a task's outcome and publish it."""
+        key = _task_key(task_id)
+        completed_at = time.time()
+        fields = {"status": status, "completed_at": completed_at, "updated_at": completed_at}
+        if started_at is not None:
+            fields["processing_time"] = completed_at - started_at
+        if total_chars is not None:
+            fields["done_chars"] = total_chars
+        if result is not None:
+            fields["result"] = json.dumps(result)
+        if error is not None:
+            fields["error"] = error
+        async with self._redis() as r:
+            pipe = r.pipeline(transaction=True)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self._ttl)
+            await pipe.execute()
+        # Listeners read the result from the record
+        await self._publish({"task_id": task_id, "status": status})
+
+    async def _publish(self, event: Dict[str, Any]) -> None:
+        """Send an event to the listeners of all workers, or only local ones without Pub/Sub."""
+        from app.adapters.redis_pubsub_adapter import redis_pubsub
+        if not (self._subscribed and await redis_pubsub.publish(self.channel, json.dumps(event))):
+            self._deliver(event)
+
+    async def _handle_event(self, data: str) -> None:
+        """Fan a published task event out to this worker's listeners."""
+        self._deliver(json.loads(data))
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        for queue in self._listeners.get(event.get("task_id"), ()):
+            queue.put_nowait(event)
+
+    async def _heartbeat_loop(self) -> None:
+        """Refresh the records of running tasks so they do not count as interrupted."""
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                now = time.time()
+                async with self._redis() as r:
+                    pipe = r.pipeline(transaction=False)
+                    for task_id in self._running:
+                        pipe.hset(_task_key(task_id), "updated_at", now)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Task heartbeat failed", error=str(e))
+
+    def _status(self, task_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a task record into the status dictionary returned by the API."""
+        status = dict(fields)
+        for name in _INT_FIELDS:
+            if name in status:
+                status[name] = int(status[name])
+        for name in _FLOAT_FIELDS:
+            if name in status:
+                status[name] = float(status[name])
+        if "result" in status:
+            status["result"] = json.loads(status["result"])
+        if (status.get("status") == PROCESSING
+                and status.get("updated_at", 0) < time.time() - self._stale_after):
+            status["status"] = FAILED
+            status["error"] = "Task was interrupted; submit the text again"
+        total = status.get("total_chars", 0)
+        status["progress"] = int(status.get("done_chars", 0) * 100 / total) if total else 0
+        status["task_id"] = task_id
+        return status
+
+    async def get(self, task_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a task's status, with its result once it has completed.
+
+        Args:
+            task_id: Task ID
+            include_result: Read the result as well
+
+        Returns:
+            Task status dictionary, or None if the task does not exist
+        """
+        async with self._redis() as r:
+            if include_result:
+                fields = await r.hgetall(_task_key(task_id))
+            else:
+                names = ("status",) + _INT_FIELDS + _FLOAT_FIELDS + ("error",)
+                values = await r.hmget(_task_key(task_id), names)
+                fields = {name: value for name, value in zip(names, values) if value is not None}
+        return self._status(task_id, fields) if fields else None
+
+    async def events(self, task_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Follow a task: its current status, then every progress update, and
+        finally the completed status with the result (or the failure).
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Async iterator over task statuses; ends after the final one, or
+            at once if the task does not exist
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        # Listen before reading the record, so no event falls in between
+        self._listeners.setdefault(task_id, set()).add(queue)
+        try:
+            status = await self.get(task_id)
+            while status is not None:
+                yield status
+                if status["status"] != PROCESSING:
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), self._event_timeout)
+                except asyncio.TimeoutError:
+                    event = None
+                if event is not None and event["status"] == PROCESSING:
+                    status = self._status(task_id, {**status, **event, "updated_at": time.time()})
+                else:
+                    # Final events carry no result, and lost events are
+                    # caught up by reading the record
+                    status = await self.get(task_id)
+        finally:
+            listeners = self._listeners.get(task_id)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    del self._listeners[task_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of running tasks and listeners on this worker."""
+        return {
+            "running": len(self._running),
+            "listeners": sum(len(queues) for queues in self._listeners.values()),
+            "events_shared": self._subscribed
+        }
+
+
+# Shared task manager configured from settings
+task_manager = TaskManager(
+    channel=settings.TASK_EVENTS_CHANNEL,
+    ttl=settings.TASK_TTL,
+    heartbeat_interval=settings.TASK_HEARTBEAT_INTERVAL,
+    stale_after=settings.TASK_STALE_AFTER,
+    event_timeout=settings.TASK_EVENT_TIMEOUT
+)
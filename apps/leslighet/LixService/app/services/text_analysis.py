@@ -1,8 +1,10 @@
-from collections import Counter
-from typing import Dict, List, Any
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterator
+from app.services.tokenizer import TokenStream
+from app.services.word_analyzer import WordAnalyzer, WordFrequencyIndex
 from app.services.factory import (
     get_text_parser, get_word_analyzer, get_sentence_analyzer,
-    get_lix_metric, get_rix_metric
+    get_lix_metric
 )
 
 class TextAnalysisService:
@@ -16,14 +18,19 @@ class TextAnalysisService:
     - Readability scoring (LIX and RIX)
     """
     
+    # Maximum number of word entries returned in detailed mode
+    MAX_WORD_ANALYSIS = 200
+    
     @staticmethod
-    def analyze_text(text: str, simple_mode: bool = False) -> Dict[str, Any]:
+    def analyze_text(text: str, simple_mode: bool = False,
+                     stream: Optional[TokenStream] = None) -> Dict[str, Any]:
         """
         Perform comprehensive text analysis with improved metrics, readability, and insights.
         
         Args:
             text: The text to analyze
             simple_mode: If True, perform simplified analysis for better performance
+            stream: Optional pre-computed token stream for the same text
             
         Returns:
             Comprehensive analysis results including statistics, readability metrics, 
@@ -33,8 +40,6 @@ class TextAnalysisService:
         parser = get_text_parser()
         word_analyzer = get_word_analyzer()
         lix_metric = get_lix_metric()
-        rix_metric = get_rix_metric()
-        sentence_analyzer = get_sentence_analyzer()
         
         # Skip analysis if text is empty
         if not text.strip():
@@ -53,36 +58,35 @@ class TextAnalysisService:
                 "sentence_analysis": []
             }
         
-        # Split text into components - calculate once and reuse
-        words = parser.split_words(text)
-        sentences = parser.split_sentences(text)
-        paragraphs = parser.split_paragraphs(text)
+        # Tokenize once; every split below is a slice of this stream
+        if stream is None:
+            stream = parser.tokenize(text)
+        words = stream.words()
+        
+        # All word length statistics come from the stream's length arrays
+        profile = stream.length_profile()
         
         # Basic statistics
-        num_words = len(words)
-        num_sentences = len(sentences)
-        num_paragraphs = len(paragraphs)
+        num_words = profile.word_count
+        num_sentences = profile.sentence_count
+        num_paragraphs = stream.paragraph_count
         
         # Word length analysis
-        word_lengths = [len(word) for word in words]
-        avg_word_length = round(sum(word_lengths) / num_words, 2) if num_words else 0
+        avg_word_length = round(profile.letter_count() / num_words, 2) if num_words else 0
         
         # Sentence length analysis
         avg_sentence_length = round(num_words / num_sentences, 2) if num_sentences else 0
         
         # Long words analysis - calculate once and reuse
-        long_words = word_analyzer.get_long_words(words)
-        long_words_count = len(long_words)
+        long_words_count = profile.count_longer_than(6.9)
         long_words_percentage = round((long_words_count / num_words) * 100, 2) if num_words else 0
         
         # Very long words analysis
-        very_long_words = word_analyzer.get_long_words(words, 10)
-        very_long_words_count = len(very_long_words)
+        very_long_words_count = profile.count_longer_than(10)
         very_long_words_percentage = round((very_long_words_count / num_words) * 100, 2) if num_words else 0
         
-        # Calculate readability metrics once
-        lix_score = lix_metric.compute(words, num_sentences)
-        rix_score = rix_metric.compute(words, num_sentences)
+        # Calculate readability metric once
+        lix_score = lix_metric.compute_from_counts(num_words, num_sentences, long_words_count)
         
         # Basic statistics for all modes
         statistics = {
@@ -106,77 +110,109 @@ class TextAnalysisService:
             }
             
         # Detailed analysis mode below
-        # Word frequency analysis
-        word_frequency = Counter(word.lower() for word in words)
-        most_common_words = word_frequency.most_common(15)
-        
-        # Add sentence lengths to word_frequency for relative position calculations
-        for i, sentence in enumerate(sentences):
-            sent_words = parser.split_words(sentence)
-            word_frequency[f"__sentence_{i}_length"] = len(sent_words)
-        
-        # Sentence analysis - reusing already calculated metrics
-        sentence_analysis = []
-        for i, sentence in enumerate(sentences):
-            sent_words = parser.split_words(sentence)
-            sent_result = sentence_analyzer.analyze_sentence(sentence, i, sent_words)
-            sentence_analysis.append(sent_result)
-        
-        # Word analysis with enhanced features
-        word_analysis = []
-        sentence_index = 0
-        word_pos_in_sentence = 0
+        # Sentence lengths come from the stream's sentence-offset index, computed once
+        sentence_lengths = stream.sentence_lengths()
         
-        for i, word in enumerate(words):
-            # Track position within sentences
-            if i > 0 and word_pos_in_sentence == 0:
-                sentence_index += 1
-                
-            word_analysis.append(
-                word_analyzer.analyze_word(
-                    word, i, sentence_index, 
-                    word_pos_in_sentence, word_frequency
-                )
-            )
-            
-            word_pos_in_sentence += 1
-            
-            # Reset word position counter when at sentence end
-            if sentence_index < len(sentences) and word_pos_in_sentence >= len(parser.split_words(sentences[sentence_index])):
-                word_pos_in_sentence = 0
+        # Build the per-document frequency/rank index once and share it with every word
+        frequency_index = WordFrequencyIndex(words, sentence_lengths)
+        most_common_words = frequency_index.most_common(15)
+        
+        # Sentence analysis - each sentence's words are a single slice of the word list
+        sentence_analysis = TextAnalysisService.analyze_sentences(stream)
+        
+        # Word analysis is lazy: only the returned entries are materialized
+        word_analysis = list(islice(
+            TextAnalysisService._iter_word_analysis(words, stream, frequency_index, word_analyzer),
+            TextAnalysisService.MAX_WORD_ANALYSIS
+        ))
         
         # Add advanced statistics for detailed mode
+        unique_words_count = frequency_index.unique_count
         statistics.update({
-            "word_length_distribution": dict(Counter(word_lengths)),
-            "sentence_length_distribution": dict(Counter(len(parser.split_words(s)) for s in sentences)),
+            "word_length_distribution": dict(profile.length_histogram()),
+            "sentence_length_distribution": dict(profile.sentence_length_histogram()),
             "most_common_words": most_common_words,
-            "unique_words_count": len(word_frequency),
-            "unique_words_percentage": round((len(word_frequency) / num_words) * 100, 2) if num_words else 0
+            "unique_words_count": unique_words_count,
+            "unique_words_percentage": round((unique_words_count / num_words) * 100, 2) if num_words else 0
         })
         
         # Combine everything into a comprehensive result
         return {
             "statistics": statistics,
             "sentence_analysis": sentence_analysis,
-            "word_analysis": word_analysis[:200]  # Limit to first 200 words for performance
+            "word_analysis": word_analysis
         }
+    
+    @staticmethod
+    def analyze_sentences(stream: TokenStream, first_index: int = 0) -> List[Dict[str, Any]]:
+        """
+        Analyze every sentence of a token stream.
+        
+        Args:
+            stream: Token stream of the text
+            first_index: Index given to the stream's first sentence, for streams
+                         that cover a later piece of a larger document
+            
+        Returns:
+            List of sentence analysis dictionaries
+        """
+        sentence_analyzer = get_sentence_analyzer()
+        words = stream.words()
+        sentence_word_starts = stream.sentence_word_starts
+        
+        # Per-sentence word length counts for the whole document in one pass each
+        profile = stream.length_profile()
+        long_words = profile.sentence_counts_longer_than(6.9).tolist()
+        very_long_words = profile.sentence_counts_longer_than(9.9).tolist()
+        letters = profile.sentence_letter_counts().tolist()
+        return [
+            sentence_analyzer.analyze_sentence_counts(
+                sentence, first_index + i,
+                words[sentence_word_starts[i]:sentence_word_starts[i + 1]],
+                long_words[i], very_long_words[i], letters[i]
+            )
+            for i, sentence in enumerate(stream.sentences())
+        ]
+    
+    @staticmethod
+    def _iter_word_analysis(words: List[str], stream: TokenStream,
+                            frequency_index: WordFrequencyIndex,
+                            word_analyzer: WordAnalyzer) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield word analysis entries in document order.
+        
+        Args:
+            words: Words of the document
+            stream: Token stream the words were taken from
+            frequency_index: Precomputed frequency index for the document
+            word_analyzer: Analyzer used for each word
+            
+        Yields:
+            Word analysis dictionaries
+        """
+        # The word-to-sentence mapping gives each word's sentence and position directly
+        for i, word in enumerate(words):
+            sentence_index, word_pos_in_sentence = stream.word_position(i)
+            yield word_analyzer.analyze_word(
+                word, i, sentence_index, 
+                word_pos_in_sentence, frequency_index
+            )
 
     @staticmethod
-    def get_basic_statistics(text: str) -> Dict[str, Any]:
+    def get_basic_statistics(text: str, stream: Optional[TokenStream] = None) -> Dict[str, Any]:
         """
         Get basic text statistics without detailed analysis.
         Optimized for real-time analysis during typing.
         
         Args:
             text: The text to analyze
+            stream: Optional pre-computed token stream for the same text
             
         Returns:
             Dictionary with basic statistics only
         """
         # Get service components
         parser = get_text_parser()
-        word_analyzer = get_word_analyzer()
-        lix_metric = get_lix_metric()
         
         # Skip analysis if text is empty
         if not text.strip():
@@ -193,45 +229,64 @@ class TextAnalysisService:
                 }
             }
         
-        # Split text into components
-        words = parser.split_words(text)
-        sentences = parser.split_sentences(text)
-        paragraphs = parser.split_paragraphs(text)
+        # Tokenize once and read counts straight from the stream
+        if stream is None:
+            stream = parser.tokenize(text)
+        profile = stream.length_profile()
         
-        # Basic statistics
-        num_words = len(words)
-        num_sentences = len(sentences)
-        num_paragraphs = len(paragraphs)
+        return {
+            "statistics": TextAnalysisService.build_basic_statistics(
+                word_count=profile.word_count,
+                sentence_count=stream.sentence_count,
+                paragraph_count=stream.paragraph_count,
+                letter_count=profile.letter_count(),
+                long_words_count=profile.count_longer_than(6.9),
+                very_long_words_count=profile.count_longer_than(10)
+            )
+        }
+    
+    @staticmethod
+    def build_basic_statistics(word_count: int, sentence_count: int, paragraph_count: int,
+                               letter_count: int, long_words_count: int,
+                               very_long_words_count: int) -> Dict[str, Any]:
+        """
+        Build the basic statistics block from precomputed counts.
         
-        # Word length analysis
-        avg_word_length = round(sum(len(word) for word in words) / num_words, 2) if num_words else 0
+        Shared by get_basic_statistics and callers that maintain running counts,
+        such as the incremental analyzer behind the WebSocket endpoint.
         
-        # Sentence length analysis
-        avg_sentence_length = round(num_words / num_sentences, 2) if num_sentences else 0
+        Args:
+            word_count: Number of words
+            sentence_count: Number of sentences
+            paragraph_count: Number of paragraphs
+            letter_count: Total length of all words
+            long_words_count: Number of words with more than 6 characters
+            very_long_words_count: Number of words with more than 10 characters
+            
+        Returns:
+            Dictionary with basic statistics
+        """
+        lix_metric = get_lix_metric()
         
-        # Long words analysis
-        long_words = word_analyzer.get_long_words(words)
-        long_words_count = len(long_words)
-        long_words_percentage = round((long_words_count / num_words) * 100, 2) if num_words else 0
+        # Word and sentence length analysis
+        avg_word_length = round(letter_count / word_count, 2) if word_count else 0
+        avg_sentence_length = round(word_count / sentence_count, 2) if sentence_count else 0
         
-        # Very long words analysis (simplified)
-        very_long_words_count = len([w for w in words if len(w) > 10])
-        very_long_words_percentage = round((very_long_words_count / num_words) * 100, 2) if num_words else 0
+        # Long and very long words
+        long_words_percentage = round((long_words_count / word_count) * 100, 2) if word_count else 0
+        very_long_words_percentage = round((very_long_words_count / word_count) * 100, 2) if word_count else 0
         
         # Calculate basic readability score
-        lix_score = lix_metric.compute(words, num_sentences)
+        lix_score = lix_metric.compute_from_counts(word_count, sentence_count, long_words_count)
         
-        # Return only the basic statistics
         return {
-            "statistics": {
-                "word_count": num_words,
-                "sentence_count": num_sentences,
-                "paragraph_count": num_paragraphs,
-                "avg_word_length": avg_word_length,
-                "avg_sentence_length": avg_sentence_length,
-                "long_words_percentage": long_words_percentage,
-                "very_long_words_percentage": very_long_words_percentage,
-                "readability_score": lix_score,
-                "long_words_count": long_words_count
-            }
-        }
\ No newline at end of file
+            "word_count": word_count,
+            "sentence_count": sentence_count,
+            "paragraph_count": paragraph_count,
+            "avg_word_length": avg_word_length,
+            "avg_sentence_length": avg_sentence_length,
+            "long_words_percentage": long_words_percentage,
+            "very_long_words_percentage": very_long_words_percentage,
+            "readability_score": lix_score,
+            "long_words_count": long_words_count
+        }
@@ -0,0 +1,306 @@
+"""
+Single-pass tokenizer shared by the readability, parsing and analysis services.
+Walks the text once and records word, sentence and paragraph boundaries as
+character offsets in a compact token stream.
+"""
+import re
+import sys
+from array import array
+from typing import List, Optional, Tuple
+
+from app.services.content_cache import ContentCache
+from app.utils.hashing import content_hash
+
+
+class TokenStream:
+    """
+    Compact, read-only result of tokenizing a text.
+
+    Words are stored as parallel arrays of start/end character offsets.
+    Sentences and paragraphs are stored as character spans. The sentence-offset
+    index (first word of every sentence) and the word-to-sentence mapping are
+    built during the same pass, so consumers can find a word's sentence and
+    position, or a sentence's words, without re-scanning the text.
+    """
+
+    __slots__ = (
+        'text', 'word_starts', 'word_ends', 'word_sentence_ids',
+        'sentence_starts', 'sentence_ends', 'sentence_word_starts',
+        'paragraph_starts', 'paragraph_ends', '_words', '_sentence_lengths',
+        '_profile'
+    )
+
+    def __init__(self, text: str):
+        self.text = text
+        self.word_starts = array('i')
+        self.word_ends = array('i')
+        # Index of the sentence containing each word
+        self.word_sentence_ids = array('i')
+        self.sentence_starts = array('i')
+        self.sentence_ends = array('i')
+        # One entry per sentence plus a trailing sentinel equal to word_count
+        self.sentence_word_starts = array('i')
+        self.paragraph_starts = array('i')
+        self.paragraph_ends = array('i')
+        self._words = None
+        self._sentence_lengths = None
+        self._profile = None
+
+    @property
+    def word_count(self) -> int:
+        """Number of words in the text."""
+        return len(self.word_starts)
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of sentences containing at least one word."""
+        return len(self.sentence_starts)
+
+    @property
+    def paragraph_count(self) -> int:
+        """Number of non-empty paragraphs."""
+        return len(self.paragraph_starts)
+
+    def nbytes(self) -> int:
+        """Estimate the memory held by this stream, including the source text."""
+        arrays = (
+            self.word_starts, self.word_ends, self.word_sentence_ids,
+            self.sentence_starts, self.sentence_ends, self.sentence_word_starts,
+            self.paragraph_starts, self.paragraph_ends
+        )
+        size = sys.getsizeof(self.text) + sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+        if self._words is not None:
+            size += sys.getsizeof(self._words) + sum(sys.getsizeof(w) for w in self._words)
+        if self._profile is not None:
+            size += self._profile.nbytes()
+        return size
+
+    def words(self) -> List[str]:
+        """
+        Get all words in lowercase, materialized once per stream.
+
+        Returns:
+            List of lowercase words in document order
+        """
+        if self._words is None:
+            text = self.text
+            self._words = [
+                text[start:end].lower()
+                for start, end in zip(self.word_starts, self.word_ends)
+            ]
+        return self._words
+
+    def length_profile(self) -> 'LengthProfile':
+        """
+        Get the vectorized word and sentence length arrays, built once per stream.
+
+        Returns:
+            LengthProfile for this stream
+        """
+        if self._profile is None:
+            # Imported here; the profile module depends on this one
+            from app.services.length_profile import LengthProfile
+            self._profile = LengthProfile.from_stream(self)
+        return self._profile
+
+    def word_lengths(self) -> List[int]:
+        """Get the character length of every word."""
+        return self.length_profile().lengths.tolist()
+
+    def count_long_words(self, min_length: int = 6) -> int:
+        """Count words with at least `min_length` characters."""
+        return self.length_profile().count_longer_than(min_length - 1)
+
+    def sentences(self) -> List[str]:
+        """Get the text of every sentence."""
+        text = self.text
+        return [
+            text[start:end]
+            for start, end in zip(self.sentence_starts, self.sentence_ends)
+        ]
+
+    def paragraphs(self) -> List[str]:
+        """Get the text of every paragraph."""
+        text = self.text
+        return [
+            text[start:end]
+            for start, end in zip(self.paragraph_starts, self.paragraph_ends)
+        ]
+
+    def sentence_lengths(self) -> array:
+        """
+        Get the word count of every sentence, computed once per stream.
+
+        Returns:
+            Array of sentence lengths indexed by sentence
+        """
+        if self._sentence_lengths is None:
+            offsets = self.sentence_word_starts
+            self._sentence_lengths = array(
+                'i', (offsets[i + 1] - offsets[i] for i in range(len(offsets) - 1))
+            )
+        return self._sentence_lengths
+
+    def word_position(self, word_index: int) -> Tuple[int, int]:
+        """
+        Locate a word within its sentence.
+
+        Args:
+            word_index: Global index of the word
+
+        Returns:
+            Tuple of (sentence index, position of the word in that sentence)
+        """
+        sentence_index = self.word_sentence_ids[word_index]
+        return sentence_index, word_index - self.sentence_word_starts[sentence_index]
+
+    def sentence_word_range(self, sentence_index: int) -> Tuple[int, int]:
+        """
+        Get the word index range of a sentence.
+
+        Args:
+            sentence_index: Index of the sentence
+
+        Returns:
+            Tuple of (first word index, one past the last word index)
+        """
+        return (
+            self.sentence_word_starts[sentence_index],
+            self.sentence_word_starts[sentence_index + 1]
+        )
+
+    def sentence_words(self, sentence_index: int) -> List[str]:
+        """Get the lowercase words of a single sentence."""
+        start, end = self.sentence_word_range(sentence_index)
+        return self.words()[start:end]
+
+
+class Tokenizer:
+    """
+    Tokenizer that produces word, sentence and paragraph boundaries in one pass.
+
+    A sentence starts at its first word and ends at the next run of sentence
+    terminators (.!? optionally followed by a closing quote) that is followed by
+    whitespace, a closing bracket or the end of the text, or at a paragraph break.
+    Requiring trailing whitespace keeps decimals like "3.5" inside one sentence.
+    A paragraph break is an empty line and always closes the open sentence.
+    """
+
+    # Alternation order matters only for tokens starting at the same position,
+    # which cannot happen here since the three branches start with disjoint classes.
+    _TOKEN_PATTERN = re.compile(
+        r'(?P<word>\w+)|(?P<terminator>[.!?]+["»]?(?=[\s)\]]|$))|(?P<paragraph>\n\s*\n)',
+        re.UNICODE
+    )
+
+    def tokenize(self, text: str) -> TokenStream:
+        """
+        Tokenize a text into a compact token stream.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            TokenStream with word, sentence and paragraph boundaries
+        """
+        stream = TokenStream(text)
+        if not text:
+            stream.sentence_word_starts.append(0)
+            return stream
+
+        word_starts = stream.word_starts
+        word_ends = stream.word_ends
+        word_sentence_ids = stream.word_sentence_ids
+        sentence_starts = stream.sentence_starts
+        sentence_ends = stream.sentence_ends
+        sentence_word_starts = stream.sentence_word_starts
+        paragraph_starts = stream.paragraph_starts
+        paragraph_ends = stream.paragraph_ends
+
+        in_sentence = False
+        in_paragraph = False
+        last_end = 0
+
+        for match in self._TOKEN_PATTERN.finditer(text):
+            kind = match.lastgroup
+            start, end = match.span()
+
+            if kind == 'word':
+                if not in_sentence:
+                    sentence_starts.append(start)
+                    sentence_word_starts.append(len(word_starts))
+                    in_sentence = True
+                if not in_paragraph:
+                    paragraph_starts.append(start)
+                    in_paragraph = True
+                word_starts.append(start)
+                word_ends.append(end)
+                word_sentence_ids.append(len(sentence_starts) - 1)
+                last_end = end
+            elif kind == 'terminator':
+                if in_sentence:
+                    sentence_ends.append(end)
+                    in_sentence = False
+                if in_paragraph:
+                    last_end = end
+            else:  # paragraph break
+                if in_sentence:
+                    sentence_ends.append(last_end)
+                    in_sentence = False
+                if in_paragraph:
+                    paragraph_ends.append(last_end)
+                    in_paragraph = False
+
+        # Close anything still open at the end of the text
+        if in_sentence:
+            sentence_ends.append(last_end)
+        if in_paragraph:
+            paragraph_ends.append(last_end)
+        sentence_word_starts.append(len(word_starts))
+
+        return stream
+
+    def clear_cache(self) -> None:
+        """Drop cached token streams. The plain tokenizer keeps none."""
+
+
+class CachingTokenizer(Tokenizer):
+    """
+    Tokenizer that keeps token streams in a memory-budgeted ContentCache.
+
+    Streams are keyed by content hash and stored with their word list already
+    materialized, so the cache's byte accounting covers everything they hold.
+    """
+
+    def __init__(self, cache: ContentCache):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            cache: Cache that holds token streams
+        """
+        self.cache = cache
+
+    def tokenize(self, text: str, digest: Optional[str] = None) -> TokenStream:
+        """
+        Tokenize a text, reusing a cached stream for identical content.
+
+        Args:
+            text: Text to tokenize
+            digest: Optional precomputed content hash of the text
+
+        Returns:
+            TokenStream with word, sentence and paragraph boundaries
+        """
+        key = f"tokens:{digest or content_hash(text)}"
+        stream = self.cache.get(key)
+        if stream is None:
+            stream = super().tokenize(text)
+            stream.words()
+            stream.length_profile()
+            self.cache.set(key, stream)
+        return stream
+
+    def clear_cache(self) -> None:
+        """Drop all cached token streams."""
+        self.cache.clear()
@@ -3,11 +3,79 @@ Analyzes words for complexity, frequency, and position in text.
 This service provides detailed analysis of individual words, their complexity,
 and frequency patterns.
 """
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Iterable, Tuple
 import os
 import json
 from collections import Counter
 
+from app.services.length_profile import long_words
+
+class WordFrequencyIndex:
+    """
+    Per-document word frequency and rank index.
+    
+    Built once per analyzed text so that per-word analysis can look up
+    frequency, frequency rank and sentence lengths in O(1) instead of
+    rebuilding and sorting the frequency table for every word.
+    """
+    
+    __slots__ = ('frequencies', 'ranks', 'unique_count', 'sentence_lengths')
+    
+    def __init__(self, words: Iterable[str], sentence_lengths: Optional[List[int]] = None):
+        """
+        Build the index from the document's words.
+        
+        Args:
+            words: Words of the document in order (already lowercased)
+            sentence_lengths: Optional word count of every sentence, by sentence index
+        """
+        self._build(Counter(words), sentence_lengths if sentence_lengths is not None else [])
+    
+    @classmethod
+    def from_counts(cls, frequencies: Counter, sentence_lengths: Optional[List[int]] = None) -> 'WordFrequencyIndex':
+        """
+        Build the index from precomputed word counts, e.g. merged chunk statistics.
+        
+        Args:
+            frequencies: Word counts in first-occurrence order
+            sentence_lengths: Optional word count of every sentence, by sentence index
+            
+        Returns:
+            Index over the given counts
+        """
+        index = cls.__new__(cls)
+        index._build(frequencies, sentence_lengths if sentence_lengths is not None else [])
+        return index
+    
+    def _build(self, frequencies: Counter, sentence_lengths: List[int]) -> None:
+        """Store the counts and compute frequency ranks."""
+        self.frequencies = frequencies
+        self.unique_count = len(frequencies)
+        self.sentence_lengths = sentence_lengths
+        
+        # Rank by descending frequency; ties keep first-occurrence order (stable sort)
+        ranked = sorted(frequencies.items(), key=lambda item: item[1], reverse=True)
+        self.ranks = {word: rank for rank, (word, _) in enumerate(ranked, 1)}
+    
+    def frequency(self, word: str) -> int:
+        """Get the number of occurrences of a lowercase word."""
+        return self.frequencies.get(word, 0)
+    
+    def rank(self, word: str) -> int:
+        """Get the 1-based frequency rank of a word (unseen words rank last)."""
+        return self.ranks.get(word, self.unique_count)
+    
+    def sentence_length(self, sentence_index: int) -> int:
+        """Get the word count of a sentence, or 0 if unknown."""
+        if 0 <= sentence_index < len(self.sentence_lengths):
+            return self.sentence_lengths[sentence_index]
+        return 0
+    
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        """Get the n most frequent words with their counts."""
+        return self.frequencies.most_common(n)
+
+
 class WordAnalyzer:
     """
     Analyzes words for complexity, frequency, and position in text.
@@ -97,9 +165,9 @@ class WordAnalyzer:
         Returns:
             List of long words
         """
-        return [word for word in words if len(word) > min_length]
+        return long_words(words, min_length)
     
-    def analyze_word(self, word: str, index: int, sentence_index: int, position_in_sentence: int, word_frequency: Dict[str, int]) -> Dict[str, Any]:
+    def analyze_word(self, word: str, index: int, sentence_index: int, position_in_sentence: int, frequency_index: WordFrequencyIndex) -> Dict[str, Any]:
         """
         Analyze a single word with context.
         
@@ -108,8 +176,8 @@ class WordAnalyzer:
             index: Global word index in the text
             sentence_index: Index of the sentence containing the word
             position_in_sentence: Position of the word in its sentence
-            word_frequency: Dictionary mapping words to their frequency in the text
-                            (should also contain sentence length info as "__sentence_X_length")
+            frequency_index: Precomputed frequency, rank and sentence length
+                             index for the whole document
             
         Returns:
             Dictionary with word analysis
@@ -136,23 +204,17 @@ class WordAnalyzer:
         is_very_long = word_length > 9.9  # 10+ characters
         lowercase_word = word.lower()
         
-        # Get frequency info
-        frequency = word_frequency.get(lowercase_word, 0)
-        total_words = sum(1 for w, f in word_frequency.items() if not w.startswith("__"))
-        relative_frequency = frequency / total_words if total_words > 0 else 0
+        # Get frequency info from the precomputed index
+        frequency = frequency_index.frequency(lowercase_word)
+        total_unique_words = frequency_index.unique_count
+        relative_frequency = frequency / total_unique_words if total_unique_words > 0 else 0
         
         # Calculate relative position in sentence
-        sentence_length_key = f"__sentence_{sentence_index}_length"
-        sentence_length = word_frequency.get(sentence_length_key, 0)
+        sentence_length = frequency_index.sentence_length(sentence_index)
         relative_position = position_in_sentence / sentence_length if sentence_length > 0 else 0
         
         # Determine word significance
-        total_unique_words = len([w for w in word_frequency.keys() if not w.startswith("__")])
-        frequency_rank = sorted(
-            [(w, f) for w, f in word_frequency.items() if not w.startswith("__")],
-            key=lambda x: x[1],
-            reverse=True
-        ).index((lowercase_word, frequency)) + 1 if frequency > 0 else total_unique_words
+        frequency_rank = frequency_index.rank(lowercase_word) if frequency > 0 else total_unique_words
         
         significance_score = (
             (0.4 * (1 - (frequency_rank / total_unique_words))) +  # Rarity
@@ -0,0 +1,191 @@
+"""
+Pluggable serialization for cached values and bus messages.
+
+Encoded values start with one format byte naming the serializer and the
+compression used, so entries written with other settings, and plain JSON
+written before the codec existed, still decode. Uncompressed JSON is written
+without a format byte, so JSON consumers outside the service can read it.
+
+msgpack, orjson, zstandard and lz4 are used when installed; JSON from the
+standard library and zlib are always available.
+"""
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+SERIALIZERS = (JSON, MSGPACK)
+
+NONE = "none"
+ZLIB = "zlib"
+ZSTD = "zstd"
+LZ4 = "lz4"
+COMPRESSIONS = (NONE, ZLIB, ZSTD, LZ4)
+
+# Format byte: 0x10 | serializer << 2 | compression. These are control
+# characters, so they never start a JSON document (or its leading whitespace).
+_FORMAT_BASE = 0x10
+_FORMAT_MASK = 0xF8
+
+
+class CodecError(ValueError):
+    """Raised for unknown formats or codecs that are not installed."""
+
+
+def _available(serializer: str, compression: str) -> bool:
+    """Check that the libraries for a serializer and compression are installed."""
+    if serializer == MSGPACK and msgpack is None:
+        return False
+    if compression == ZSTD and zstandard is None:
+        return False
+    if compression == LZ4 and lz4_frame is None:
+        return False
+    return True
+
+
+class Codec:
+    """
+    Serializer plus optional compression above a size threshold.
+
+    Decoding does not depend on the codec's own settings: any value written
+    by any Codec, or plain JSON, can be decoded by every instance.
+    """
+
+    def __init__(self, serializer: str = "auto", compression: str = "auto",
+                 compress_threshold: int = 4096, level: int = 3):
+        """
+        Initialize the codec.
+
+        Args:
+            serializer: "json", "msgpack", or "auto" for msgpack when installed
+            compression: "none", "zlib", "zstd", "lz4", or "auto" for zstd or
+                         lz4 when installed
+            compress_threshold: Serialized size in bytes above which values
+                                are compressed
+            level: Compression level for zlib and zstd
+        """
+        if serializer == "auto":
+            serializer = MSGPACK if msgpack is not None else JSON
+        if compression == "auto":
+            compression = ZSTD if zstandard is not None else LZ4 if lz4_frame is not None else NONE
+        if serializer not in SERIALIZERS or compression not in COMPRESSIONS:
+            raise CodecError(f"Unknown codec: {serializer}/{compression}")
+        if not _available(serializer, compression):
+            raise CodecError(f"Codec {serializer}/{compression} is not installed")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self._zstd_compressor = zstandard.ZstdCompressor(level=level) if compression == ZSTD else None
+
+    @property
+    def content_type(self) -> str:
+        """MIME type for messages whose body is not plain JSON."""
+        if self.serializer == JSON and self.compression == NONE:
+            return "application/json"
+        return "application/x-lix-codec"
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Serialize and, above the threshold, compress a value.
+
+        Args:
+            value: Value to encode (JSON-compatible types)
+
+        Returns:
+            Encoded bytes
+        """
+        if self.serializer == MSGPACK:
+            data = msgpack.packb(value, use_bin_type=True)
+        elif orjson is not None:
+            data = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+        compression = self.compression if len(data) > self.compress_threshold else NONE
+        if self.serializer == JSON and compression == NONE:
+            return data
+
+        if compression == ZLIB:
+            data = zlib.compress(data, self.level)
+        elif compression == ZSTD:
+            data = self._zstd_compressor.compress(data)
+        elif compression == LZ4:
+            data = lz4_frame.compress(data)
+        header = _FORMAT_BASE | (SERIALIZERS.index(self.serializer) << 2) | COMPRESSIONS.index(compression)
+        return bytes((header,)) + data
+
+    @staticmethod
+    def decode(data: Union[bytes, str]) -> Any:
+        """
+        Decode a value written by any codec, or plain JSON.
+
+        Args:
+            data: Encoded bytes, or a JSON string
+
+        Returns:
+            Decoded value
+        """
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data or data[0] & _FORMAT_MASK != _FORMAT_BASE:
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+
+        header = data[0]
+        serializer = SERIALIZERS[(header >> 2) & 0x01]
+        compression = COMPRESSIONS[header & 0x03]
+        if not _available(serializer, compression):
+            raise CodecError(f"Cannot decode {serializer}/{compression}: codec is not installed")
+
+        payload = memoryview(data)[1:]
+        if compression == ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression == ZSTD:
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression == LZ4:
+            payload = lz4_frame.decompress(payload)
+
+        if serializer == MSGPACK:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        return orjson.loads(payload) if orjson is not None else json.loads(bytes(payload))
+
+
+def _from_settings(prefix: str) -> Codec:
+    """Build a codec from the <prefix>_SERIALIZER/_COMPRESSION/_COMPRESS_THRESHOLD settings."""
+    # Imported here so the codec itself has no configuration dependency
+    from app.config import settings
+
+    return Codec(
+        serializer=getattr(settings, f"{prefix}_SERIALIZER"),
+        compression=getattr(settings, f"{prefix}_COMPRESSION"),
+        compress_threshold=getattr(settings, f"{prefix}_COMPRESS_THRESHOLD")
+    )
+
+
+# Codec for cached values (Redis only, so binary formats are safe)
+cache_codec = _from_settings("CACHE_CODEC")
+
+# Codec for message bus payloads; defaults to plain JSON for other consumers
+bus_codec = _from_settings("BUS_CODEC")
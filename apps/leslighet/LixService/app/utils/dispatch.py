@@ -0,0 +1,140 @@
+"""
+Concurrent dispatch with per-key ordering.
+
+KeyedDispatcher runs handlers for incoming items on a bounded number of
+concurrent workers. Items with the same key (e.g. one client's requests) run
+one after another in arrival order; items with different keys run in
+parallel, so one slow client does not hold up the others. The number of
+accepted but unfinished items is bounded: once it is reached, submit() waits,
+which pushes back on the reader instead of buffering without limit.
+"""
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+logger = structlog.get_logger()
+
+DISPATCH_IN_FLIGHT = Gauge(
+    "dispatch_in_flight",
+    "Handlers currently running",
+    ["dispatcher"]
+)
+DISPATCH_PENDING = Gauge(
+    "dispatch_pending",
+    "Items accepted but not yet finished, including running ones",
+    ["dispatcher"]
+)
+DISPATCH_BACKPRESSURE = Counter(
+    "dispatch_backpressure_total",
+    "Submissions that had to wait because the pending limit was reached",
+    ["dispatcher"]
+)
+
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class KeyedDispatcher:
+    """Bounded concurrent dispatcher that keeps items with the same key in order."""
+
+    def __init__(self, name: str, concurrency: int = 8, max_pending: int = 256):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            name: Name used in metrics and logs
+            concurrency: Maximum handlers running at once
+            max_pending: Maximum items accepted but not finished; submit()
+                         waits while the limit is reached
+        """
+        self.name = name
+        self._concurrency = concurrency
+        self._max_pending = max_pending
+        self._workers = asyncio.Semaphore(concurrency)
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._queues: Dict[Hashable, Deque[Tuple[Handler, Any]]] = {}
+        self._drains: Set[asyncio.Task] = set()
+        self._unkeyed = itertools.count()
+        self._pending = 0
+        self._in_flight = 0
+
+    async def submit(self, key: Optional[Hashable], handler: Handler, item: Any) -> None:
+        """
+        Schedule handler(item) after the earlier items with the same key.
+
+        Waits while max_pending items are unfinished.
+
+        Args:
+            key: Ordering key; None for items that need no ordering
+            handler: Async function to call with the item
+            item: Item to handle
+        """
+        if self._capacity.locked():
+            DISPATCH_BACKPRESSURE.labels(dispatcher=self.name).inc()
+        await self._capacity.acquire()
+        self._pending += 1
+        DISPATCH_PENDING.labels(dispatcher=self.name).inc()
+
+        if key is None:
+            key = ("unkeyed", next(self._unkeyed))
+        queue = self._queues.get(key)
+        if queue is not None:
+            # A drain task for this key is running and will pick it up
+            queue.append((handler, item))
+            return
+        self._queues[key] = deque([(handler, item)])
+        task = asyncio.create_task(self._drain(key))
+        self._drains.add(task)
+        task.add_done_callback(self._drains.discard)
+
+    async def _drain(self, key: Hashable) -> None:
+        """Handle the items of one key in order until none are left."""
+        queue = self._queues[key]
+        try:
+            while queue:
+                handler, item = queue.popleft()
+                try:
+                    async with self._workers:
+                        self._in_flight += 1
+                        DISPATCH_IN_FLIGHT.labels(dispatcher=self.name).inc()
+                        try:
+                            await handler(item)
+                        finally:
+                            self._in_flight -= 1
+                            DISPATCH_IN_FLIGHT.labels(dispatcher=self.name).dec()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error("Dispatched handler failed", dispatcher=self.name, error=str(e))
+                finally:
+                    self._finish(1)
+        finally:
+            # On cancellation, items still queued are dropped
+            del self._queues[key]
+            self._finish(len(queue))
+
+    def _finish(self, count: int) -> None:
+        for _ in range(count):
+            self._pending -= 1
+            DISPATCH_PENDING.labels(dispatcher=self.name).dec()
+            self._capacity.release()
+
+    async def close(self) -> None:
+        """Cancel running handlers and drop queued items."""
+        drains = list(self._drains)
+        for task in drains:
+            task.cancel()
+        await asyncio.gather(*drains, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get running and pending item counts and the configured limits."""
+        return {
+            "in_flight": self._in_flight,
+            "pending": self._pending,
+            "active_keys": len(self._queues),
+            "concurrency": self._concurrency,
+            "max_pending": self._max_pending
+        }
@@ -0,0 +1,19 @@
+"""
+Fast content hashing for cache keys and deduplication.
+Uses BLAKE2b from the standard library, so every pod computes the same keys
+regardless of which optional packages are installed.
+"""
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """
+    Compute a 128-bit hex digest of a text's full content.
+
+    Args:
+        text: The text to hash
+
+    Returns:
+        Hex digest string (32 characters)
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,138 @@
+"""
+Latest-value-wins scheduling for one session.
+
+A typing client sends updates faster than they can be analyzed, and only the
+newest text matters. LatestWinsScheduler keeps at most one job running per
+session and at most one waiting: a new update replaces the waiting one, and
+when the running job finishes, the newest update runs next. Updates that were
+replaced without running are counted as dropped, so the dropped-update ratio
+shows how much work coalescing saves.
+
+Optionally the scheduler waits for a quiet period before running (debounce),
+and cancels a running job as soon as a newer update arrives, for stateless
+work whose result would be stale anyway.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import structlog
+from prometheus_client import Counter
+
+logger = structlog.get_logger()
+
+COALESCED_UPDATES = Counter(
+    "coalesced_updates_total",
+    "Session updates by outcome: processed, dropped before running, or cancelled while running",
+    ["scheduler", "outcome"]
+)
+
+_NOTHING = object()
+
+
+class LatestWinsScheduler:
+    """Runs the newest submitted value of one session, one job at a time."""
+
+    def __init__(self, name: str, process: Callable[[Any], Awaitable[None]],
+                 delay: float = 0.0, cancel_running: bool = False):
+        """
+        Initialize the scheduler.
+
+        Args:
+            name: Name used in metrics and logs, e.g. the endpoint
+            process: Async function run with each value that wins
+            delay: Seconds without a newer update before a value runs
+            cancel_running: Cancel the running job when a newer value arrives;
+                            only for jobs that hold no state across runs
+        """
+        self.name = name
+        self._process = process
+        self._delay = delay
+        self._cancel_running = cancel_running
+        self._latest: Any = _NOTHING
+        self._changed = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._job: Optional[asyncio.Task] = None
+        self._closed = False
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._cancelled = 0
+
+    def submit(self, value: Any) -> None:
+        """
+        Schedule a value, replacing the one still waiting.
+
+        Args:
+            value: Value to process
+        """
+        if self._closed:
+            return
+        self._submitted += 1
+        if self._latest is not _NOTHING:
+            self._count("dropped")
+        self._latest = value
+        self._changed.set()
+        if self._cancel_running and self._job is not None and not self._job.done():
+            self._job.cancel()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def _count(self, outcome: str) -> None:
+        if outcome == "dropped":
+            self._dropped += 1
+        elif outcome == "cancelled":
+            self._cancelled += 1
+        else:
+            self._processed += 1
+        COALESCED_UPDATES.labels(scheduler=self.name, outcome=outcome).inc()
+
+    async def _run(self) -> None:
+        while self._latest is not _NOTHING:
+            if self._delay:
+                # Restart the wait whenever a newer value arrives
+                while True:
+                    self._changed.clear()
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), self._delay)
+                    except asyncio.TimeoutError:
+                        break
+
+            value, self._latest = self._latest, _NOTHING
+            self._job = asyncio.create_task(self._process(value))
+            try:
+                await self._job
+                self._count("processed")
+            except asyncio.CancelledError:
+                if self._closed:
+                    raise
+                # Superseded by a newer value
+                self._count("cancelled")
+            except Exception as e:
+                self._count("processed")
+                logger.error("Scheduled job failed", scheduler=self.name, error=str(e))
+            finally:
+                self._job = None
+
+    async def close(self) -> None:
+        """Cancel the running job and forget the waiting value."""
+        self._closed = True
+        if self._latest is not _NOTHING:
+            self._latest = _NOTHING
+            self._count("dropped")
+        tasks = [task for task in (self._job, self._worker) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._job = None
+        self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get update counts and the share of updates that never ran to completion."""
+        skipped = self._dropped + self._cancelled
+        return {
+            "submitted": self._submitted,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "cancelled": self._cancelled,
+            "dropped_ratio": skipped / self._submitted if self._submitted else 0.0
+        }
@@ -0,0 +1,154 @@
+"""
+Micro-batching for high-rate small requests.
+
+MicroBatcher collects submitted items for at most `max_delay` seconds or until
+`max_items` are waiting, then hands them to one async `process` call, so fixed
+per-request costs (executor hand-off, admission, Redis round trips) are paid
+once per batch. A pending item is replaced when an item with the same key is
+submitted, so a client that sends updates faster than they are processed
+only gets its latest one analyzed. Batches are processed one at a time, in
+submission order; the next batch collects while the current one runs.
+"""
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+logger = structlog.get_logger()
+
+MICRO_BATCH_SIZE = Histogram(
+    "micro_batch_size",
+    "Items per processed micro-batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+MICRO_BATCH_SUPERSEDED = Counter(
+    "micro_batch_superseded_total",
+    "Pending items replaced by a newer item with the same key",
+    ["batcher"]
+)
+
+
+class MicroBatcher:
+    """Collects items into small batches and processes them with one call."""
+
+    def __init__(self, name: str, process: Callable[[List[Any]], Awaitable[None]],
+                 max_items: int = 64, max_delay: float = 0.005, max_pending: int = 1024):
+        """
+        Initialize the batcher.
+
+        Args:
+            name: Name used in metrics and logs
+            process: Async function called with each batch, oldest item first
+            max_items: Largest batch
+            max_delay: Longest time in seconds the first item of a batch waits
+                       for more items
+            max_pending: Maximum waiting items; submit() waits while the
+                         limit is reached
+        """
+        self.name = name
+        self._process = process
+        self._max_items = max_items
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        self._pending: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._unkeyed = itertools.count()
+        self._first_at = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    async def start(self) -> None:
+        """Start processing batches."""
+        if self._running:
+            return
+        self._running = True
+        self._wake = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Process the items still waiting, then stop."""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, key: Optional[Hashable], item: Any) -> None:
+        """
+        Add an item to the next batch.
+
+        Args:
+            key: Items with the same key replace each other while waiting;
+                 None for items that must all be processed
+            item: Item to process
+        """
+        if not self._running:
+            raise RuntimeError(f"Micro-batcher '{self.name}' is not running")
+        if key is None:
+            key = ("unkeyed", next(self._unkeyed))
+        if key in self._pending:
+            # Keep the waiting slot, so the client is not pushed to a later batch
+            self._pending[key] = item
+            MICRO_BATCH_SUPERSEDED.labels(batcher=self.name).inc()
+            return
+
+        if len(self._pending) >= self._max_pending:
+            async with self._space:
+                await self._space.wait_for(lambda: len(self._pending) < self._max_pending)
+        if not self._pending:
+            self._first_at = asyncio.get_running_loop().time()
+        self._pending[key] = item
+        if len(self._pending) == 1 or len(self._pending) >= self._max_items:
+            self._wake.set()
+
+    async def _collect(self) -> List[Any]:
+        """Wait until a batch is full or its first item has waited max_delay."""
+        loop = asyncio.get_running_loop()
+        while self._running and len(self._pending) < self._max_items:
+            remaining = self._first_at + self._max_delay - loop.time()
+            if remaining <= 0:
+                break
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        batch = []
+        while self._pending and len(batch) < self._max_items:
+            batch.append(self._pending.popitem(last=False)[1])
+        # Items left over have waited at least as long as this batch
+        self._first_at = loop.time() - self._max_delay
+        async with self._space:
+            self._space.notify_all()
+        return batch
+
+    async def _run(self) -> None:
+        while self._running or self._pending:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            batch = await self._collect()
+            MICRO_BATCH_SIZE.labels(batcher=self.name).observe(len(batch))
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.error("Micro-batch processing failed", batcher=self.name,
+                             size=len(batch), error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of waiting items and the batch limits."""
+        return {
+            "pending": len(self._pending),
+            "max_items": self._max_items,
+            "max_delay_ms": self._max_delay * 1000
+        }
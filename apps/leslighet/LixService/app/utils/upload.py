@@ -0,0 +1,136 @@
+"""
+Incremental reading of raw text uploads.
+
+Large documents are posted as a raw request body instead of a JSON field, so
+they can be analyzed while they arrive. The helpers here turn the body's byte
+chunks into text pieces without holding more than one chunk (plus an
+unfinished line or character) in memory:
+
+- text/plain bodies are decoded incrementally, so multi-byte characters may
+  be split between chunks.
+- NDJSON bodies hold one paragraph per line, either a JSON string or an
+  object with a "text" field; paragraphs are joined with paragraph breaks.
+"""
+import asyncio
+import codecs
+import json
+from typing import AsyncIterator
+
+from sse_starlette.sse import EventSourceResponse
+from starlette.types import Message, Receive, Scope, Send
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the configured size limit."""
+
+
+async def limit_bytes(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Pass byte chunks through, failing once more than max_bytes arrived.
+
+    Args:
+        chunks: Body chunks
+        max_bytes: Largest accepted body; 0 for no limit
+
+    Returns:
+        Async iterator over the same chunks
+    """
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+async def iter_text(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """
+    Decode a text body chunk by chunk.
+
+    Args:
+        chunks: Body chunks
+        encoding: Character encoding of the body
+
+    Returns:
+        Async iterator over the decoded text pieces
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def _paragraph(line: str) -> str:
+    """Extract the paragraph text of one NDJSON line."""
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get("text")
+    if not isinstance(value, str):
+        raise ValueError("NDJSON lines must be strings or objects with a 'text' field")
+    return value
+
+
+async def iter_ndjson_paragraphs(chunks: AsyncIterator[bytes], max_line_chars: int) -> AsyncIterator[str]:
+    """
+    Read paragraphs from an NDJSON body, as text pieces of one document.
+
+    Args:
+        chunks: Body chunks, UTF-8 encoded
+        max_line_chars: Longest accepted line; 0 for no limit
+
+    Returns:
+        Async iterator over the paragraphs, each after the first preceded by
+        a paragraph break
+    """
+    line = ""
+    first = True
+    async for text in iter_text(chunks):
+        lines = (line + text).split("\n")
+        line = lines.pop()
+        if max_line_chars and len(line) > max_line_chars:
+            raise ValueError(f"NDJSON line exceeds {max_line_chars} characters")
+        for complete in lines:
+            if not complete.strip():
+                continue
+            paragraph = _paragraph(complete)
+            yield paragraph if first else "\n\n" + paragraph
+            first = False
+    if line.strip():
+        paragraph = _paragraph(line)
+        yield paragraph if first else "\n\n" + paragraph
+
+
+class UploadEventSourceResponse(EventSourceResponse):
+    """
+    Event stream sent while the request body is still being read.
+
+    The response watches the connection for a disconnect by receiving ASGI
+    messages, which would take body chunks away from the event generator.
+    It only starts receiving once `body_read` is set; until then a client
+    disconnect surfaces in the generator as ClientDisconnect.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        """
+        Initialize the response.
+
+        Args:
+            content: Event generator that reads the request body
+            body_read: Set by the generator once it stopped reading the body
+            **kwargs: Passed on to EventSourceResponse
+        """
+        super().__init__(content, **kwargs)
+        self._body_read = body_read
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def receive_after_body() -> Message:
+            await self._body_read.wait()
+            return await receive()
+
+        await super().__call__(scope, receive_after_body, send)
@@ -0,0 +1,68 @@
+"""Tests for the per-connection WebSocket writers in app.services.connections."""
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.services.connections import ConnectionManager, SLOW_CONSUMER_CLOSE_CODE
+
+
+class StalledWebSocket:
+    """WebSocket whose client never reads, so every send hangs."""
+
+    def __init__(self):
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def test_kicked_connection_releases_waiting_sender():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, send_timeout=0.2)
+        websocket = StalledWebSocket()
+        connection = await manager.connect(websocket)
+
+        async def produce():
+            for i in range(5):
+                await connection.send_json({"i": i})
+
+        # The writer times out on the first send and kicks the client; the
+        # producer, blocked on the full queue, must be released
+        with pytest.raises(WebSocketDisconnect):
+            await asyncio.wait_for(produce(), 2.0)
+        await asyncio.sleep(0.05)
+        return manager, websocket, connection
+
+    manager, websocket, connection = asyncio.run(scenario())
+    assert connection.closed
+    assert websocket.close_code == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.active_connections == 0
+
+
+def test_disconnect_releases_waiting_sender():
+    async def scenario():
+        manager = ConnectionManager(queue_size=1, send_timeout=10.0)
+        websocket = StalledWebSocket()
+        connection = await manager.connect(websocket)
+        await connection.send_text("first")  # Taken by the writer, which hangs
+        await connection.send_text("second")  # Fills the queue
+
+        sender = asyncio.create_task(connection.send_text("third"))
+        await asyncio.sleep(0.05)
+        assert not sender.done()
+
+        manager.disconnect(websocket)
+        with pytest.raises(WebSocketDisconnect):
+            await asyncio.wait_for(sender, 1.0)
+        assert not connection.offer("after close")
+        with pytest.raises(WebSocketDisconnect):
+            await connection.send_text("after close")
+
+    asyncio.run(scenario())
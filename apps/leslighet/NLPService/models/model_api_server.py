@@ -5,6 +5,8 @@ import sys
 import logging
 import asyncio
 import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Any, List
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, BackgroundTasks, Depends, HTTPException, status
@@ -60,10 +62,103 @@ loading_progress = {
 # Active WebSocket connections
 active_connections: Dict[str, WebSocket] = {}
 
-# Debounce state for real-time processing
-debounce_timers = {}
+# Debounce for real-time processing: a text is corrected once the session
+# has sent nothing newer for this long
 DEBOUNCE_DELAY = 300  # milliseconds
 
+# Real-time update counts across all sessions
+update_stats = {'submitted': 0, 'processed': 0, 'dropped': 0}
+
+# Model inference runs on one dedicated thread: the event loop stays free and
+# pipeline calls run one at a time, as they did on the event loop. A call that
+# has started cannot be cancelled.
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+
+_NOTHING = object()
+
+
+class LatestWinsScheduler:
+    """
+    Runs the newest text of one session, one job at a time.
+    
+    Mirrors LixService's app.utils.latest_wins.LatestWinsScheduler; this
+    service is built and deployed on its own and does not ship LixService's
+    package or its structlog and Prometheus dependencies, so the class is
+    kept here, counting into update_stats instead of a Prometheus counter.
+    
+    A new update replaces the one still waiting (dropped); a waiting update
+    runs once no newer one has arrived for `delay` seconds, unless it is
+    discarded first. Unlike the LixService scheduler there is no option to cancel the running
+    job: the model call it waits on runs in a thread and would keep running,
+    so the job finishes and the newest text runs next.
+    """
+    
+    def __init__(self, process, delay: float = 0.0):
+        self._process = process
+        self._delay = delay
+        self._latest: Any = _NOTHING
+        self._changed = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._job: Optional[asyncio.Task] = None
+        self._closed = False
+    
+    def submit(self, value: Any) -> None:
+        """Schedule a value, replacing the one still waiting"""
+        if self._closed:
+            return
+        self._count('submitted')
+        if self._latest is not _NOTHING:
+            self._count('dropped')
+        self._latest = value
+        self._changed.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+    
+    def discard(self) -> None:
+        """Forget the waiting value, e.g. when the session's input became too short"""
+        if self._latest is not _NOTHING:
+            self._latest = _NOTHING
+            self._count('dropped')
+    
+    def _count(self, outcome: str) -> None:
+        update_stats[outcome] += 1
+    
+    async def _run(self) -> None:
+        while self._latest is not _NOTHING:
+            if self._delay:
+                # Restart the wait whenever a newer value arrives
+                while True:
+                    self._changed.clear()
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), self._delay)
+                    except asyncio.TimeoutError:
+                        break
+                if self._latest is _NOTHING:
+                    # Discarded while waiting
+                    return
+            
+            value, self._latest = self._latest, _NOTHING
+            self._job = asyncio.create_task(self._process(value))
+            try:
+                await self._job
+                self._count('processed')
+            except Exception as e:
+                self._count('processed')
+                logger.error(f'Real-time job failed: {str(e)}')
+            finally:
+                self._job = None
+    
+    async def close(self) -> None:
+        """Stop waiting for the running job and forget the waiting value"""
+        self._closed = True
+        self.discard()
+        tasks = [task for task in (self._job, self._worker) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._job = None
+        self._worker = None
+
 # Security: Optional API key authentication
 API_KEY = os.environ.get('API_KEY')  # Can be None for development
 api_key_header = APIKeyHeader(name='X-API-Key', auto_error=False)
@@ -191,8 +286,11 @@ async def process_correction(text: str, session_id: str = None):
         # Security: Sanitize input text (basic)
         text = text[:10000]  # Limit input size to prevent DoS
         
-        # Generate correction
-        output = correction_model(text, max_length=512)
+        # Generate correction on the model thread, so other sessions are served
+        loop = asyncio.get_running_loop()
+        output = await loop.run_in_executor(
+            model_executor, functools.partial(correction_model, text, max_length=512)
+        )
         corrected_text = output[0]['generated_text']
         
         # If no changes were made, return original text
@@ -245,6 +343,14 @@ async def websocket_grammar_endpoint(websocket: WebSocket):
     active_connections[session_id] = websocket
     logger.info(f'WebSocket connected: {session_id}')
     
+    async def process_and_send(update):
+        text, client_session_id = update
+        correction_result = await process_correction(text, client_session_id)
+        await websocket.send_json(correction_result)
+    
+    # One latest-wins scheduler per session on this connection
+    schedulers: Dict[str, LatestWinsScheduler] = {}
+    
     try:
         while True:
             # Receive and process text data
@@ -263,29 +369,21 @@ async def websocket_grammar_endpoint(websocket: WebSocket):
                 if not isinstance(client_session_id, str) or len(client_session_id) > 100:
                     client_session_id = session_id
                 
-                # Cancel any pending debounced tasks for this session
-                if client_session_id in debounce_timers:
-                    debounce_timers[client_session_id].cancel()
-                
                 # Skip processing for very short inputs (less than 3 characters)
-                # This prevents processing partial words while typing
+                # This prevents processing partial words while typing; the
+                # session's waiting text is stale now and is not corrected
+                scheduler = schedulers.get(client_session_id)
                 if len(text.strip()) < 3:
+                    if scheduler is not None:
+                        scheduler.discard()
                     continue
                 
-                # Create a new debounced task
-                async def process_and_send():
-                    # Only process text after the debounce delay
-                    correction_result = await process_correction(text, client_session_id)
-                    await websocket.send_json(correction_result)
-                
-                # Schedule the debounced task
-                task = asyncio.create_task(asyncio.sleep(DEBOUNCE_DELAY/1000))
-                debounce_timers[client_session_id] = task
-                
-                # After the delay, process the text if this is still the most recent task
-                await task
-                if not task.cancelled():
-                    await process_and_send()
+                # Corrected after the debounce delay unless a newer text arrives
+                if scheduler is None:
+                    scheduler = schedulers[client_session_id] = LatestWinsScheduler(
+                        process_and_send, delay=DEBOUNCE_DELAY / 1000
+                    )
+                scheduler.submit((text, client_session_id))
             except json.JSONDecodeError:
                 await websocket.send_json({
                     'error': 'Invalid JSON data'
@@ -303,9 +401,8 @@ async def websocket_grammar_endpoint(websocket: WebSocket):
     finally:
         if session_id in active_connections:
             del active_connections[session_id]
-        if session_id in debounce_timers:
-            debounce_timers[session_id].cancel()
-            del debounce_timers[session_id]
+        for scheduler in schedulers.values():
+            await scheduler.close()
 
 # API routes
 @app.get('/api/health')
@@ -319,7 +416,13 @@ async def health_check():
             'correction': correction_model is not None
         },
         'loadingProgress': loading_progress,
-        'activeConnections': len(active_connections)
+        'activeConnections': len(active_connections),
+        'realtimeUpdates': {
+            **update_stats,
+            # Share of updates superseded before their correction ran
+            'droppedRatio': update_stats['dropped'] / update_stats['submitted']
+            if update_stats['submitted'] else 0.0
+        }
     }
     
     logger.info(f'Health check: {json.dumps(status)}')